@@ -0,0 +1,365 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+import numpy as np
+
+
+# --- CONSTANTES DE ADQUISICIÓN ---
+PUERTO_SCPI = 5025              # Puerto SCPI "raw socket" de los osciloscopios
+MAX_CONEXIONES = 1              # Conexiones del pool: el instrumento tiene una sola fuente de :WAV:DATA?
+TIMEOUT_SCPI_S = 5.0            # Espera máxima de una respuesta o de un disparo
+SONDEO_DISPARO_S = (0.0001, 0.01) # Pausa entre consultas de :TRIG:STAT?: crece de la mínima a la máxima
+MAX_CANALES_SCPI = 4            # Canales que se consultan con :CHANn:DISP? si no se piden
+CAPTURAS_EN_ANILLO = 4          # Capturas que guarda el anillo (>= 3: el escritor nunca pisa la última)
+VENTANA_ESTADISTICAS = 50       # Capturas sobre las que se calculan capturas/s y latencia
+TIPOS_FORMATO = {0: np.uint8, 1: np.dtype("<u2")}  # Campo 'formato' de :WAV:PRE? -> tipo de las muestras
+
+
+class ErrorSCPI(Exception):
+    """Respuesta inesperada del instrumento (bloque mal formado, preámbulo inválido, timeout)."""
+
+
+def parsear_direccion(texto, puerto=PUERTO_SCPI):
+    """'host' o 'host:puerto' -> (host, puerto). Lanza ValueError si el puerto no es un número."""
+    host, _, numero = texto.strip().rpartition(":")
+    if not host:
+        return numero, puerto
+    return host, int(numero)
+
+
+def parsear_preambulo(texto):
+    """
+    :WAV:PRE? -> dict con formato, puntos, xinc, xorig, xref, yinc, yorig,
+    yref (orden de los Rigol DS1000Z). Lanza ErrorSCPI si no tiene los
+    10 campos numéricos.
+    """
+    campos = texto.strip().split(",")
+    try:
+        formato, _, puntos, _, xinc, xorig, xref, yinc, yorig, yref = (float(c) for c in campos)
+    except ValueError:
+        raise ErrorSCPI(f"Preámbulo inválido: '{texto.strip()}'") from None
+    if int(formato) not in TIPOS_FORMATO:
+        raise ErrorSCPI(f"Formato de forma de onda no soportado: {int(formato)}")
+    return {"formato": int(formato), "puntos": int(puntos), "xinc": xinc, "xorig": xorig, "xref": xref,
+            "yinc": yinc, "yorig": yorig, "yref": yref}
+
+
+def tiempo_preambulo(preambulo, n):
+    """Tiempo de las n muestras: (i - xref) * xinc + xorig."""
+    return (np.arange(n) - preambulo["xref"]) * preambulo["xinc"] + preambulo["xorig"]
+
+
+def a_volts(crudo, preambulo, salida=None):
+    """Códigos de :WAV:DATA? -> V: (código - yorig - yref) * yinc, escrito en 'salida' si se da."""
+    salida = np.subtract(crudo, preambulo["yorig"] + preambulo["yref"], out=salida, dtype=np.float64)
+    salida *= preambulo["yinc"]
+    return salida
+
+
+class ConexionSCPI:
+    """
+    Una conexión TCP al instrumento. Las consultas de una captura se
+    escriben juntas (pipelining) y las respuestas se leen en orden: así
+    la transferencia de N canales cuesta un solo viaje de ida y vuelta.
+    """
+
+    def __init__(self, lector, escritor, timeout=TIMEOUT_SCPI_S):
+        self.lector = lector
+        self.escritor = escritor
+        self.timeout = timeout
+        self.formato = None # Último :WAV:FORM enviado por esta conexión
+
+    def escribir(self, *comandos):
+        self.escritor.write("".join(c + "\n" for c in comandos).encode("ascii"))
+
+    async def leer_linea(self):
+        linea = await asyncio.wait_for(self.lector.readline(), self.timeout)
+        if not linea:
+            raise ConnectionError("El instrumento cerró la conexión.")
+        return linea.decode("ascii", errors="replace").strip()
+
+    async def leer_bloque(self):
+        """Bloque binario de largo definido IEEE 488.2: '#' + n + largo (n dígitos) + datos + fin de línea."""
+        lector = self.lector
+        cabecera = await asyncio.wait_for(lector.readexactly(2), self.timeout)
+        if cabecera[:1] != b"#" or not cabecera[1:].isdigit() or cabecera[1:] == b"0":
+            raise ErrorSCPI(f"Se esperaba un bloque binario y llegó {cabecera!r}")
+        largo = int(await asyncio.wait_for(lector.readexactly(int(cabecera[1:])), self.timeout))
+        datos = await asyncio.wait_for(lector.readexactly(largo), self.timeout)
+        await asyncio.wait_for(lector.readline(), self.timeout) # '\n' final
+        return datos
+
+    async def consultar(self, comando):
+        self.escribir(comando)
+        return await self.leer_linea()
+
+    def cerrar(self):
+        self.escritor.close()
+
+
+class ClienteSCPI:
+    """
+    Cliente asyncio de un osciloscopio SCPI por TCP con un pool de
+    conexiones que quedan abiertas entre capturas (abrir una cuesta un
+    handshake TCP y, en los instrumentos reales, bastante más). Se usa
+    como 'async with ClienteSCPI(host) as cliente:'.
+    """
+
+    def __init__(self, host, puerto=PUERTO_SCPI, max_conexiones=MAX_CONEXIONES, timeout=TIMEOUT_SCPI_S):
+        self.host = host
+        self.puerto = puerto
+        self.timeout = timeout
+        self.max_conexiones = max_conexiones
+        self._libres = deque()
+        self._abiertas = 0
+        self._disponible = None # asyncio.Condition, se crea dentro del loop
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *excepcion):
+        self.cerrar()
+        return False
+
+    @asynccontextmanager
+    async def conexion(self):
+        """
+        Conexión del pool (abre una si hay lugar, si no espera a que se
+        libere otra). Si el bloque falla la conexión se descarta: puede
+        haber quedado una respuesta a medio leer.
+        """
+        if self._disponible is None:
+            self._disponible = asyncio.Condition()
+        async with self._disponible:
+            while not self._libres and self._abiertas >= self.max_conexiones:
+                await self._disponible.wait()
+            if self._libres:
+                conexion = self._libres.pop()
+            else:
+                self._abiertas += 1
+                conexion = None
+        if conexion is None:
+            try:
+                lector, escritor = await asyncio.wait_for(asyncio.open_connection(self.host, self.puerto),
+                                                          self.timeout)
+            except BaseException:
+                await self._liberar(None)
+                raise
+            conexion = ConexionSCPI(lector, escritor, self.timeout)
+        try:
+            yield conexion
+        except BaseException:
+            conexion.cerrar()
+            await self._liberar(None)
+            raise
+        await self._liberar(conexion)
+
+    async def _liberar(self, conexion):
+        async with self._disponible:
+            if conexion is None:
+                self._abiertas -= 1
+            else:
+                self._libres.append(conexion)
+            self._disponible.notify()
+
+    async def consultar(self, comando):
+        async with self.conexion() as conexion:
+            return await conexion.consultar(comando)
+
+    async def canales_activos(self):
+        """Canales encendidos (1..MAX_CANALES_SCPI), consultados en un solo viaje."""
+        async with self.conexion() as conexion:
+            conexion.escribir(*(f":CHAN{c}:DISP?" for c in range(1, MAX_CANALES_SCPI + 1)))
+            respuestas = [await conexion.leer_linea() for _ in range(MAX_CANALES_SCPI)]
+        return [c for c, r in enumerate(respuestas, 1) if r.strip().upper() in ("1", "ON")]
+
+    async def adquirir(self, canales, formato="BYTE"):
+        """
+        Una captura single-shot: :SING, espera a que :TRIG:STAT? sea STOP
+        y trae preámbulo y datos de cada canal. Devuelve (preámbulos,
+        crudos); los crudos son vistas sin copia sobre los bytes recibidos.
+        """
+        async with self.conexion() as conexion:
+            if conexion.formato != formato:
+                conexion.escribir(":WAV:MODE NORM", f":WAV:FORM {formato}")
+                conexion.formato = formato
+            conexion.escribir(":SING")
+            # Sondeo con pausa creciente: rápido para capturas cortas sin saturar al instrumento en las largas
+            limite = time.perf_counter() + self.timeout
+            pausa = 0.0
+            while (await conexion.consultar(":TRIG:STAT?")).upper() != "STOP":
+                if time.perf_counter() > limite:
+                    raise ErrorSCPI("El instrumento no disparó a tiempo.")
+                await asyncio.sleep(pausa)
+                pausa = min(max(2 * pausa, SONDEO_DISPARO_S[0]), SONDEO_DISPARO_S[1])
+            # Todas las transferencias juntas: las respuestas llegan en el orden pedido
+            conexion.escribir(*(f":WAV:SOUR CHAN{c}\n:WAV:PRE?\n:WAV:DATA?" for c in canales))
+            preambulos, crudos = [], []
+            for _ in canales:
+                preambulo = parsear_preambulo(await conexion.leer_linea())
+                crudo = np.frombuffer(await conexion.leer_bloque(), dtype=TIPOS_FORMATO[preambulo["formato"]])
+                preambulos.append(preambulo)
+                crudos.append(crudo)
+        return preambulos, crudos
+
+    def cerrar(self):
+        while self._libres:
+            self._libres.pop().cerrar()
+        self._abiertas = 0
+
+
+class AnilloCapturas:
+    """
+    Últimas capturas de la adquisición en arrays preasignados
+    (capturas x columnas x puntos; la columna 0 es el tiempo, como en
+    seguimiento.BufferCircular). El hilo de adquisición llena la ranura
+    siguiente sin bloquear y después la publica; la GUI copia la última
+    publicada, así nunca ve una captura a medio escribir.
+    """
+
+    def __init__(self, capacidad=CAPTURAS_EN_ANILLO):
+        self.capacidad = max(capacidad, 3)
+        self.datos = None
+        self.numero = 0             # Capturas publicadas
+        self._descartadas = 0
+        self._pedidas = np.zeros(self.capacidad)  # perf_counter del :SING de cada ranura
+        self._listas = np.zeros(self.capacidad)   # perf_counter en que se publicó
+        self._candado = threading.Lock()
+
+    def ranura(self, n_columnas, puntos):
+        """Ranura (columnas x puntos) donde se escribe la próxima captura."""
+        forma = (self.capacidad, n_columnas, puntos)
+        if self.datos is None or self.datos.shape != forma:
+            with self._candado:
+                self.datos = np.empty(forma)
+                self._descartadas = self.numero # Tenían otra forma: no se pueden devolver
+        return self.datos[self.numero % self.capacidad]
+
+    def publicar(self, t_pedido):
+        """La ranura de ranura() pasa a ser la última captura."""
+        with self._candado:
+            k = self.numero % self.capacidad
+            self._pedidas[k] = t_pedido
+            self._listas[k] = time.perf_counter()
+            self.numero += 1
+
+    def ultima(self, desde=0):
+        """
+        (número, datos, t_pedido, t_lista) de la última captura si es
+        posterior a 'desde'; si no, None. 'datos' es una copia: el anillo
+        sigue girando mientras la GUI la muestra.
+        """
+        with self._candado:
+            if self.numero <= max(desde, self._descartadas):
+                return None
+            k = (self.numero - 1) % self.capacidad
+            return self.numero, self.datos[k].copy(), self._pedidas[k], self._listas[k]
+
+
+class Adquisidor:
+    """
+    Adquisición continua en un hilo propio con su loop de asyncio: pide
+    capturas single-shot una tras otra y las deja en el anillo. La GUI
+    sondea el anillo con root.after (como el modo seguimiento) y nunca
+    espera a la red. Si falla, el error queda en 'error' y el hilo termina.
+    """
+
+    def __init__(self, host, puerto=PUERTO_SCPI, canales=None, formato="BYTE",
+                 capacidad=CAPTURAS_EN_ANILLO, max_capturas=None, ventana_estadisticas=VENTANA_ESTADISTICAS):
+        self.host = host
+        self.puerto = puerto
+        self.canales = list(canales) if canales else None # None: los que estén encendidos
+        self.formato = formato
+        self.max_capturas = max_capturas
+        self.anillo = AnilloCapturas(capacidad)
+        self.error = None
+        self.latencias = deque(maxlen=ventana_estadisticas) # s desde :SING hasta publicada
+        self.fin_capturas = deque(maxlen=ventana_estadisticas) # perf_counter de cada captura publicada
+        self._detener = threading.Event()
+        self._hilo = None
+        self._loop = None
+        self._tarea = None
+
+    @property
+    def nombres(self):
+        return [f"CH{c} (V)" for c in self.canales or []]
+
+    @property
+    def activo(self):
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self):
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._correr, name="adquisicion", daemon=True)
+        self._hilo.start()
+
+    def detener(self, esperar=True):
+        """Cancela la captura en curso y cierra las conexiones."""
+        self._detener.set()
+        loop, tarea = self._loop, self._tarea
+        if loop is not None and tarea is not None:
+            try:
+                loop.call_soon_threadsafe(tarea.cancel)
+            except RuntimeError:
+                pass # El loop ya terminó
+        if esperar and self._hilo is not None and self._hilo is not threading.current_thread():
+            self._hilo.join(TIMEOUT_SCPI_S)
+
+    def esperar(self, timeout=None):
+        """Espera a que termine el hilo (max_capturas alcanzado, error o detener())."""
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+
+    @property
+    def capturas_por_segundo(self):
+        if len(self.fin_capturas) < 2:
+            return 0.0
+        return (len(self.fin_capturas) - 1) / (self.fin_capturas[-1] - self.fin_capturas[0])
+
+    @property
+    def latencia(self):
+        """Mediana de los últimos tiempos desde :SING hasta la captura en el anillo (s)."""
+        return float(np.median(self.latencias)) if self.latencias else 0.0
+
+    def _correr(self):
+        try:
+            asyncio.run(self._adquirir())
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            self._loop = self._tarea = None
+
+    async def _adquirir(self):
+        self._loop = asyncio.get_running_loop()
+        self._tarea = asyncio.current_task()
+        if self._detener.is_set():
+            return
+        tiempo = clave_tiempo = None
+        async with ClienteSCPI(self.host, self.puerto) as cliente:
+            if self.canales is None:
+                self.canales = await cliente.canales_activos()
+                if not self.canales:
+                    raise ErrorSCPI("El instrumento no tiene canales encendidos.")
+            while not self._detener.is_set():
+                t_pedido = time.perf_counter()
+                preambulos, crudos = await cliente.adquirir(self.canales, self.formato)
+                puntos = min(len(c) for c in crudos)
+                ranura = self.anillo.ranura(len(crudos) + 1, puntos)
+                # El tiempo sólo se recalcula si cambió la base de tiempo
+                clave = (puntos, preambulos[0]["xinc"], preambulos[0]["xorig"], preambulos[0]["xref"])
+                if clave != clave_tiempo:
+                    tiempo, clave_tiempo = tiempo_preambulo(preambulos[0], puntos), clave
+                ranura[0] = tiempo
+                for fila, crudo, preambulo in zip(ranura[1:], crudos, preambulos):
+                    a_volts(crudo[:puntos], preambulo, fila)
+                self.anillo.publicar(t_pedido)
+                ahora = time.perf_counter()
+                self.latencias.append(ahora - t_pedido)
+                self.fin_capturas.append(ahora)
+                if self.max_capturas is not None and self.anillo.numero >= self.max_capturas:
+                    break
@@ -0,0 +1,163 @@
+"""
+Benchmark de la adquisición SCPI (adquisicion.Adquisidor) contra el
+osciloscopio simulado: por cada profundidad de memoria pide capturas
+single-shot una tras otra y mide capturas por segundo, MB/s, la latencia
+desde :SING hasta la captura en el anillo y la latencia extremo a extremo
+hasta que un consumidor (el papel de la GUI) la copia. El simulador corre
+en otro proceso, así no comparte el GIL con el cliente. Con --host se
+mide contra otro servidor (o un instrumento real) en lugar del simulador.
+
+    python benchmark_adquisicion.py [--puntos 1.2e4,1.2e5,1.2e6] [--capturas 200]
+                                    [--formato BYTE] [--sin-demora] [--salida resultados.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from adquisicion import Adquisidor, ClienteSCPI, PUERTO_SCPI, TIPOS_FORMATO
+
+
+# --- CONSTANTES DEL BENCHMARK DE ADQUISICIÓN ---
+CAPTURAS_BENCHMARK = 200      # Capturas medidas por profundidad de memoria
+CAPTURAS_CALENTAMIENTO = 5    # Capturas que se descartan (conexión, primera forma de onda)
+SONDEO_CONSUMIDOR_S = 0.0002  # Pausa del consumidor entre consultas al anillo
+FORMATOS_BENCHMARK = {"BYTE": 0, "WORD": 1}
+
+
+def percentil_ms(valores, q):
+    return float(np.percentile(valores, q) * 1000) if len(valores) else None
+
+
+def lanzar_simulador(sin_demora):
+    """Simulador en un proceso aparte con puerto libre. Devuelve (proceso, puerto)."""
+    carpeta = os.path.dirname(os.path.abspath(__file__))
+    proceso = subprocess.Popen([sys.executable, os.path.join(carpeta, "simulador_scpi.py"), "--puerto", "0"]
+                               + (["--sin-demora"] if sin_demora else []),
+                               stdout=subprocess.PIPE, text=True, cwd=carpeta)
+    linea = proceso.stdout.readline() # "Simulador SCPI en host:puerto ..."
+    try:
+        return proceso, int(linea.split()[3].rsplit(":", 1)[1])
+    except (IndexError, ValueError):
+        proceso.kill()
+        raise RuntimeError(f"El simulador no arrancó: '{linea.strip()}'") from None
+
+
+async def configurar(host, puerto, puntos):
+    async with ClienteSCPI(host, puerto) as cliente:
+        async with cliente.conexion() as conexion:
+            conexion.escribir(f":WAV:POIN {puntos}")
+            return int(await conexion.consultar(":WAV:POIN?"))
+
+
+def medir(host, puerto, puntos, capturas, formato):
+    """
+    Corre un Adquisidor hasta 'capturas' (más las de calentamiento) con un
+    consumidor que sondea el anillo como la GUI, pero sin esperar un
+    cuadro entre consultas. Devuelve las métricas.
+    """
+    puntos = asyncio.run(configurar(host, puerto, puntos))
+    total = capturas + CAPTURAS_CALENTAMIENTO
+    adquisidor = Adquisidor(host, puerto, formato=formato, max_capturas=total, ventana_estadisticas=total)
+    extremo_a_extremo = []
+    consumidas = 0
+
+    def consumir():
+        nonlocal consumidas
+        desde = 0
+        while adquisidor.activo or adquisidor.anillo.numero > desde:
+            ultima = adquisidor.anillo.ultima(desde)
+            if ultima is None:
+                time.sleep(SONDEO_CONSUMIDOR_S)
+                continue
+            desde, _, t_pedido, _ = ultima
+            if desde > CAPTURAS_CALENTAMIENTO:
+                extremo_a_extremo.append(time.perf_counter() - t_pedido)
+                consumidas += 1
+
+    adquisidor.iniciar()
+    consumidor = threading.Thread(target=consumir, name="consumidor")
+    consumidor.start()
+    adquisidor.esperar()
+    consumidor.join()
+    if adquisidor.error is not None:
+        raise adquisidor.error
+
+    latencias = list(adquisidor.latencias)[CAPTURAS_CALENTAMIENTO:]
+    fines = list(adquisidor.fin_capturas)[CAPTURAS_CALENTAMIENTO:]
+    por_segundo = (len(fines) - 1) / (fines[-1] - fines[0]) if len(fines) > 1 else 0.0
+    bytes_captura = puntos * len(adquisidor.canales) * np.dtype(TIPOS_FORMATO[FORMATOS_BENCHMARK[formato]]).itemsize
+    return {
+        "puntos": puntos,
+        "canales": len(adquisidor.canales),
+        "capturas_por_segundo": por_segundo,
+        "mb_por_segundo": por_segundo * bytes_captura / 1e6,
+        "latencia_adquisicion_ms": percentil_ms(latencias, 50),
+        "latencia_adquisicion_p95_ms": percentil_ms(latencias, 95),
+        "latencia_extremo_ms": percentil_ms(extremo_a_extremo, 50),
+        "latencia_extremo_p95_ms": percentil_ms(extremo_a_extremo, 95),
+        "consumidas": consumidas, # El consumidor sólo toma la última: las demás se saltean, como en la GUI
+    }
+
+
+def _lista(tipo):
+    return lambda texto: [tipo(parte) for parte in texto.split(",") if parte.strip()]
+
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de la adquisición SCPI contra el simulador.")
+    parser.add_argument("--puntos", type=_lista(lambda v: int(float(v))), default="1.2e4,1.2e5,1.2e6",
+                        help="Profundidades de memoria (muestras por canal), separadas por comas")
+    parser.add_argument("--capturas", type=int, default=CAPTURAS_BENCHMARK)
+    parser.add_argument("--formato", choices=list(FORMATOS_BENCHMARK), default="BYTE")
+    parser.add_argument("--sin-demora", action="store_true",
+                        help="El simulador no espera la duración de cada captura (mide sólo la transferencia)")
+    parser.add_argument("--host", help="Servidor SCPI a medir en lugar del simulador")
+    parser.add_argument("--puerto", type=int, default=PUERTO_SCPI)
+    parser.add_argument("--salida", default="resultados_adquisicion.json")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    opciones = parsear_argumentos(argv)
+    simulador = None
+    host, puerto = opciones.host, opciones.puerto
+    if host is None:
+        simulador, puerto = lanzar_simulador(opciones.sin_demora)
+        host = "127.0.0.1"
+    resultados = {"fecha": time.strftime("%Y-%m-%dT%H:%M:%S"), "servidor": f"{host}:{puerto}",
+                  "formato": opciones.formato, "sin_demora": opciones.sin_demora, "casos": []}
+    fallidos = 0
+    try:
+        for puntos in opciones.puntos:
+            try:
+                metricas = medir(host, puerto, puntos, opciones.capturas, opciones.formato)
+            except Exception as e:
+                fallidos += 1
+                print(f"ERROR {puntos} puntos: {type(e).__name__}: {e}", file=sys.stderr)
+                resultados["casos"].append({"puntos": puntos, "error": str(e)})
+                continue
+            resultados["casos"].append(metricas)
+            print(f"{metricas['puntos']:>9,} x {metricas['canales']}  {metricas['capturas_por_segundo']:8.1f} capt/s"
+                  f"  {metricas['mb_por_segundo']:7.1f} MB/s"
+                  f"  adquisición {metricas['latencia_adquisicion_ms']:7.2f} ms"
+                  f" (p95 {metricas['latencia_adquisicion_p95_ms']:7.2f})"
+                  f"  extremo a extremo {metricas['latencia_extremo_ms']:7.2f} ms"
+                  f" (p95 {metricas['latencia_extremo_p95_ms']:7.2f})")
+    finally:
+        if simulador is not None:
+            simulador.terminate()
+            simulador.wait()
+    with open(opciones.salida, "w", encoding="utf-8") as archivo:
+        json.dump(resultados, archivo, indent=2)
+    return 1 if fallidos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,421 @@
+"""
+Benchmark de la vista de osciloscopio de gui1_14 sin ventana: genera
+capturas sintéticas (10^4 a 10^8 filas, 1 a 8 canales, coma o tab,
+preámbulos de Rigol/Tektronix/Keysight), las abre con la misma lógica de
+TC1ScopeApp y mide carga, primer cuadro, redibujo al mover el offset y al
+cambiar time/div, arrastre de cursores y memoria pico. Cada caso corre en
+un proceso nuevo, así la memoria pico es la del caso. Los resultados van
+a un JSON; con --base se comparan contra una corrida anterior y el código
+de salida es 1 si alguna métrica empeoró más que la tolerancia.
+
+    python benchmark_escopio.py [--filas 1e4,1e6] [--canales 1,8] [--separadores comma,tab]
+                                [--preambulos none,rigol] [--salida resultados.json]
+                                [--base resultados_anteriores.json] [--tolerancia 0.25]
+                                [--superpuestas 10]
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+try:
+    import resource # No existe en Windows: ahí la memoria pico queda en None
+except ImportError:
+    resource = None
+
+from cache_binaria import ruta_cache
+from carga_csv import cargar_captura
+from gui1_14 import TIEMPOS_POR_DIV
+from render_lote import EscopioSinVentana, Valor
+from superposicion import cargar_superpuesta
+
+
+# --- CONSTANTES DEL BENCHMARK ---
+SEPARADORES = {"comma": ",", "tab": "\t"}
+PREAMBULOS = ["none", "rigol", "tektronix", "keysight"]
+FS_SINTETICA = 1_000_000      # Muestras por segundo de las capturas generadas (tiempo exacto en µs)
+FILAS_POR_BLOQUE = 1_000_000  # Filas que se formatean juntas al generar
+DECIMALES = 4                 # Valores de canal como ±d.dddd (amplitud < 10 V)
+REPETICIONES = 40             # Redibujos / movimientos de cursor por medición
+PASOS_TIEMPO_DIV = 3          # Escalas de time/div a cada lado de la automática
+VERSION_RESULTADOS = 1
+TOLERANCIA_REGRESION = 0.25   # Fracción que puede empeorar una métrica respecto de la base
+MARGEN_MS = 2.0               # Margen absoluto: el ruido de tiempos chicos no es regresión
+MARGEN_MB = 16.0
+
+
+# --- Generador de capturas sintéticas ---
+
+def _digitos(enteros, ancho):
+    """Enteros no negativos -> matriz (n, ancho) de dígitos ASCII con ceros a la izquierda."""
+    potencias = 10 ** np.arange(ancho - 1, -1, -1, dtype=np.int64)
+    return (enteros[:, None] // potencias % 10 + ord("0")).astype(np.uint8)
+
+
+def _texto(caracteres, n):
+    """Columna constante (n, len) con los bytes de 'caracteres'."""
+    return np.broadcast_to(np.frombuffer(caracteres.encode("latin1"), dtype=np.uint8),
+                           (n, len(caracteres)))
+
+
+def _campo_tiempo(muestras, ancho_entero):
+    """Tiempo en s con 6 decimales (exacto a FS_SINTETICA), desde el número de muestra."""
+    segundos, micro = np.divmod(muestras, FS_SINTETICA)
+    return [_digitos(segundos, ancho_entero), _texto(".", len(muestras)), _digitos(micro, 6)]
+
+
+def _campo_valor(valores):
+    """±d.dddd: ancho fijo, así la fila se arma como una matriz de bytes."""
+    cuantizado = np.rint(np.clip(valores, -9.9999, 9.9999) * 10 ** DECIMALES).astype(np.int64)
+    signo = np.where(cuantizado < 0, ord("-"), ord("+")).astype(np.uint8)[:, None]
+    absoluto = np.abs(cuantizado)
+    return [signo, _digitos(absoluto // 10 ** DECIMALES, 1), _texto(".", len(valores)),
+            _digitos(absoluto % 10 ** DECIMALES, DECIMALES)]
+
+
+def _senales(muestras, canales, generador):
+    """Canal c: senoidal de (c + 1) kHz y amplitud 1 + c, con armónicos y ruido."""
+    t = muestras / FS_SINTETICA
+    for c in range(canales):
+        fase = 2 * np.pi * 1e3 * (c + 1) * t
+        yield (1 + c) * (np.sin(fase) + 0.1 * np.sin(3 * fase)) * 0.9 + 0.01 * generador.standard_normal(len(t))
+
+
+def _preambulo(preambulo, canales, separador):
+    """Líneas anteriores a los datos, como las escriben los osciloscopios."""
+    s = separador
+    if preambulo == "rigol":
+        return [s.join(["X"] + [f"CH{c + 1}" for c in range(canales)] + ["Start", "Increment", ""]),
+                s.join(["Sequence"] + ["Volt"] * canales + ["0.000000e+00", f"{1 / FS_SINTETICA:e}"])]
+    if preambulo == "keysight":
+        return [s.join(["x-axis"] + [str(c + 1) for c in range(canales)]),
+                s.join(["second"] + ["Volt"] * canales)]
+    if preambulo == "tektronix":
+        return [] # La metadata va en las primeras columnas de las primeras filas de datos
+    return [s.join(["Time (s)"] + [f"CH{c + 1} (V)" for c in range(canales)])]
+
+
+def _metadata_tektronix(filas):
+    return [("Record Length", str(filas), ""), ("Sample Interval", f"{1 / FS_SINTETICA:e}", ""),
+            ("Trigger Point", "0", ""), ("", "", ""), ("Source", "CH1", ""),
+            ("Vertical Units", "V", ""), ("Horizontal Units", "s", "")]
+
+
+def generar_captura(ruta, filas, canales=2, separador=",", preambulo="none", semilla=0, progreso=None):
+    """
+    Escribe una captura sintética de 'filas' muestras y 'canales' canales.
+    Las filas se arman de a FILAS_POR_BLOQUE como una matriz de bytes de
+    ancho fijo (dígitos calculados con numpy, sin formatear número por
+    número), así 10^8 filas se generan en minutos y no en horas.
+    """
+    generador = np.random.default_rng(semilla)
+    ancho_segundos = len(str(max(filas - 1, 0) // FS_SINTETICA))
+    ancho_indice = len(str(max(filas - 1, 0)))
+    metadata = _metadata_tektronix(filas) if preambulo == "tektronix" else []
+    with open(ruta, "wb") as archivo:
+        for linea in _preambulo(preambulo, canales, separador):
+            archivo.write((linea + "\n").encode("latin1"))
+        for inicio in range(0, filas, FILAS_POR_BLOQUE):
+            muestras = np.arange(inicio, min(inicio + FILAS_POR_BLOQUE, filas), dtype=np.int64)
+            n = len(muestras)
+            sep = _texto(separador, n)
+            campos = []
+            if preambulo == "tektronix":
+                campos += [_texto(separador * 3, n)]
+            if preambulo == "rigol":
+                campos += [_digitos(muestras, ancho_indice)] # Número de muestra; el tiempo sale del encabezado
+            else:
+                campos += _campo_tiempo(muestras, ancho_segundos)
+            for valores in _senales(muestras, canales, generador):
+                campos += [sep] + _campo_valor(valores)
+            if preambulo in ("rigol", "tektronix"):
+                campos += [sep] # Separador final, como en los CSV de esos equipos
+            campos += [_texto("\n", n)]
+            bloque = np.concatenate(campos, axis=1)
+            if inicio == 0 and metadata:
+                # Las primeras filas de Tektronix llevan la metadata en vez de campos vacíos
+                lineas = bloque.tobytes().split(b"\n")
+                for k, campos_meta in enumerate(metadata[:n]):
+                    lineas[k] = (separador.join(campos_meta) + separador).encode("latin1") + lineas[k][3 * len(separador):]
+                archivo.write(b"\n".join(lineas))
+            else:
+                archivo.write(bloque.tobytes())
+            if progreso is not None:
+                progreso(min(inicio + FILAS_POR_BLOQUE, filas) / filas)
+
+
+# --- Vista sin ventana y mediciones ---
+
+class EscopioBenchmark(EscopioSinVentana):
+    """
+    EscopioSinVentana con lo que además piden actualizar_grafica y los
+    cursores, para medir el mismo camino que recorre la GUI: fondo
+    cacheado + blit en cada redibujo y on_press/on_motion al arrastrar.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.scl_tension_offset = Valor(0)
+        self.texto_deltas = ""
+
+    def mostrar_captura(self, nombres, datos, indice):
+        super().mostrar_captura(nombres, datos, indice)
+        if self.almacen is not None:
+            self.actualizar_rango_y_global()
+
+    def actualizar_label_deltas(self, dx, dy, channel_num=None, show_channel=True):
+        self.texto_deltas = f"ΔX = {dx}, ΔY = {dy}" # En la GUI es un Label de Tk
+
+    def update_voltage_offset_range(self):
+        pass # Configura el slider de offset de tensión
+
+
+def _cronometrar(funcion, *args):
+    inicio = time.perf_counter()
+    funcion(*args)
+    return (time.perf_counter() - inicio) * 1000
+
+
+def _resumen(nombre, tiempos_ms):
+    """Mediana y percentil 95 (ms) de una serie de mediciones."""
+    return {f"{nombre}_ms": float(np.median(tiempos_ms)),
+            f"{nombre}_p95_ms": float(np.percentile(tiempos_ms, 95))}
+
+
+def rss_pico_mb():
+    """Memoria residente pico del proceso en MB (None si el sistema no la informa)."""
+    try:
+        # Linux: VmHWM es el pico de este proceso; ru_maxrss arrastra el del padre a través de fork/exec
+        with open("/proc/self/status", encoding="ascii") as estado:
+            for linea in estado:
+                if linea.startswith("VmHWM:"):
+                    return int(linea.split()[1]) / 2 ** 10
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 2 ** 20 if sys.platform == "darwin" else pico / 2 ** 10 # macOS: bytes; el resto: KiB
+
+
+def medir_caso(ruta, repeticiones=REPETICIONES, superpuestas=0):
+    """
+    Mide una captura: carga sin cache (parseo + índice + escritura del
+    cache) y con cache, primer cuadro (preparar la vista y el render
+    completo), redibujo con offset y con time/div, y arrastre de un
+    cursor. Con 'superpuestas' > 0 mide además el redibujo con offset
+    con esa cantidad de copias de la misma captura superpuestas, cada una
+    corrida en el tiempo. Devuelve un dict de métricas en ms/MB.
+    """
+    metricas = {}
+    shutil.rmtree(ruta_cache(ruta), ignore_errors=True)
+    metricas["carga_fria_ms"] = _cronometrar(cargar_captura, ruta)
+    inicio = time.perf_counter()
+    captura = cargar_captura(ruta)
+    metricas["carga_cache_ms"] = (time.perf_counter() - inicio) * 1000
+
+    escopio = EscopioBenchmark()
+    inicio = time.perf_counter()
+    escopio.mostrar_captura(*captura)
+    escopio.actualizar_grafica()
+    metricas["primer_cuadro_ms"] = (time.perf_counter() - inicio) * 1000
+    metricas["muestras"] = int(escopio.almacen.n_muestras)
+    metricas["canales"] = int(escopio.almacen.n_canales)
+
+    # Offset: de punta a punta del slider (± media pantalla)
+    tiempos = []
+    for offset in np.linspace(-5, 5, repeticiones):
+        escopio.offset_divisiones = float(offset)
+        tiempos.append(_cronometrar(escopio.actualizar_grafica))
+    metricas.update(_resumen("redibujo_offset", tiempos))
+    escopio.offset_divisiones = 0.0
+
+    # Time/div: escalas vecinas de la automática, ida y vuelta
+    etiquetas = [etiqueta for etiqueta, _ in TIEMPOS_POR_DIV]
+    k = etiquetas.index(escopio.var_tiempo_div.get())
+    vecinas = etiquetas[max(k - PASOS_TIEMPO_DIV, 0):k + PASOS_TIEMPO_DIV + 1]
+    tiempos = []
+    for etiqueta in itertools.islice(itertools.cycle(vecinas + vecinas[-2:0:-1]), repeticiones):
+        escopio.var_tiempo_div.set(etiqueta)
+        tiempos.append(_cronometrar(escopio.actualizar_grafica))
+    metricas.update(_resumen("redibujo_tiempo_div", tiempos))
+    escopio.var_tiempo_div.set(etiquetas[k])
+
+    # Cursores: se toma el X1 con un clic sobre él y se lo arrastra por la pantalla
+    from matplotlib.backend_bases import MouseEvent
+    escopio.var_cursores.set(True)
+    escopio.actualizar_grafica()
+    x1 = escopio.artistas_cursor[0].get_xdata()[0]
+    y_medio = sum(escopio.ax.get_ylim()) / 2
+    px, py = escopio.ax.transData.transform((x1, y_medio))
+    escopio.on_press(MouseEvent("button_press_event", escopio.canvas, px, py, button=1))
+    if escopio.selected_cursor is None:
+        raise RuntimeError("No se pudo tomar el cursor")
+    caja = escopio.ax.bbox
+    tiempos = []
+    for x in np.linspace(caja.x0 + 1, caja.x1 - 1, repeticiones):
+        evento = MouseEvent("motion_notify_event", escopio.canvas, x, py)
+        tiempos.append(_cronometrar(escopio.on_motion, evento))
+    escopio.on_release(MouseEvent("button_release_event", escopio.canvas, px, py, button=1))
+    metricas.update(_resumen("arrastre_cursor", tiempos))
+    escopio.var_cursores.set(False)
+
+    if superpuestas:
+        # Comparten las muestras (misma ruta): se mide alinear y pintar, no la memoria de N archivos
+        almacen = cargar_superpuesta(ruta)
+        paso = escopio.almacen.tiempo[-1] - escopio.almacen.tiempo[0]
+        for k in range(superpuestas):
+            escopio.superposicion.agregar(ruta, almacen, offset=(k + 1) * paso / (4 * superpuestas))
+        tiempos = []
+        for offset in np.linspace(-5, 5, repeticiones):
+            escopio.offset_divisiones = float(offset)
+            tiempos.append(_cronometrar(escopio.actualizar_grafica))
+        metricas.update(_resumen("redibujo_superpuestas", tiempos))
+        metricas["superpuestas"] = superpuestas
+
+    metricas["rss_pico_mb"] = rss_pico_mb()
+    return metricas
+
+
+# --- Casos, comparación y línea de comandos ---
+
+def nombre_caso(caso):
+    return f"{caso['filas']:.0e}x{caso['canales']}-{caso['separador']}-{caso['preambulo']}".replace("+0", "")
+
+
+def preparar_captura(caso, carpeta, regenerar=False):
+    """Ruta de la captura sintética del caso; la genera si no existe (o si se pide)."""
+    ruta = os.path.join(carpeta, f"sintetica_{nombre_caso(caso)}.csv")
+    if regenerar or not os.path.exists(ruta):
+        generar_captura(ruta + ".tmp", caso["filas"], caso["canales"], SEPARADORES[caso["separador"]],
+                        caso["preambulo"])
+        os.replace(ruta + ".tmp", ruta)
+    return ruta
+
+
+def correr_caso(ruta, repeticiones, superpuestas=0):
+    """medir_caso en un proceso nuevo (la memoria pico no arrastra la de casos anteriores)."""
+    proceso = subprocess.run([sys.executable, os.path.abspath(__file__), "--medir", ruta,
+                              "--repeticiones", str(repeticiones), "--superpuestas", str(superpuestas)],
+                             capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proceso.returncode != 0:
+        raise RuntimeError(proceso.stderr.strip().splitlines()[-1] if proceso.stderr.strip() else
+                           f"código de salida {proceso.returncode}")
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+
+def comparar(resultados, base, tolerancia=TOLERANCIA_REGRESION):
+    """
+    Métricas que empeoraron: actual > base * (1 + tolerancia) + margen
+    (MARGEN_MS o MARGEN_MB según la unidad). Se comparan los casos con el
+    mismo nombre; los que no están en la base se ignoran.
+    """
+    anteriores = {c["nombre"]: c["metricas"] for c in base.get("casos", [])}
+    regresiones = []
+    for caso in resultados["casos"]:
+        previas = anteriores.get(caso["nombre"])
+        if not previas or "metricas" not in caso:
+            continue
+        for metrica, valor in caso["metricas"].items():
+            margen = MARGEN_MS if metrica.endswith("_ms") else MARGEN_MB if metrica.endswith("_mb") else None
+            anterior = previas.get(metrica)
+            if margen is None or valor is None or anterior is None:
+                continue
+            limite = anterior * (1 + tolerancia) + margen
+            if valor > limite:
+                regresiones.append({"caso": caso["nombre"], "metrica": metrica, "base": anterior,
+                                    "actual": valor, "limite": limite})
+    return regresiones
+
+
+def _lista(tipo):
+    return lambda texto: [tipo(parte) for parte in texto.split(",") if parte.strip()]
+
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de carga y redibujo de la vista de osciloscopio.")
+    parser.add_argument("--filas", type=_lista(lambda v: int(float(v))), default="1e4,1e5,1e6",
+                        help="Filas de cada captura (10^4 a 10^8), separadas por comas")
+    parser.add_argument("--canales", type=_lista(int), default="1,2,8", help="Canales (1 a 8)")
+    parser.add_argument("--separadores", type=_lista(str), default="comma", help="comma y/o tab")
+    parser.add_argument("--preambulos", type=_lista(str), default="none",
+                        help="none, rigol, tektronix y/o keysight")
+    parser.add_argument("--carpeta", default=os.path.join(tempfile.gettempdir(), "tc_benchmark"),
+                        help="Dónde se guardan las capturas generadas (se reusan entre corridas)")
+    parser.add_argument("--regenerar", action="store_true", help="Vuelve a generar las capturas")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES)
+    parser.add_argument("--superpuestas", type=int, default=0,
+                        help="Mide también el redibujo con N copias de cada captura superpuestas")
+    parser.add_argument("--salida", default="resultados_benchmark.json")
+    parser.add_argument("--base", help="Resultados anteriores contra los que se buscan regresiones")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_REGRESION)
+    parser.add_argument("--medir", help=argparse.SUPPRESS) # Uso interno: mide una captura e imprime JSON
+    opciones = parser.parse_args(argv)
+    for separador in opciones.separadores:
+        if separador not in SEPARADORES:
+            parser.error(f"Separador desconocido: '{separador}'")
+    for preambulo in opciones.preambulos:
+        if preambulo not in PREAMBULOS:
+            parser.error(f"Preámbulo desconocido: '{preambulo}'")
+    if any(not 1 <= c <= 8 for c in opciones.canales):
+        parser.error("Los canales van de 1 a 8")
+    return opciones
+
+
+def main(argv=None):
+    opciones = parsear_argumentos(argv)
+    if opciones.medir:
+        print(json.dumps(medir_caso(opciones.medir, opciones.repeticiones, opciones.superpuestas)))
+        return 0
+
+    os.makedirs(opciones.carpeta, exist_ok=True)
+    resultados = {
+        "version": VERSION_RESULTADOS,
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "maquina": {"plataforma": platform.platform(), "python": platform.python_version(),
+                    "procesador": platform.processor() or platform.machine(), "nucleos": os.cpu_count()},
+        "umbrales": {"tolerancia": opciones.tolerancia, "margen_ms": MARGEN_MS, "margen_mb": MARGEN_MB},
+        "casos": [],
+    }
+    fallidos = 0
+    for filas, canales, separador, preambulo in itertools.product(
+            opciones.filas, opciones.canales, opciones.separadores, opciones.preambulos):
+        caso = {"filas": filas, "canales": canales, "separador": separador, "preambulo": preambulo}
+        nombre = nombre_caso(caso)
+        try:
+            ruta = preparar_captura(caso, opciones.carpeta, opciones.regenerar)
+            metricas = correr_caso(ruta, opciones.repeticiones, opciones.superpuestas)
+        except Exception as e:
+            fallidos += 1
+            print(f"ERROR {nombre}: {e}", file=sys.stderr)
+            resultados["casos"].append({"nombre": nombre, **caso, "error": str(e)})
+            continue
+        resultados["casos"].append({"nombre": nombre, **caso, "metricas": metricas})
+        print(f"{nombre:<24} carga {metricas['carga_fria_ms']:9.1f} ms (cache {metricas['carga_cache_ms']:7.1f})"
+              f"  1er cuadro {metricas['primer_cuadro_ms']:7.1f}  offset {metricas['redibujo_offset_ms']:6.1f}"
+              f"  t/div {metricas['redibujo_tiempo_div_ms']:6.1f}  cursor {metricas['arrastre_cursor_ms']:5.1f} ms"
+              f"  RSS {metricas['rss_pico_mb'] or 0:7.0f} MB"
+              + (f"  con {opciones.superpuestas} superpuestas {metricas['redibujo_superpuestas_ms']:6.1f} ms"
+                 if opciones.superpuestas else ""))
+
+    if opciones.base:
+        with open(opciones.base, encoding="utf-8") as archivo:
+            resultados["regresiones"] = comparar(resultados, json.load(archivo), opciones.tolerancia)
+        for r in resultados["regresiones"]:
+            print(f"REGRESIÓN {r['caso']} {r['metrica']}: {r['actual']:.1f} > {r['limite']:.1f} "
+                  f"(base {r['base']:.1f})", file=sys.stderr)
+    with open(opciones.salida, "w", encoding="utf-8") as archivo:
+        json.dump(resultados, archivo, indent=2)
+    return 1 if fallidos or resultados.get("regresiones") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Bode por lotes a partir de capturas de un barrido senoidal: cada captura
+de la carpeta (CSV, Parquet, Feather o HDF5) tiene la entrada en un canal
+y la salida en otro a una sola frecuencia. A cada una se le ajusta un
+seno a la frecuencia dominante por cuadrados mínimos (IEEE 1057: 3
+parámetros, o 4 refinando la frecuencia) y de las amplitudes y fases
+salen ganancia (dB) y fase. El resultado es un CSV con las columnas
+'Frequency (Hz)', 'Gain (dB)' y 'Phase (deg)' que TC1ScopeApp abre como
+Bode. Cada captura va a un proceso del pool.
+
+    python bode_lote.py CARPETA [--salida bode.csv] [--ajuste 3|4] [--entrada 1] [--respuesta 2]
+                        [--procesos N]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from cache_binaria import cargar_cache
+from carga_csv import columnas_bode, leer_csv
+from espectro import es_uniforme, largo_rapido, remuestrear_uniforme, ventana
+from formatos_columnares import EXTENSIONES_COLUMNARES, es_columnar, escribir_captura, leer_columnar
+
+
+# --- CONSTANTES DEL BODE POR LOTES ---
+NOMBRES_BODE = ["Frequency (Hz)", "Gain (dB)", "Phase (deg)"] # Las que detecta carga_csv.columnas_bode
+AJUSTES_SENO = [3, 4]             # Parámetros del ajuste: amplitud (cos, sen), continua y frecuencia
+ITERACIONES_4P = 8                # Máximo de iteraciones del ajuste de 4 parámetros
+TOLERANCIA_4P = 1e-9              # Corrección relativa de la frecuencia con la que se da por convergido
+MAX_MUESTRAS_FFT_BODE = 1 << 20   # Muestras que se usan para estimar la frecuencia dominante
+RESIDUO_MAXIMO = 0.3              # Residuo rms / valor eficaz del seno por encima del cual se avisa
+AVISOS_LISTADOS = 5               # Capturas que se nombran en el aviso de ajustes malos
+EXTENSIONES_BODE = (".csv",) + EXTENSIONES_COLUMNARES
+SALIDA_BODE = "bode.csv"
+
+
+def frecuencia_dominante(tiempo, valores):
+    """
+    Frecuencia (Hz) del pico más alto del espectro de 'valores' sin la
+    continua, con ventana de Hann e interpolación parabólica del módulo
+    en dB entre los tres bins del pico. Con tiempo no uniforme se
+    remuestrea antes.
+    """
+    if not es_uniforme(tiempo):
+        fs, valores = remuestrear_uniforme(tiempo, valores[None])
+        valores = valores[0]
+    else:
+        fs = (len(tiempo) - 1) / (tiempo[-1] - tiempo[0])
+    paso = max(len(valores) // MAX_MUESTRAS_FFT_BODE, 1)
+    muestras = valores[::paso]
+    n = largo_rapido(len(muestras))
+    modulo = np.abs(np.fft.rfft((muestras[:n] - muestras[:n].mean()) * ventana("hann", n)))
+    k = int(np.argmax(modulo[1:])) + 1
+    if 1 <= k < len(modulo) - 1:
+        a, b, c = np.log(modulo[k - 1:k + 2] + np.finfo(float).tiny)
+        k += 0.5 * (a - c) / (a - 2 * b + c) if a - 2 * b + c < 0 else 0.0
+    return k * fs / paso / n
+
+
+def ajuste_3p(t, valores, w):
+    """
+    Ajuste de 3 parámetros a frecuencia angular conocida w de todas las
+    filas de 'valores' a la vez: un solo lstsq con la matriz
+    [cos wt, sen wt, 1] y una columna de términos independientes por
+    canal. Devuelve los coeficientes (3, canales) y el residuo rms de cada canal.
+    """
+    diseno = np.column_stack((np.cos(w * t), np.sin(w * t), np.ones_like(t)))
+    coeficientes, _, _, _ = np.linalg.lstsq(diseno, valores.T, rcond=None)
+    residuo = np.sqrt(np.mean((valores.T - diseno @ coeficientes) ** 2, axis=0))
+    return coeficientes, residuo
+
+
+def ajuste_4p(t, valores, w):
+    """
+    Ajuste de 4 parámetros (IEEE 1057) de un canal: parte del de 3 y en
+    cada iteración linealiza la frecuencia agregando la columna
+    t (-a sen wt + b cos wt). Devuelve la frecuencia angular refinada.
+    """
+    (a, b, _), _ = ajuste_3p(t, valores[None], w)
+    for _ in range(ITERACIONES_4P):
+        coseno, seno = np.cos(w * t), np.sin(w * t)
+        diseno = np.column_stack((coseno, seno, np.ones_like(t), t * (b * coseno - a * seno)))
+        (a, b, _, dw), _, _, _ = np.linalg.lstsq(diseno, valores, rcond=None)
+        w += dw
+        if abs(dw) <= TOLERANCIA_4P * abs(w):
+            break
+    return w
+
+
+def leer_canales(ruta, canales):
+    """
+    (tiempo, valores (canales, muestras)) de una captura, con los canales
+    numerados desde 1 como en la GUI, o None si el archivo es un Bode (p.
+    ej. el de una corrida anterior). Usa el cache binario si existe, pero
+    no lo escribe: en un lote sería un sidecar por archivo.
+    """
+    if es_columnar(ruta):
+        nombres, datos = leer_columnar(ruta)
+    else:
+        cache = cargar_cache(ruta)
+        nombres, datos = cache[:2] if cache is not None else leer_csv(ruta)
+    if columnas_bode(nombres):
+        return None
+    if max(canales) >= len(nombres):
+        raise ValueError(f"La captura tiene {len(nombres) - 1} canales.")
+    if datos.shape[1] < 4:
+        raise ValueError("La captura tiene menos de 4 muestras.")
+    if np.any(np.diff(datos[0]) < 0):
+        datos = datos[:, np.argsort(datos[0], kind="stable")]
+    return np.asarray(datos[0]), np.asarray(datos[list(canales)])
+
+
+def punto_bode(ruta, entrada=1, respuesta=2, parametros=4):
+    """
+    Frecuencia (Hz), ganancia (dB) y fase (grados, en (-180, 180]) de una
+    captura, más el peor residuo relativo de los dos ajustes; None si
+    el archivo es un Bode. La frecuencia sale de la entrada (ajuste de 4
+    parámetros si se pide) y los dos canales se ajustan juntos con 3
+    parámetros a esa frecuencia.
+    """
+    canales = leer_canales(ruta, (entrada, respuesta))
+    if canales is None:
+        return None
+    tiempo, valores = canales
+    t = tiempo - tiempo.mean() # Centrado: la columna de frecuencia del ajuste de 4 queda mejor condicionada
+    w = 2 * np.pi * frecuencia_dominante(tiempo, valores[0])
+    if parametros == 4:
+        w = ajuste_4p(t, valores[0], w)
+    (a, b, _), residuo = ajuste_3p(t, valores, w)
+    # a cos wt + b sen wt = A cos(wt + φ), con φ = atan2(-b, a)
+    amplitud = np.hypot(a, b)
+    fase = np.arctan2(-b, a)
+    ganancia = 20 * np.log10(amplitud[1] / amplitud[0])
+    desfasaje = np.degrees(np.angle(np.exp(1j * (fase[1] - fase[0]))))
+    relativo = float(np.max(residuo / np.maximum(amplitud / np.sqrt(2), np.finfo(float).tiny)))
+    return abs(w) / (2 * np.pi), ganancia, desfasaje, relativo
+
+
+def _trabajo(argumentos):
+    """Punto de entrada de cada proceso: no deja escapar excepciones sin contexto."""
+    ruta, opciones = argumentos
+    try:
+        return ruta, punto_bode(ruta, opciones.entrada, opciones.respuesta, opciones.ajuste), None
+    except Exception as e:
+        return ruta, None, f"{type(e).__name__}: {e}"
+
+
+def tabla_bode_lote(puntos):
+    """
+    Puntos (frecuencia, ganancia, fase) ordenados por frecuencia, con la
+    fase desenvuelta a lo largo del barrido (sin saltos de 360°) y
+    llevada a que el primer punto quede en (-180, 180].
+    """
+    puntos = np.array(sorted(puntos), dtype=float).reshape(-1, 3).T
+    if puntos.shape[1]:
+        fase = np.degrees(np.unwrap(np.radians(puntos[2])))
+        puntos[2] = fase - 360 * np.ceil((fase[0] - 180) / 360)
+    return puntos
+
+
+def capturas(carpeta, excluir=()):
+    """Capturas de la carpeta (CSV o columnares), ordenadas por nombre."""
+    excluir = {os.path.abspath(r) for r in excluir}
+    return sorted(ruta for ruta in (os.path.join(carpeta, nombre) for nombre in os.listdir(carpeta))
+                  if ruta.lower().endswith(EXTENSIONES_BODE) and os.path.abspath(ruta) not in excluir)
+
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Bode a partir de las capturas de un barrido senoidal.")
+    parser.add_argument("carpeta")
+    parser.add_argument("--salida", help=f"Archivo del Bode (por defecto, {SALIDA_BODE} en la carpeta)")
+    parser.add_argument("--ajuste", type=int, choices=AJUSTES_SENO, default=4,
+                        help="Ajuste de 3 parámetros (frecuencia del espectro) o de 4 (la refina)")
+    parser.add_argument("--entrada", type=int, default=1, help="Canal de entrada (1 = CH1)")
+    parser.add_argument("--respuesta", type=int, default=2, help="Canal de salida")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count(), help="Procesos del pool (uno por núcleo)")
+    opciones = parser.parse_args(argv)
+    if min(opciones.entrada, opciones.respuesta) < 1 or opciones.entrada == opciones.respuesta:
+        parser.error("La entrada y la salida tienen que ser dos canales distintos (1, 2, ...)")
+    return opciones
+
+
+def main(argv=None):
+    opciones = parsear_argumentos(argv)
+    salida = opciones.salida or os.path.join(opciones.carpeta, SALIDA_BODE)
+    rutas = capturas(opciones.carpeta, excluir=[salida])
+    if not rutas:
+        print(f"No hay capturas en {opciones.carpeta}", file=sys.stderr)
+        return 1
+
+    inicio = time.perf_counter()
+    puntos, ruidosas, fallidos, omitidas = [], [], 0, 0
+    procesos = max(min(opciones.procesos, len(rutas)), 1)
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        # Muchas capturas chicas: se mandan de a varias por proceso para no pagar un viaje por archivo
+        lote = max(len(rutas) // (4 * procesos), 1)
+        for ruta, punto, error in pool.map(_trabajo, [(r, opciones) for r in rutas], chunksize=lote):
+            if error:
+                fallidos += 1
+                print(f"ERROR {ruta}: {error}", file=sys.stderr)
+                continue
+            if punto is None:
+                omitidas += 1 # Un Bode en la carpeta
+                continue
+            frecuencia, ganancia, fase, residuo = punto
+            if residuo > RESIDUO_MAXIMO:
+                ruidosas.append(os.path.basename(ruta))
+            puntos.append((frecuencia, ganancia, fase))
+    if ruidosas:
+        # Suele ser la salida atenuada hasta el ruido, lejos de la banda de paso
+        print(f"AVISO: {len(ruidosas)} capturas con residuo mayor al {RESIDUO_MAXIMO:.0%} del valor eficaz "
+              f"del seno (ruido o señal no senoidal): {', '.join(ruidosas[:AVISOS_LISTADOS])}"
+              + (f" y {len(ruidosas) - AVISOS_LISTADOS} más" if len(ruidosas) > AVISOS_LISTADOS else ""),
+              file=sys.stderr)
+    if not puntos:
+        return 1
+    escribir_captura(salida, NOMBRES_BODE, tabla_bode_lote(puntos))
+    total = time.perf_counter() - inicio
+    print(f"{salida}: {len(puntos)}/{len(rutas) - omitidas} capturas en {total:.1f} s con {procesos} procesos")
+    return 1 if fallidos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
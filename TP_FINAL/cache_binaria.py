@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import warnings
+
+import numpy as np
+
+from indice_bloques import IndiceBloques
+
+
+# --- CONSTANTES DEL CACHE ---
+SUFIJO_CACHE = ".scopecache"   # Carpeta hermana del CSV: captura.csv.scopecache/
+VERSION_CACHE = 2
+BYTES_MUESTRA_HASH = 1 << 20   # Se hashea 1 MiB del comienzo, del medio y del final
+
+
+def ruta_cache(ruta):
+    """Carpeta del sidecar binario de una captura."""
+    return ruta + SUFIJO_CACHE
+
+
+def firma_archivo(ruta):
+    """
+    Clave del cache: tamaño, mtime y un hash BLAKE2 de tres tramos del
+    archivo. Leer sólo ~3 MiB mantiene la verificación por debajo de unos
+    milisegundos aun para capturas de varios GB.
+    """
+    estado = os.stat(ruta)
+    h = hashlib.blake2b(digest_size=16)
+    with open(ruta, 'rb') as f:
+        for pos in (0, max(estado.st_size // 2 - BYTES_MUESTRA_HASH // 2, 0),
+                    max(estado.st_size - BYTES_MUESTRA_HASH, 0)):
+            f.seek(pos)
+            h.update(f.read(BYTES_MUESTRA_HASH))
+    return {'tamano': estado.st_size, 'mtime_ns': estado.st_mtime_ns, 'hash': h.hexdigest()}
+
+
+def guardar_cache(ruta, nombres, datos, indice=None):
+    """
+    Escribe los datos (columnas x filas, tiempo primero) en un único .npy,
+    el índice de bloques de los canales y un encabezado JSON con la firma
+    del CSV. Todo se escribe en una carpeta temporal y cada archivo se
+    mueve a su nombre final con os.replace: los memmaps del cache anterior
+    (la captura abierta o una superpuesta) siguen leyendo su inodo en vez
+    de un archivo truncado. El encabezado va último, así un cache a medio
+    escribir nunca se considera válido. Si la carpeta no se puede escribir
+    (medio de sólo lectura) avisa con un RuntimeWarning y devuelve False.
+    """
+    carpeta = ruta_cache(ruta)
+    temporal = None
+    try:
+        os.makedirs(carpeta, exist_ok=True)
+        encabezado = os.path.join(carpeta, "header.json")
+        if os.path.exists(encabezado):
+            os.remove(encabezado)
+        temporal = tempfile.mkdtemp(prefix=".tmp-", dir=carpeta)
+        archivos = ["datos.npy"]
+        np.save(os.path.join(temporal, "datos.npy"), np.asarray(datos))
+        if indice is not None:
+            indice.guardar(os.path.join(temporal, "indice.npz"))
+            archivos.append("indice.npz")
+        metadatos = {
+            'version': VERSION_CACHE,
+            'firma': firma_archivo(ruta),
+            'nombres': list(nombres),
+            'indice': indice is not None,
+        }
+        with open(os.path.join(temporal, "header.json"), 'w', encoding='utf-8') as f:
+            json.dump(metadatos, f)
+        for archivo in archivos + ["header.json"]:
+            os.replace(os.path.join(temporal, archivo), os.path.join(carpeta, archivo))
+        return True
+    except OSError as e:
+        warnings.warn(f"No se pudo escribir el cache de {ruta}: {e}", RuntimeWarning, stacklevel=2)
+        return False
+    finally:
+        if temporal is not None:
+            shutil.rmtree(temporal, ignore_errors=True)
+
+
+def cargar_cache(ruta):
+    """
+    Devuelve (nombres, datos, indice) con los datos (columnas x filas)
+    mapeados en memoria (np.memmap de sólo lectura), o None si no hay cache
+    o si el CSV cambió desde que se escribió.
+    """
+    encabezado = os.path.join(ruta_cache(ruta), "header.json")
+    try:
+        with open(encabezado, 'r', encoding='utf-8') as f:
+            metadatos = json.load(f)
+        if metadatos.get('version') != VERSION_CACHE or metadatos.get('firma') != firma_archivo(ruta):
+            return None
+        carpeta = ruta_cache(ruta)
+        datos = np.load(os.path.join(carpeta, "datos.npy"), mmap_mode='r')
+        indice = None
+        if metadatos['indice']:
+            indice = IndiceBloques.cargar(os.path.join(carpeta, "indice.npz"))
+        return metadatos['nombres'], datos, indice
+    except (OSError, ValueError, KeyError):
+        return None
@@ -0,0 +1,422 @@
+import numpy as np
+
+from decimacion import decimar, decimar_minmax
+from indice_bloques import IndiceBloques
+from mediciones import medir
+from espectro import es_uniforme, espectro, remuestrear_uniforme
+from matematica import CanalMatematico, TAM_TROZO
+from filtros_digitales import CanalFiltrado
+from disparo import disparos, promediar_segmentos, persistencia
+
+
+# --- CONSTANTES DEL ALMACÉN ---
+MAX_CACHE_MATEMATICOS = 64  # Ventanas evaluadas de canales matemáticos que se recuerdan
+
+
+class AlmacenCanales:
+    """
+    Captura de N canales guardada como un único array contiguo
+    (canales x muestras), con el tiempo aparte y un solo índice de bloques
+    para todos los canales. Escala (V/div), offset (V) y visibilidad de
+    cada canal son vectores: llevar la ventana visible a divisiones de
+    pantalla es una sola operación con broadcasting que escribe en un
+    buffer de salida reutilizado entre redibujos.
+    Los canales matemáticos (ver matematica.CanalMatematico) y los
+    filtrados (filtros_digitales.CanalFiltrado) van después de los reales:
+    tienen escala, offset y visibilidad como cualquiera, pero sus muestras
+    se evalúan sólo sobre la ventana que se pide (los filtrados, una vez
+    por captura).
+    """
+
+    def __init__(self, tiempo, datos, nombres, indice=None):
+        self.tiempo = tiempo
+        self.datos = datos          # (canales, muestras), array o memmap
+        self.nombres = list(nombres)
+        self.indice = indice if indice is not None else IndiceBloques(datos)
+        n_canales = datos.shape[0]
+        self.escalas = np.ones(n_canales)          # V/div de cada canal
+        self.offsets = np.zeros(n_canales)         # Offset de cada canal, en V
+        self.visibles = np.ones(n_canales, dtype=bool)
+        self._salida = None
+        self._mediciones = {}  # (canal, i_ini, i_fin) -> dict de mediciones
+        self._uniforme = None  # Si el paso de tiempo es constante (se calcula una vez)
+        self.matematicos = []  # Canales matemáticos y filtrados (índices n_reales, n_reales + 1, ...)
+        self._cache_matematicos = {}
+        self._disparos = {}    # (fuente, nivel, flanco, histéresis) -> posiciones de disparo
+        self.version_datos = 0 # Cambia cuando se reemplazan las muestras: va en las claves de lo calculado afuera
+
+    def actualizar_datos(self, tiempo, datos, indice=None):
+        """
+        Reemplaza las muestras (modo seguimiento) conservando escalas,
+        offsets y visibilidad. Sin índice dado se reconstruye.
+        """
+        self.tiempo = tiempo
+        self.datos = datos
+        self.indice = indice if indice is not None else IndiceBloques(datos)
+        self._mediciones = {} # Las mediciones guardadas eran de las muestras anteriores
+        self._uniforme = None
+        self._cache_matematicos = {}
+        self._disparos = {}
+        self.version_datos += 1
+        for matematico in self.matematicos:
+            matematico.invalidar()
+
+    @property
+    def n_reales(self):
+        return self.datos.shape[0]
+
+    @property
+    def n_canales(self):
+        return self.n_reales + len(self.matematicos)
+
+    def es_matematico(self, canal):
+        return canal >= self.n_reales
+
+    def _agregar_derivado(self, derivado):
+        """Agrega un canal derivado visible, con 1 V/div y sin offset, y devuelve su índice."""
+        self.matematicos.append(derivado)
+        self.nombres.append(derivado.expresion)
+        self.escalas = np.append(self.escalas, 1.0)
+        self.offsets = np.append(self.offsets, 0.0)
+        self.visibles = np.append(self.visibles, True)
+        self._mediciones = {}
+        return self.n_canales - 1
+
+    def _quitar_derivados(self, clase):
+        """Elimina los canales derivados de la clase dada; los demás conservan escala, offset y visibilidad."""
+        n = self.n_reales
+        quedan = [k for k, derivado in enumerate(self.matematicos) if not isinstance(derivado, clase)]
+        filas = np.concatenate((np.arange(n), n + np.asarray(quedan, dtype=np.intp)))
+        self.matematicos = [self.matematicos[k] for k in quedan]
+        self.nombres = [self.nombres[i] for i in filas]
+        self.escalas, self.offsets, self.visibles = self.escalas[filas], self.offsets[filas], self.visibles[filas]
+        self._cache_matematicos = {}
+        self._mediciones = {}
+        self._disparos = {}
+
+    def agregar_matematico(self, expresion, constantes=None):
+        """
+        Agrega un canal matemático (lanza ValueError si la expresión no es
+        válida) y devuelve su índice. Arranca visible, con 1 V/div y sin offset.
+        """
+        return self._agregar_derivado(CanalMatematico(expresion, self.n_reales, constantes))
+
+    def quitar_matematicos(self):
+        """Elimina los canales matemáticos (no los filtrados)."""
+        self._quitar_derivados(CanalMatematico)
+
+    def aplicar_filtro(self, filtrado):
+        """
+        Agrega un canal filtrado (filtros_digitales.CanalFiltrado, ya
+        filtrado o no) o, si su fuente ya tenía uno, lo reemplaza en el
+        mismo lugar conservando escala, offset y visibilidad. Lanza
+        ValueError si la fuente no existe o el filtro no sirve para el
+        muestreo de la captura. Devuelve el índice del canal.
+        """
+        if not 0 <= filtrado.fuente < self.n_reales:
+            raise ValueError(f"No existe el canal CH{filtrado.fuente + 1}")
+        filtrado.secciones(self.tiempo)
+        self.version_datos += 1 # Un canal filtrado reemplazado tiene otras muestras con el mismo índice
+        for k, derivado in enumerate(self.matematicos):
+            if isinstance(derivado, CanalFiltrado) and derivado.fuente == filtrado.fuente:
+                self.matematicos[k] = filtrado
+                self.nombres[self.n_reales + k] = filtrado.expresion
+                # Lo calculado con el filtro anterior (el canal puede ser fuente del disparo)
+                self._cache_matematicos = {}
+                self._mediciones = {}
+                self._disparos = {}
+                return self.n_reales + k
+        return self._agregar_derivado(filtrado)
+
+    def filtro(self, fuente):
+        """Canal filtrado del canal real 'fuente', o None."""
+        return next((d for d in self.matematicos if isinstance(d, CanalFiltrado) and d.fuente == fuente), None)
+
+    def quitar_filtros(self):
+        """Elimina los canales filtrados (no los matemáticos)."""
+        self._quitar_derivados(CanalFiltrado)
+
+    def derivado_listo(self, canal):
+        """Si el canal derivado se evalúa sin esperar: los filtrados, recién con la fila ya filtrada."""
+        derivado = self.matematicos[canal - self.n_reales]
+        return not isinstance(derivado, CanalFiltrado) or derivado.listo
+
+    @property
+    def filtros_pendientes(self):
+        return any(isinstance(d, CanalFiltrado) and not d.listo for d in self.matematicos)
+
+    def preparar_filtros(self, progreso=None):
+        """
+        Filtra las filas de los canales filtrados que falten (captura nueva o
+        muestras nuevas). Corre en un hilo de trabajo; si mientras tanto
+        cambian las muestras, lo filtrado se descarta (ver CanalFiltrado.preparar).
+        """
+        pendientes = [d for d in self.matematicos if isinstance(d, CanalFiltrado) and not d.listo]
+        tiempo, datos = self.tiempo, self.datos
+        for k, filtrado in enumerate(pendientes):
+            avance = None if progreso is None else (lambda f, k=k: progreso((k + f) / len(pendientes)))
+            filtrado.preparar(tiempo, datos, avance)
+
+    def evaluar_matematico(self, canal, i_ini, i_fin):
+        """
+        Muestras [i_ini, i_fin) del canal derivado 'canal': un array nuevo
+        del largo de la ventana, o una vista de sólo lectura si es filtrado.
+        """
+        matematico = self.matematicos[canal - self.n_reales]
+        return matematico.evaluar(self.tiempo, self.datos, i_ini, i_fin, self.indice, self.tiempo_uniforme)
+
+    def _guardar_matematico(self, clave, valor):
+        if len(self._cache_matematicos) >= MAX_CACHE_MATEMATICOS:
+            self._cache_matematicos.clear()
+        self._cache_matematicos[clave] = valor
+        return valor
+
+    def _minmax_matematico(self, canal, i_ini, i_fin):
+        """
+        Mínimo y máximo de un canal matemático en la ventana, evaluado de a
+        trozos. Un filtrado que todavía no se filtró toma los de su fuente
+        (no se guardan), así el hilo de Tk no espera al filtro.
+        """
+        clave = ('minmax', canal, i_ini, i_fin)
+        if clave in self._cache_matematicos:
+            return self._cache_matematicos[clave]
+        matematico = self.matematicos[canal - self.n_reales]
+        if not self.derivado_listo(canal):
+            minimos, maximos = self.indice.minmax(self.datos, i_ini, i_fin)
+            return float(minimos[matematico.fuente]), float(maximos[matematico.fuente])
+        minimo, maximo = np.inf, -np.inf
+        for _, _, valores in matematico.trozos(self.tiempo, self.datos, i_ini, i_fin,
+                                               self.indice, self.tiempo_uniforme):
+            minimo = min(minimo, float(valores.min()))
+            maximo = max(maximo, float(valores.max()))
+        return self._guardar_matematico(clave, (minimo, maximo))
+
+    @property
+    def n_muestras(self):
+        return self.datos.shape[1]
+
+    def ventana(self, t_ini, t_fin):
+        """Muestras [i_ini, i_fin) entre dos instantes (el tiempo está ordenado)."""
+        i_ini = int(np.searchsorted(self.tiempo, t_ini, side='left'))
+        i_fin = int(np.searchsorted(self.tiempo, t_fin, side='right'))
+        return i_ini, i_fin
+
+    def minmax(self, i_ini=0, i_fin=None, matematicos=True):
+        """
+        Mínimo y máximo de cada canal en [i_ini, i_fin): los reales desde el
+        índice de bloques, los matemáticos (si se piden) evaluando la ventana.
+        """
+        if i_fin is None:
+            i_fin = self.n_muestras
+        minimos, maximos = self.indice.minmax(self.datos, i_ini, i_fin)
+        if matematicos and self.matematicos:
+            extremos = [self._minmax_matematico(c, i_ini, i_fin) for c in range(self.n_reales, self.n_canales)]
+            minimos = np.concatenate((minimos, [e[0] for e in extremos]))
+            maximos = np.concatenate((maximos, [e[1] for e in extremos]))
+        return minimos, maximos
+
+    def minmax_canal(self, canal, i_ini=0, i_fin=None):
+        """Mínimo y máximo de un solo canal: sólo se evalúa ese canal si es matemático o filtrado."""
+        if i_fin is None:
+            i_fin = self.n_muestras
+        if self.es_matematico(canal):
+            return self._minmax_matematico(canal, i_ini, i_fin)
+        minimos, maximos = self.minmax(i_ini, i_fin, matematicos=False)
+        return float(minimos[canal]), float(maximos[canal])
+
+    def limites_pantalla(self, i_ini, i_fin):
+        """
+        Rango (en divisiones) que ocupan todos los canales en la ventana, con
+        escala y offset aplicados. La escala es positiva: alcanza con
+        transformar los extremos de cada canal.
+        """
+        minimos, maximos = self.minmax(i_ini, i_fin)
+        corrimiento = self.offsets / self.escalas
+        return (float(np.min(minimos / self.escalas + corrimiento)),
+                float(np.max(maximos / self.escalas + corrimiento)))
+
+    def _buffer(self, forma):
+        if self._salida is None or self._salida.shape != forma:
+            self._salida = np.empty(forma)
+        return self._salida
+
+    def transformar(self, valores, canales):
+        """
+        valores / escala + offset / escala para las filas 'canales', en una
+        sola pasada con broadcasting sobre el buffer de salida reutilizable.
+        """
+        escalas = self.escalas[canales, None]
+        salida = np.divide(valores, escalas, out=self._buffer(valores.shape))
+        salida += self.offsets[canales, None] / escalas
+        return salida
+
+    def _filas(self, canales, i_ini, i_fin):
+        """
+        Ventana de los canales pedidos; si son reales y consecutivos es una
+        vista sin copia. Los matemáticos se evalúan sobre la ventana.
+        """
+        if any(self.es_matematico(c) for c in canales):
+            return np.stack([self.evaluar_matematico(c, i_ini, i_fin) if self.es_matematico(c)
+                             else self.datos[c, i_ini:i_fin] for c in canales])
+        if len(canales) and np.all(np.diff(canales) == 1):
+            return self.datos[canales[0]:canales[-1] + 1, i_ini:i_fin]
+        return self.datos[canales, i_ini:i_fin]
+
+    def serie_pantalla(self, i_ini, i_fin, ancho_px, metodo, canales=None):
+        """
+        (tiempo, valores) de los canales pedidos (por defecto los visibles)
+        entre las muestras [i_ini, i_fin), decimados a ~2 puntos por píxel y
+        en divisiones de pantalla. 'valores' es (canales, puntos); el tiempo
+        es 1-D si es común a todos los canales o (canales, puntos) si no.
+        Sólo canales reales: los matemáticos van por serie_matematica.
+        """
+        if canales is None:
+            canales = np.flatnonzero(self.visibles[:self.n_reales])
+        canales = np.asarray(canales, dtype=np.intp)
+        if len(canales) == 0:
+            return self.tiempo[:0], np.empty((0, 0))
+
+        # Ventanas anchas: min/max por columna directo desde el índice de bloques
+        columnas = None
+        if metodo == "min/max":
+            columnas = self.indice.minmax_columnas(self.datos, i_ini, i_fin, ancho_px)
+        if columnas is not None:
+            centros, minimos, maximos = columnas
+            tiempo = np.repeat(self.tiempo[np.minimum(centros, self.n_muestras - 1)], 2)
+            valores = self._buffer((len(canales), 2 * len(centros)))
+            valores[:, 0::2] = minimos[canales]
+            valores[:, 1::2] = maximos[canales]
+        else:
+            tiempo, valores = decimar(self.tiempo[i_ini:i_fin], self._filas(canales, i_ini, i_fin),
+                                      ancho_px, metodo)
+        return tiempo, self.transformar(valores, canales)
+
+    def mediciones_guardadas(self, canales, i_ini, i_fin):
+        """Mediciones ya calculadas de los canales en [i_ini, i_fin), o None si falta alguno."""
+        try:
+            return {c: self._mediciones[(c, i_ini, i_fin)] for c in canales}
+        except KeyError:
+            return None
+
+    def mediciones(self, canales, i_ini, i_fin, progreso=None):
+        """
+        Mediciones automáticas (ver mediciones.medir) de cada canal en
+        [i_ini, i_fin), guardadas por (canal, ventana). Vmax/Vmin/Vavg/Vrms
+        de los canales reales salen del índice de bloques. Puede correr en un hilo de trabajo: si
+        mientras tanto llegan datos nuevos, lo calculado queda en el cache
+        viejo y no se mezcla con el de los datos nuevos.
+        """
+        tiempo, datos, indice, cache = self.tiempo, self.datos, self.indice, self._mediciones
+        faltan = [c for c in canales if (c, i_ini, i_fin) not in cache]
+        if faltan:
+            minimos, maximos, sumas, sumas2, n = indice.rango(datos, i_ini, i_fin)
+            tiempo_ventana = tiempo[i_ini:i_fin]
+            for k, c in enumerate(faltan):
+                if progreso is not None:
+                    progreso(k / len(faltan))
+                if self.es_matematico(c):
+                    # Recién acá se evalúa la ventana completa (toda la captura si se pidió "full")
+                    cache[(c, i_ini, i_fin)] = medir(tiempo_ventana, self.evaluar_matematico(c, i_ini, i_fin))
+                    continue
+                estadisticas = (minimos[c], maximos[c], sumas[c], sumas2[c], n)
+                cache[(c, i_ini, i_fin)] = medir(tiempo_ventana, datos[c, i_ini:i_fin], estadisticas)
+        return {c: cache[(c, i_ini, i_fin)] for c in canales}
+
+    @property
+    def tiempo_uniforme(self):
+        """Si el tiempo tiene paso constante; se verifica una vez por captura."""
+        if self._uniforme is None:
+            self._uniforme = es_uniforme(self.tiempo)
+        return self._uniforme
+
+    def espectro(self, canales, i_ini, i_fin, ventana, promedios, progreso=None):
+        """
+        Espectro (ver espectro.espectro) de los canales en [i_ini, i_fin).
+        Si la captura tiene tiempo no uniforme la ventana se remuestrea
+        antes de la FFT.
+        """
+        canales = np.asarray(canales, dtype=np.intp)
+        return espectro(self.tiempo[i_ini:i_fin], self._filas(canales, i_ini, i_fin),
+                        ventana, promedios, self.tiempo_uniforme, progreso)
+
+    def serie_matematica(self, canal, i_ini, i_fin, ancho_px, metodo):
+        """
+        (tiempo, valores) de un canal matemático listos para la pantalla,
+        como serie_pantalla. Con min/max la ventana se evalúa y decima de a
+        trozos alineados a las columnas de píxel, así nunca se arma un array
+        del largo de la ventana; el resultado decimado queda en un cache.
+        """
+        clave = ('serie', canal, i_ini, i_fin, ancho_px, metodo)
+        if clave not in self._cache_matematicos:
+            n = i_fin - i_ini
+            columnas = max(int(ancho_px), 1)
+            if metodo == "min/max" and n > TAM_TROZO and n // columnas > 0:
+                matematico = self.matematicos[canal - self.n_reales]
+                muestras_col = n // columnas
+                tam = max(TAM_TROZO // muestras_col, 1) * muestras_col
+                partes = [decimar_minmax(self.tiempo[ini:fin], valores, (fin - ini) // muestras_col or 1)
+                          for ini, fin, valores in matematico.trozos(self.tiempo, self.datos, i_ini, i_fin,
+                                                                     self.indice, self.tiempo_uniforme, tam)]
+                tiempo = np.concatenate([t for t, _ in partes])
+                valores = np.concatenate([v for _, v in partes])
+            else:
+                tiempo, valores = decimar(self.tiempo[i_ini:i_fin], self.evaluar_matematico(canal, i_ini, i_fin),
+                                          ancho_px, metodo)
+            self._guardar_matematico(clave, (tiempo, valores))
+        tiempo, valores = self._cache_matematicos[clave]
+        return tiempo, (valores + self.offsets[canal]) / self.escalas[canal]
+
+    def _preparar_disparo(self, fuente, nivel, flanco, histeresis, canales):
+        """
+        Filas completas de los canales pedidos (vistas de los reales, los
+        matemáticos evaluados; remuestreadas si el tiempo no es uniforme),
+        el paso de tiempo y las posiciones de disparo del canal 'fuente'.
+        Las posiciones quedan guardadas por nivel/flanco/histéresis, así
+        cambiar la base de tiempo no las recalcula.
+        """
+        tiempo = self.tiempo
+        filas = {c: self.evaluar_matematico(c, 0, self.n_muestras) if self.es_matematico(c) else self.datos[c]
+                 for c in set(canales) | {fuente}}
+        if self.tiempo_uniforme:
+            dt = (tiempo[-1] - tiempo[0]) / (len(tiempo) - 1)
+        else:
+            for c, fila in filas.items():
+                fs, remuestreada = remuestrear_uniforme(tiempo, fila[None])
+                filas[c] = remuestreada[0]
+            dt = 1 / fs
+        clave = (fuente, nivel, flanco, histeresis)
+        if clave not in self._disparos or not self.tiempo_uniforme:
+            self._disparos[clave] = disparos(filas[fuente], nivel, flanco, histeresis)
+        return [filas[c] for c in canales], dt, self._disparos[clave]
+
+    def disparo(self, fuente, nivel, flanco, histeresis, t_ini, t_fin, modo, canales, progreso=None):
+        """
+        Modo disparo: promedia (o envuelve) los canales pedidos entre t_ini
+        y t_fin relativos a cada flanco del canal 'fuente' en toda la
+        captura. Devuelve (tiempo relativo, valores, cantidad de segmentos);
+        valores es (canales, muestras) o (canales, 2, muestras) en la envolvente.
+        """
+        filas, dt, posiciones = self._preparar_disparo(fuente, nivel, flanco, histeresis, canales)
+        desde = int(np.floor(t_ini / dt))
+        largo = int(np.ceil(t_fin / dt)) - desde + 1
+        valores, n_segmentos = promediar_segmentos(filas, posiciones, desde, largo, modo, progreso)
+        return (desde + np.arange(valores.shape[-1])) * dt, valores, n_segmentos
+
+    def persistencia(self, fuente, nivel, flanco, histeresis, t_ini, t_fin, canales, y_min, y_max,
+                     forma, decaimiento, progreso=None):
+        """
+        Vista de persistencia (ver disparo.persistencia) de los canales
+        pedidos: un único histograma de 'forma' píxeles que cubre de y_min
+        a y_max en divisiones de pantalla, con la escala y el offset de
+        cada canal. Devuelve (tiempo del primer y del último bin,
+        histograma, cantidad de segmentos).
+        """
+        filas, dt, posiciones = self._preparar_disparo(fuente, nivel, flanco, histeresis, canales)
+        desde = int(np.floor(t_ini / dt))
+        largo = int(np.ceil(t_fin / dt)) - desde + 1
+        # Divisiones -> V de cada canal: v = y * escala - offset
+        limites = [(y_min * self.escalas[c] - self.offsets[c], y_max * self.escalas[c] - self.offsets[c])
+                   for c in canales]
+        histograma, n_segmentos = persistencia(filas, posiciones, desde, largo, limites, forma,
+                                               decaimiento, progreso)
+        return (desde * dt, (desde + largo - 1) * dt), histograma, n_segmentos
@@ -0,0 +1,272 @@
+import io
+import os
+import re
+import numpy as np
+
+from indice_bloques import IndiceBloques
+from cache_binaria import cargar_cache, guardar_cache
+from formatos_columnares import es_columnar, leer_columnar
+from perfilado import PERFIL
+
+
+# --- CONSTANTES DE CARGA ---
+SEPARADORES_CANDIDATOS = [',', '\t', ';']
+LINEAS_MUESTRA = 200           # Líneas que se leen para detectar el formato
+FILAS_POR_CHUNK = 1_000_000    # Filas por bloque al leer con el motor C
+FRACCION_NUMERICA_MINIMA = 0.5  # Columnas con menos datos numéricos se descartan
+DTYPE_CAPTURA = np.float64     # np.float32 reduce a la mitad la memoria de los canales
+MOTOR_CSV = 'c'                # 'c' (por bloques, con progreso) o 'pyarrow' (todo de una vez)
+FRACCION_PARSEO = 0.8          # Parte de la barra de progreso que corresponde al parseo
+
+# pandas (~0.4 s de import) se importa dentro de cada función que lo usa:
+# la GUI lo carga recién al abrir el primer CSV, no al arrancar
+
+
+def _es_numero(campo):
+    try:
+        float(campo)
+        return True
+    except ValueError:
+        return False
+
+
+def _limpiar_nombre(nombre):
+    """Quita todo lo que no sea ASCII imprimible (°, θ, etc.) de un nombre de columna."""
+    return re.sub(r'[^\x20-\x7E]+', '', nombre).strip()
+
+
+def detectar_formato(ruta, lineas_muestra=LINEAS_MUESTRA):
+    """
+    Lee sólo el comienzo del archivo y detecta separador, líneas de preámbulo
+    (Rigol/Tektronix/Keysight), nombres de columna y qué columnas son numéricas.
+    Devuelve un dict con 'sep', 'fila_datos', 'nombres', 'columnas' y, en
+    capturas Rigol, 'inicio'/'incremento' para reconstruir el tiempo.
+    """
+    import pandas as pd
+    with open(ruta, 'r', encoding='latin1', errors='ignore') as f:
+        lineas = []
+        for linea in f:
+            lineas.append(linea.rstrip('\r\n'))
+            if len(lineas) >= lineas_muestra:
+                break
+    if not any(l.strip() for l in lineas):
+        raise pd.errors.EmptyDataError("El archivo está vacío")
+
+    # Separador: el que más se repite en las líneas de la muestra
+    sep = max(SEPARADORES_CANDIDATOS, key=lambda s: sum(l.count(s) for l in lineas))
+    campos = [l.split(sep) for l in lineas]
+
+    # Cantidad de campos de las filas de datos: la más frecuente en la muestra
+    conteos = [len(partes) for partes in campos if len(partes) >= 2]
+    if not conteos:
+        raise ValueError("No se encontraron filas con al menos dos columnas")
+    n_campos = max(set(conteos), key=conteos.count)
+    filas = [partes for partes in campos if len(partes) == n_campos]
+
+    # Columnas útiles: mayoría de valores numéricos en la muestra (descarta la
+    # metadata de Tektronix en las primeras columnas y las comas finales de Rigol)
+    columnas = []
+    for k in range(n_campos):
+        numericos = sum(1 for partes in filas if _es_numero(partes[k].strip()))
+        if numericos >= FRACCION_NUMERICA_MINIMA * len(filas):
+            columnas.append(k)
+
+    # Primera línea de datos: todas las columnas útiles son numéricas
+    def es_dato(partes):
+        return (len(partes) == n_campos and bool(columnas)
+                and all(_es_numero(partes[k].strip()) for k in columnas))
+
+    fila_datos = next((i for i, partes in enumerate(campos) if es_dato(partes)), None)
+    if fila_datos is None:
+        raise ValueError("No se encontraron filas numéricas en el archivo")
+
+    # Encabezado: hasta dos líneas justo antes de los datos que cubran todas las
+    # columnas útiles (Keysight usa "x-axis,1,2" + "second,Volt,Volt"; Rigol
+    # agrega Start/Increment, con más campos que las filas de datos)
+    encabezado = []
+    i = fila_datos - 1
+    while i >= 0 and len(encabezado) < 2 and len(campos[i]) > columnas[-1]:
+        encabezado.insert(0, campos[i])
+        i -= 1
+    ancho = max([n_campos] + [len(partes) for partes in encabezado])
+    encabezado = [partes + [''] * (ancho - len(partes)) for partes in encabezado]
+    if encabezado:
+        nombres = [_limpiar_nombre(' '.join(p.strip() for p in partes if p.strip()))
+                   for partes in zip(*encabezado)]
+    else:
+        nombres = [''] * ancho
+    nombres = [n if n else f"Col{k}" for k, n in enumerate(nombres)]
+    # Nombres repetidos (p. ej. "Volt" en todos los canales) -> "Volt.1", como pandas
+    vistos = {}
+    for k, n in enumerate(nombres):
+        if n in vistos:
+            vistos[n] += 1
+            nombres[k] = f"{n}.{vistos[n]}"
+        else:
+            vistos[n] = 0
+
+    formato = {'sep': sep, 'fila_datos': fila_datos, 'nombres': nombres, 'columnas': columnas}
+
+    # Rigol: columna X = número de muestra, el tiempo es Start + X * Increment
+    claves = [n.split(' ')[0].lower() for n in nombres]
+    if 'start' in claves and 'increment' in claves and encabezado:
+        unidades = encabezado[-1]
+        k_ini, k_inc = claves.index('start'), claves.index('increment')
+        if _es_numero(unidades[k_ini].strip()) and _es_numero(unidades[k_inc].strip()):
+            formato['inicio'] = float(unidades[k_ini])
+            formato['incremento'] = float(unidades[k_inc])
+            formato['columnas'] = [k for k in columnas if k not in (k_ini, k_inc)]
+            formato['nombres'][formato['columnas'][0]] = "Time (s)"
+    return formato
+
+
+def _a_numerico(tabla, dtype):
+    """
+    Convierte un bloque leído a (columnas x filas) de 'dtype'. Sólo las
+    columnas que el parser no pudo leer como números se convierten campo a
+    campo; después se descartan las filas con algún valor inválido.
+    """
+    import pandas as pd
+    for col in tabla.columns:
+        if not pd.api.types.is_float_dtype(tabla[col]) and not pd.api.types.is_integer_dtype(tabla[col]):
+            tabla[col] = pd.to_numeric(tabla[col], errors='coerce')
+    datos = tabla.to_numpy(dtype=dtype).T
+    validas = ~np.isnan(datos).any(axis=0)
+    if not validas.all():
+        datos = datos[:, validas]
+    return np.ascontiguousarray(datos)
+
+
+def leer_csv(ruta, dtype=DTYPE_CAPTURA, motor=MOTOR_CSV, progreso=None,
+             filas_por_chunk=FILAS_POR_CHUNK, formato=None):
+    """
+    Carga un CSV de osciloscopio con el parser C (o pyarrow) en lugar del
+    motor python. Devuelve (nombres, datos) con 'datos' de forma
+    (columnas, filas), contiguo por columna. Las filas mal formadas se
+    descartan de a una; 'progreso(fraccion)' se llama después de cada bloque.
+    """
+    import pandas as pd
+    if formato is None:
+        formato = detectar_formato(ruta)
+    columnas = formato['columnas']
+    nombres = [formato['nombres'][k] for k in columnas]
+    opciones = dict(sep=formato['sep'], header=None, skiprows=formato['fila_datos'],
+                    usecols=columnas, encoding='latin1', on_bad_lines='skip')
+
+    tam_total = max(os.path.getsize(ruta), 1)
+    bloques = []
+    if motor == 'pyarrow':
+        try:
+            tabla = pd.read_csv(ruta, engine='pyarrow', **opciones)
+            bloques.append(_a_numerico(tabla, dtype))
+        except ImportError:
+            motor = 'c'
+    if motor != 'pyarrow':
+        with open(ruta, 'rb') as f:
+            lector = pd.read_csv(f, engine='c', chunksize=filas_por_chunk, low_memory=False,
+                                 skip_blank_lines=True, **opciones)
+            for tabla in lector:
+                bloques.append(_a_numerico(tabla, dtype))
+                if progreso is not None:
+                    progreso(min(f.tell() / tam_total, 1.0))
+    if progreso is not None:
+        progreso(1.0)
+
+    if not bloques:
+        raise pd.errors.EmptyDataError("El archivo no tiene filas de datos")
+    datos = np.concatenate(bloques, axis=1) if len(bloques) > 1 else bloques[0]
+    if 'incremento' in formato:
+        datos[0] = formato['inicio'] + datos[0] * formato['incremento']
+    return nombres, datos
+
+
+def inicio_datos(ruta, formato):
+    """Posición en bytes de la primera fila de datos (después del preámbulo)."""
+    with open(ruta, 'rb') as f:
+        for _ in range(formato['fila_datos']):
+            f.readline()
+        return f.tell()
+
+
+def parsear_bytes(contenido, formato, dtype=DTYPE_CAPTURA):
+    """
+    Convierte un tramo de filas completas (bytes, sin preámbulo) a
+    (columnas, filas) con el mismo formato detectado para el archivo. Se
+    usa para leer sólo lo que se agregó a un CSV que se sigue escribiendo.
+    """
+    import pandas as pd
+    columnas = formato['columnas']
+    if not contenido.strip():
+        return np.empty((len(columnas), 0), dtype=dtype)
+    tabla = pd.read_csv(io.BytesIO(contenido), sep=formato['sep'], header=None, usecols=columnas,
+                        encoding='latin1', on_bad_lines='skip', engine='c', skip_blank_lines=True)
+    datos = _a_numerico(tabla, dtype)
+    if 'incremento' in formato:
+        datos[0] = formato['inicio'] + datos[0] * formato['incremento']
+    return datos
+
+
+def columnas_bode(nombres):
+    """
+    Detecta por regex las columnas de un CSV de Bode. Devuelve
+    (frecuencia, ganancia, fase) o None si no es un Bode.
+    """
+    freq = next((c for c in nombres
+                 if re.search(r'frequency', c, re.I) and re.search(r'hz', c, re.I)), None)
+    gain = next((c for c in nombres
+                 if re.search(r'gain', c, re.I) and re.search(r'db', c, re.I)), None)
+    phase = next((c for c in nombres
+                  if re.search(r'phase', c, re.I)), None)
+    if freq and gain and phase:
+        return freq, gain, phase
+    return None
+
+
+def cargar_captura(ruta, progreso=None, escribir_cache=True):
+    """
+    Carga completa de un CSV pensada para correr fuera del hilo de la GUI:
+    usa el cache binario si el CSV no cambió; si no, parsea, ordena por
+    tiempo, construye el índice de bloques de los canales y escribe el
+    cache (salvo con escribir_cache=False: en un lote sería un sidecar por
+    archivo, y la carpeta puede ser de sólo lectura). Parquet, Feather y HDF5 se leen directo (sin cache: leerlos ya
+    es rápido). Devuelve (nombres, datos, indice) con 'datos' de forma
+    (columnas, filas); 'indice' es None en un Bode o si no quedaron al
+    menos dos columnas con datos.
+    """
+    columnar = es_columnar(ruta)
+    if not columnar:
+        with PERFIL.tramo("carga.cache"):
+            cache = cargar_cache(ruta)
+        if cache is not None:
+            if progreso is not None:
+                progreso(1.0)
+            return cache
+
+    progreso_parseo = None
+    if progreso is not None:
+        progreso_parseo = lambda f: progreso(f * FRACCION_PARSEO)
+    with PERFIL.tramo("carga.parseo"):
+        if columnar:
+            nombres, datos = leer_columnar(ruta, progreso=progreso_parseo)
+        else:
+            nombres, datos = leer_csv(ruta, progreso=progreso_parseo)
+    if len(nombres) < 2 or datos.shape[1] == 0 or columnas_bode(nombres):
+        return nombres, datos, None
+
+    # La ventana visible se busca con searchsorted: el tiempo debe ser creciente
+    with PERFIL.tramo("carga.orden"):
+        if np.any(np.diff(datos[0]) < 0):
+            datos = datos[:, np.argsort(datos[0], kind="stable")]
+
+    # Índice por bloques de todos los canales juntos: rangos, autoescala y
+    # decimación en O(bloques)
+    with PERFIL.tramo("carga.indice"):
+        indice = IndiceBloques(datos[1:])
+    if progreso is not None:
+        progreso(1.0)
+
+    # Próximas aperturas: memmap del sidecar en vez de parsear
+    if not columnar and escribir_cache:
+        with PERFIL.tramo("carga.guardar_cache"):
+            guardar_cache(ruta, nombres, datos, indice)
+    return nombres, datos, indice
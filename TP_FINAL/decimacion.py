@@ -0,0 +1,109 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# --- CONSTANTES DE DECIMACIÓN ---
+# Puntos por columna de píxel que se dibujan como máximo (mín + máx)
+PUNTOS_POR_PIXEL = 2
+METODOS_DECIMACION = ["min/max", "LTTB", "off"]
+
+
+def decimar_minmax(tiempo, valores, n_columnas):
+    """
+    Reduce la serie a un par (mínimo, máximo) por columna de píxel.
+    Conserva el orden temporal de ambos extremos, así que los glitches
+    de una sola muestra siguen apareciendo en pantalla. 'valores' puede
+    ser (canales, muestras): entonces el tiempo devuelto es uno por canal.
+    """
+    n = valores.shape[-1]
+    if n_columnas < 1 or n <= PUNTOS_POR_PIXEL * n_columnas:
+        return tiempo, valores
+
+    # Columnas de n // n_columnas muestras o una más, repartidas a lo largo
+    # de la ventana como en IndiceBloques.minmax_columnas
+    bordes = (np.arange(n_columnas + 1) * n) // n_columnas
+    inicios = bordes[:-1]
+    muestras_col = n // n_columnas
+    largas = np.flatnonzero(np.diff(bordes) > muestras_col)
+
+    def extremos(fila):
+        """(i_min, i_max) relativos al inicio de cada columna de una fila 1-D."""
+        if len(largas):
+            ventanas = sliding_window_view(fila, muestras_col)[inicios]
+        else:
+            ventanas = fila.reshape(n_columnas, muestras_col) # Vista, sin copiar
+        i_min, i_max = ventanas.argmin(axis=-1), ventanas.argmax(axis=-1)
+        # La muestra de más de las columnas largas se compara aparte
+        ultimas = inicios[largas] + muestras_col
+        extra = fila[ultimas]
+        i_min[largas] = np.where(extra < fila[inicios[largas] + i_min[largas]], muestras_col, i_min[largas])
+        i_max[largas] = np.where(extra > fila[inicios[largas] + i_max[largas]], muestras_col, i_max[largas])
+        return i_min, i_max
+
+    if valores.ndim > 1:
+        # Varios canales: cada fila es contigua y argmin/argmax por fila evita
+        # la copia que numpy hace al reducir la vista estridada completa
+        pares = [extremos(fila) for fila in valores]
+        i_min = np.stack([p[0] for p in pares])
+        i_max = np.stack([p[1] for p in pares])
+    else:
+        i_min, i_max = extremos(valores)
+
+    idx = np.empty(valores.shape[:-1] + (2 * n_columnas,), dtype=np.intp)
+    idx[..., 0::2] = inicios + np.minimum(i_min, i_max)
+    idx[..., 1::2] = inicios + np.maximum(i_min, i_max)
+
+    return tiempo[idx], np.take_along_axis(valores, idx, axis=-1)
+
+
+def decimar_lttb(tiempo, valores, n_salida):
+    """
+    Largest-Triangle-Three-Buckets: elige en cada bucket el punto que forma
+    el triángulo de mayor área con el punto anterior y el promedio del
+    bucket siguiente. Da trazos más suaves que min/max con menos puntos.
+    """
+    n = len(valores)
+    if n_salida < 3 or n <= n_salida:
+        return tiempo, valores
+
+    # Bordes de los n_salida - 2 buckets interiores (el primero y el último se conservan)
+    bordes = np.linspace(1, n - 1, n_salida - 1).astype(np.intp)
+    idx = np.empty(n_salida, dtype=np.intp)
+    idx[0] = 0
+    idx[-1] = n - 1
+
+    # Promedios de cada bucket (el "punto siguiente" de cada paso), vectorizados
+    suma_t = np.add.reduceat(tiempo[1:n - 1], bordes[:-1] - 1)
+    suma_v = np.add.reduceat(valores[1:n - 1], bordes[:-1] - 1)
+    cuenta = np.diff(bordes)
+    prom_t = np.append(suma_t / cuenta, tiempo[-1])
+    prom_v = np.append(suma_v / cuenta, valores[-1])
+
+    anterior = 0
+    for b in range(n_salida - 2):
+        ini, fin = bordes[b], bordes[b + 1]
+        t_a, v_a = tiempo[anterior], valores[anterior]
+        t_c, v_c = prom_t[b + 1], prom_v[b + 1]
+        area = np.abs((t_a - t_c) * (valores[ini:fin] - v_a)
+                      - (t_a - tiempo[ini:fin]) * (v_c - v_a))
+        anterior = ini + int(area.argmax())
+        idx[b + 1] = anterior
+
+    return tiempo[idx], valores[idx]
+
+
+def decimar(tiempo, valores, ancho_px, metodo="min/max"):
+    """
+    Aplica el método de decimación elegido para un ancho de pantalla en
+    píxeles. Con 'valores' de forma (canales, muestras) el tiempo devuelto
+    es 1-D si es común a todos los canales o (canales, puntos) si no.
+    """
+    ancho_px = max(int(ancho_px), 1)
+    if metodo == "LTTB":
+        if valores.ndim > 1:
+            series = [decimar_lttb(tiempo, fila, PUNTOS_POR_PIXEL * ancho_px) for fila in valores]
+            return np.stack([t for t, _ in series]), np.stack([v for _, v in series])
+        return decimar_lttb(tiempo, valores, PUNTOS_POR_PIXEL * ancho_px)
+    if metodo == "min/max":
+        return decimar_minmax(tiempo, valores, ancho_px)
+    return tiempo, valores
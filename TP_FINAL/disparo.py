@@ -0,0 +1,149 @@
+import numpy as np
+
+from mediciones import minmax_bloques, cruces_bloques, flancos_histeresis
+
+
+# --- CONSTANTES DEL DISPARO ---
+FLANCOS_DISPARO = ["rising", "falling"]
+MODOS_DISPARO = ["average", "envelope", "persistence"]
+DECAIMIENTOS_PERSISTENCIA = [1.0, 0.999, 0.99, 0.9] # Peso de cada segmento respecto del siguiente
+MAX_SEGMENTOS = 4096          # Segmentos que se promedian como máximo (repartidos en la captura)
+MUESTRAS_POR_TROZO = 1 << 20  # Muestras de segmentos que se copian juntas al promediar
+
+
+def disparos(valores, nivel, flanco="rising", histeresis=0.0):
+    """
+    Posiciones de disparo (en muestras, con fracción) sobre toda la serie.
+    Un disparo en subida es un cruce ascendente de 'nivel' precedido por un
+    cruce descendente de nivel - histéresis (el rearme); en bajada, al
+    revés con nivel + histéresis. Los cruces salen de cruces_bloques y la
+    alternancia de flancos_histeresis, sin bucles por muestra; la fracción
+    se interpola linealmente entre las dos muestras del cruce.
+    """
+    valores = np.asarray(valores)
+    if len(valores) < 2:
+        return np.empty(0)
+    histeresis = abs(histeresis)
+    minimos, maximos = minmax_bloques(valores)
+    sub, baj = cruces_bloques(valores, nivel, minimos, maximos)
+    if flanco == "rising":
+        if histeresis > 0:
+            _, baj = cruces_bloques(valores, nivel - histeresis, minimos, maximos)
+        i, _ = flancos_histeresis(sub, baj)
+    else:
+        if histeresis > 0:
+            sub, _ = cruces_bloques(valores, nivel + histeresis, minimos, maximos)
+        _, i = flancos_histeresis(sub, baj)
+    v0, v1 = valores[i].astype(np.float64), valores[i + 1].astype(np.float64)
+    return i + (nivel - v0) / (v1 - v0)
+
+
+def _segmentos(n, posiciones, desde, largo):
+    """
+    Primera muestra y fracción de cada segmento que entra completo en la
+    serie (a lo sumo MAX_SEGMENTOS, repartidos a lo largo de la captura).
+    """
+    base = np.floor(posiciones).astype(np.intp)
+    fraccion = posiciones - base
+    inicios = base + desde
+    # Cada segmento necesita una muestra más para interpolar la última
+    entra = (inicios >= 0) & (inicios + largo + 1 <= n)
+    inicios, fraccion = inicios[entra], fraccion[entra]
+    if len(inicios) > MAX_SEGMENTOS:
+        elegidos = np.linspace(0, len(inicios) - 1, MAX_SEGMENTOS).astype(np.intp)
+        inicios, fraccion = inicios[elegidos], fraccion[elegidos]
+    return inicios, fraccion
+
+
+def promediar_segmentos(filas, posiciones, desde, largo, modo="average", progreso=None):
+    """
+    Alinea en cada disparo un segmento de 'largo' muestras que arranca
+    'desde' muestras después de él (negativo: antes) y devuelve el
+    promedio (canales, largo) o la envolvente (canales, 2, largo) con
+    mínimo y máximo, más la cantidad de segmentos usados. 'filas' es una
+    secuencia de series del mismo largo (un array canales x muestras o una
+    lista de filas de la captura, sin apilarlas).
+    Los segmentos son las filas de una vista deslizante de la señal (no se
+    copia la matriz segmentos x muestras): se toman de a trozos de
+    MUESTRAS_POR_TROZO muestras. Cada segmento se corre la fracción de
+    muestra de su disparo interpolando entre la fila que arranca en k y
+    la que arranca en k + 1; para el promedio eso es un producto de los
+    pesos (1 - f, f) por esas filas.
+    """
+    inicios, fraccion = _segmentos(len(filas[0]), posiciones, desde, largo)
+    m = len(inicios)
+    if modo == "average":
+        resultado = np.zeros((len(filas), largo))
+    else:
+        resultado = np.empty((len(filas), 2, largo))
+        resultado[:, 0], resultado[:, 1] = np.inf, -np.inf
+    if m == 0 or largo < 1:
+        return resultado[..., :0], 0
+
+    por_trozo = max(MUESTRAS_POR_TROZO // (largo + 1), 1)
+    for c, (fila, destino) in enumerate(zip(filas, resultado)):
+        segmentos = np.lib.stride_tricks.sliding_window_view(fila, largo + 1)
+        for a in range(0, m, por_trozo):
+            if progreso is not None:
+                progreso((c + a / m) / len(filas))
+            b = min(a + por_trozo, m)
+            trozo = segmentos[inicios[a:b]]
+            f = fraccion[a:b]
+            if modo == "average":
+                destino += (1 - f) @ trozo[:, :-1]
+                destino += f @ trozo[:, 1:]
+            else:
+                alineado = trozo[:, :-1] * (1 - f)[:, None]
+                alineado += trozo[:, 1:] * f[:, None]
+                np.minimum(destino[0], alineado.min(axis=0), out=destino[0])
+                np.maximum(destino[1], alineado.max(axis=0), out=destino[1])
+    if modo == "average":
+        resultado /= m
+    return resultado, m
+
+
+def persistencia(filas, posiciones, desde, largo, limites, forma, decaimiento=1.0, progreso=None):
+    """
+    Vista de persistencia: histograma 2-D (bins de valor x bins de tiempo,
+    'forma' = (alto, ancho) en píxeles) de todas las muestras de todos los
+    segmentos de todas las filas, que se dibuja como una sola imagen.
+    'limites' da el (mínimo, máximo) que cubre el alto en cada fila. Cada
+    segmento pesa 'decaimiento' veces lo que el siguiente, así los más
+    recientes se ven más intensos. Se acumula con np.bincount sobre el
+    índice plano valor * ancho + tiempo: el costo depende sólo de la
+    cantidad de muestras. Devuelve (histograma, cantidad de segmentos).
+    """
+    alto, ancho = forma
+    ancho = max(min(ancho, largo), 1) # No más columnas que muestras (no quedan huecos)
+    # Una fila extra abajo y otra arriba juntan lo que queda fuera de la vista
+    histograma = np.zeros((alto + 2) * ancho)
+    inicios, fraccion = _segmentos(len(filas[0]), posiciones, desde, largo)
+    m = len(inicios)
+    if m == 0 or largo < 1 or alto < 1:
+        return np.zeros((alto, ancho)), 0
+    columna = np.arange(largo) * ancho // largo
+    pesos = None
+    if decaimiento != 1.0:
+        pesos = decaimiento ** np.arange(m - 1, -1, -1, dtype=np.float64)
+
+    por_trozo = max(MUESTRAS_POR_TROZO // (largo + 1), 1)
+    for c, (fila, (v_min, v_max)) in enumerate(zip(filas, limites)):
+        segmentos = np.lib.stride_tricks.sliding_window_view(fila, largo + 1)
+        escala = alto / (v_max - v_min)
+        for a in range(0, m, por_trozo):
+            if progreso is not None:
+                progreso((c + a / m) / len(filas))
+            b = min(a + por_trozo, m)
+            trozo = segmentos[inicios[a:b]]
+            f = fraccion[a:b, None]
+            # Muestra alineada -> fila del histograma (1..alto dentro de la vista)
+            alineado = trozo[:, :-1] * ((1 - f) * escala)
+            alineado += trozo[:, 1:] * (f * escala)
+            alineado += 1 - v_min * escala
+            np.clip(alineado, 0, alto + 1, out=alineado)
+            bins = alineado.astype(np.intp)
+            bins *= ancho
+            bins += columna
+            histograma += np.bincount(bins.ravel(), minlength=(alto + 2) * ancho,
+                                      weights=None if pesos is None else np.repeat(pesos[a:b], largo))
+    return histograma.reshape(alto + 2, ancho)[1:-1], m
@@ -0,0 +1,205 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+# --- CONSTANTES DEL ESPECTRO ---
+VENTANAS_FFT = ["hann", "hamming", "blackman", "flattop", "rectangular"]
+ESCALAS_FFT = ["dBV", "linear"]
+PROMEDIOS_FFT = [1, 4, 16, 64]     # Segmentos (mínimos) que se promedian con Welch
+MAX_PUNTOS_SEGMENTO = 1 << 18      # Largo máximo de cada FFT (131 k bins)
+MAX_MUESTRAS_FFT = 1 << 20         # Muestras por canal que se transforman como máximo
+N_ARMONICOS = 10                   # Armónicos (incluida la fundamental) para el THD
+TOLERANCIA_UNIFORME = 1e-3         # Desvío relativo del paso de tiempo aceptado como uniforme
+PISO_DBV = 1e-12                   # Amplitud mínima al pasar a dBV (evita log(0))
+RANGO_DBV = 120                    # Rango vertical de la vista en dBV
+PASO_DBV = 10                      # El tope de la vista en dBV se redondea a este paso
+
+# Medio ancho del lóbulo principal de cada ventana, en bins
+LOBULO_VENTANA = {"hann": 2, "hamming": 2, "blackman": 3, "flattop": 5, "rectangular": 3}
+# Coeficientes de la ventana flat top (suma de cosenos)
+COEFICIENTES_FLATTOP = [0.21557895, 0.41663158, 0.277263158, 0.083578947, 0.006947368]
+
+
+@lru_cache(maxsize=32)
+def ventana(nombre, n):
+    """
+    Ventana de n puntos (periódica, apta para Welch). Se guarda en un cache
+    porque al mover la ventana de tiempo se repiten siempre los mismos
+    largos; el array devuelto es de sólo lectura.
+    """
+    if nombre == "rectangular":
+        w = np.ones(n)
+    elif nombre == "flattop":
+        fase = 2 * np.pi * np.arange(n) / n
+        w = sum((-1) ** k * a * np.cos(k * fase) for k, a in enumerate(COEFICIENTES_FLATTOP))
+    else:
+        w = {"hann": np.hanning, "hamming": np.hamming, "blackman": np.blackman}[nombre](n + 1)[:-1]
+    w.setflags(write=False)
+    return w
+
+
+@lru_cache(maxsize=256)
+def largo_rapido(n):
+    """
+    Mayor largo <= n de la forma 2^a 3^b 5^c: la FFT de esos tamaños es la
+    más rápida, así que los segmentos se recortan a uno de ellos.
+    """
+    mejor = 1
+    p2 = 1
+    while p2 <= n:
+        p3 = p2
+        while p3 <= n:
+            p5 = p3
+            while p5 <= n:
+                mejor = max(mejor, p5)
+                p5 *= 5
+            p3 *= 3
+        p2 *= 2
+    return mejor
+
+
+def es_uniforme(tiempo):
+    """Indica si el paso de tiempo es constante (dentro de TOLERANCIA_UNIFORME)."""
+    if len(tiempo) < 3:
+        return True
+    paso = np.diff(tiempo)
+    medio = (tiempo[-1] - tiempo[0]) / (len(tiempo) - 1)
+    return bool(np.max(np.abs(paso - medio)) <= TOLERANCIA_UNIFORME * abs(medio))
+
+
+def remuestrear_uniforme(tiempo, valores):
+    """
+    Interpola linealmente (canales, muestras) sobre una grilla uniforme con
+    la misma cantidad de muestras y los mismos extremos. Devuelve la
+    frecuencia de muestreo y los valores remuestreados.
+    """
+    grilla = np.linspace(tiempo[0], tiempo[-1], len(tiempo))
+    salida = np.empty(valores.shape)
+    for fila, destino in zip(valores, salida):
+        destino[:] = np.interp(grilla, tiempo, fila)
+    return (len(tiempo) - 1) / (tiempo[-1] - tiempo[0]), salida
+
+
+def welch(valores, fs, nombre_ventana="hann", promedios=1, progreso=None):
+    """
+    Espectro de amplitud (V rms por bin) de cada fila de 'valores' por el
+    método de Welch: segmentos solapados al 50 %, ventaneados, con rfft y
+    potencia promediada. Los segmentos se toman como filas de una vista
+    deslizante (sin copiar la señal). Si la ventana tiene más muestras de
+    las que se pueden transformar a ritmo interactivo se promedian
+    segmentos repartidos a lo largo de toda ella.
+    Devuelve (frecuencias, amplitudes (canales, bins), ENBW en bins).
+    """
+    valores = np.atleast_2d(valores)
+    n = valores.shape[-1]
+    largo = largo_rapido(min(max(2 * n // (promedios + 1), 2), MAX_PUNTOS_SEGMENTO,
+                             max(MAX_MUESTRAS_FFT // promedios, 2), n))
+    salto = max(largo // 2, 1)
+    disponibles = (n - largo) // salto + 1
+    usados = min(disponibles, max(promedios, MAX_MUESTRAS_FFT // largo))
+    inicios = np.linspace(0, (disponibles - 1) * salto, usados).astype(np.intp)
+
+    w = ventana(nombre_ventana, largo)
+    ganancia = w.sum()
+    potencia = np.zeros((valores.shape[0], largo // 2 + 1))
+    for k, (fila, destino) in enumerate(zip(valores, potencia)):
+        if progreso is not None:
+            progreso(k / len(valores))
+        segmentos = np.lib.stride_tricks.sliding_window_view(fila, largo)[inicios]
+        espectro = np.fft.rfft(segmentos * w, axis=-1)
+        destino[:] = np.mean(espectro.real ** 2 + espectro.imag ** 2, axis=0)
+
+    # Amplitud de pico de cada componente -> valor eficaz (la continua no se divide)
+    amplitud = np.sqrt(potencia) * (2 / ganancia)
+    amplitud[:, 0] /= 2
+    amplitud[:, 1:] /= np.sqrt(2)
+    if largo % 2 == 0:
+        amplitud[:, -1] /= np.sqrt(2)
+    frecuencias = np.fft.rfftfreq(largo, 1 / fs)
+    enbw = largo * np.sum(w ** 2) / ganancia ** 2
+    return frecuencias, amplitud, enbw
+
+
+def armonicos(frecuencias, amplitud, enbw, lobulo, n_armonicos=N_ARMONICOS):
+    """
+    Fundamental (el bin más alto fuera de la continua) y sus armónicos de
+    una fila del espectro. La amplitud de cada componente se obtiene
+    sumando la potencia de su lóbulo principal y dividiendo por el ENBW,
+    así no depende de dónde cae la frecuencia respecto de los bins.
+    Devuelve (frecuencias, amplitudes V rms, THD en %); THD es NaN si no
+    entra ningún armónico por debajo de Nyquist o si la resolución no
+    alcanza para separarlos de la fundamental.
+    """
+    n_bins = len(amplitud)
+    if n_bins <= 2 * lobulo + 1:
+        return np.array([]), np.array([]), np.nan
+    potencia = amplitud ** 2
+    pico = lobulo + 1 + int(np.argmax(amplitud[lobulo + 1:]))
+    df = frecuencias[1] - frecuencias[0]
+
+    def componente(centro):
+        ini, fin = max(centro - lobulo, 1), min(centro + lobulo + 1, n_bins)
+        local = ini + int(np.argmax(amplitud[ini:fin]))
+        ini, fin = max(local - lobulo, 1), min(local + lobulo + 1, n_bins)
+        p = potencia[ini:fin]
+        return float(np.sum(frecuencias[ini:fin] * p) / np.sum(p)), float(np.sqrt(np.sum(p) / enbw))
+
+    f0, v0 = componente(pico)
+    f_arm, v_arm = [f0], [v0]
+    if f0 < (2 * lobulo + 1) * df:
+        # Los armónicos caerían dentro del lóbulo de la fundamental: no se resuelven
+        return np.array(f_arm), np.array(v_arm), np.nan
+    for k in range(2, n_armonicos + 1):
+        centro = int(round(k * f0 / df))
+        if centro + lobulo >= n_bins:
+            break
+        f, v = componente(centro)
+        f_arm.append(f)
+        v_arm.append(v)
+    thd = 100.0 * np.sqrt(np.sum(np.square(v_arm[1:]))) / v0 if len(v_arm) > 1 and v0 > 0 else np.nan
+    return np.array(f_arm), np.array(v_arm), thd
+
+
+def a_escala(amplitud, escala):
+    """Amplitud en V rms a la escala de la vista (dBV o lineal)."""
+    if escala == "dBV":
+        return 20 * np.log10(np.maximum(amplitud, PISO_DBV))
+    return amplitud
+
+
+def limites_espectro(valores, escala):
+    """
+    Límites verticales de la vista: el tope se redondea hacia arriba (a
+    PASO_DBV en dBV, a 1-2-5 en lineal) para que no cambien en cada cuadro.
+    """
+    maximo = float(np.max(valores)) if np.size(valores) else 0.0
+    if escala == "dBV":
+        tope = PASO_DBV * (np.floor(maximo / PASO_DBV) + 1)
+        return tope - RANGO_DBV, tope
+    if maximo <= 0:
+        return 0.0, 1.0
+    decada = 10.0 ** np.floor(np.log10(maximo))
+    for factor in (1, 2, 5, 10):
+        if factor * decada >= maximo * 1.05:
+            return 0.0, factor * decada
+    return 0.0, 20 * decada
+
+
+def espectro(tiempo, valores, nombre_ventana="hann", promedios=1, uniforme=None, progreso=None):
+    """
+    Espectro de (canales, muestras) con tiempo posiblemente no uniforme:
+    si hace falta se remuestrea primero a una grilla uniforme. Devuelve
+    (frecuencias, amplitudes V rms, [(f_arm, v_arm, thd) por canal]).
+    'uniforme' permite saltear la verificación si ya se conoce.
+    """
+    valores = np.atleast_2d(valores)
+    if uniforme is None:
+        uniforme = es_uniforme(tiempo)
+    if uniforme:
+        fs = (len(tiempo) - 1) / (tiempo[-1] - tiempo[0])
+    else:
+        fs, valores = remuestrear_uniforme(tiempo, valores)
+    frecuencias, amplitud, enbw = welch(valores, fs, nombre_ventana, promedios, progreso)
+    lobulo = LOBULO_VENTANA[nombre_ventana]
+    return frecuencias, amplitud, [armonicos(frecuencias, fila, enbw, lobulo) for fila in amplitud]
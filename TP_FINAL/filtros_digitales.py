@@ -0,0 +1,229 @@
+"""
+Filtros digitales de canal a partir de los prototipos analógicos de
+2.2/filtros.py: pasa-bajos, pasa-altos, pasa-banda y rechaza-banda de
+segundo orden sobre el denominador del RLC serie, s² + s wo/Q + wo².
+Con los valores del circuito (F0_RLC, Q_RLC) son exactamente num2_pb,
+num3_pa, num4_pb y num5_rb sobre den_RLC_serie; con otra frecuencia y Q
+sirven para, p. ej., sacar el zumbido de 50 Hz con el rechaza-banda.
+
+El prototipo se discretiza con la transformación bilineal predistorsionada
+a la frecuencia del filtro (la respuesta digital coincide con la analógica
+justo en f0) y se guarda como secciones de segundo orden. Se aplica de a
+trozos llevando el estado de uno al siguiente, así una captura larga (o un
+memmap del cache binario) nunca se copia entera a float64: en fase cero
+una pasada hacia adelante y otra hacia atrás, con la misma extensión
+impar de los bordes que scipy.signal.sosfiltfilt.
+
+scipy es opcional: se importa al filtrar y, si falta, el error dice qué
+instalar.
+"""
+import tempfile
+import threading
+
+import numpy as np
+
+
+# --- CONSTANTES DE FILTROS DIGITALES ---
+# Circuito RLC serie del Grupo 5 (2.2/filtros.py)
+C_RLC = 47e-9  # Capacitancia (F)
+R_RLC = 50     # Resistencia (Ohm)
+L_RLC = 1e-3   # Inductancia (H)
+F0_RLC = 1 / (2 * np.pi * np.sqrt(L_RLC * C_RLC)) # Frecuencia de resonancia (Hz)
+Q_RLC = np.sqrt(L_RLC / C_RLC) / R_RLC            # wo / Q = R / L, como en den_RLC_serie
+TIPOS_FILTRO = ["low-pass", "high-pass", "band-pass", "notch"]
+MODOS_FILTRO = ["zero-phase", "causal"]
+F_RED = 50.0                      # Zumbido de línea
+Q_RED = 10.0                      # Rechaza-banda de la red: ~5 Hz de ancho a -3 dB
+TAM_TROZO_FILTRO = 1 << 20        # Muestras que se filtran de una vez
+MAX_MUESTRAS_EN_MEMORIA = 1 << 25 # Con más, la salida va a un memmap en un archivo temporal
+
+
+def _scipy_signal():
+    """Importa scipy.signal con un mensaje que dice qué instalar si falta."""
+    try:
+        from scipy import signal
+    except ImportError:
+        raise ImportError("Para filtrar canales hay que instalar scipy (pip install scipy)") from None
+    return signal
+
+
+def prototipo(tipo, f0, q):
+    """
+    (numerador, denominador) en s del filtro de segundo orden 'tipo' con
+    frecuencia central/de corte f0 (Hz) y factor de calidad q.
+    """
+    if f0 <= 0 or q <= 0:
+        raise ValueError("La frecuencia y el Q tienen que ser positivos.")
+    wo = 2 * np.pi * f0
+    numeradores = {
+        "low-pass": [wo ** 2],        # num2_pb = 1 / LC
+        "high-pass": [1, 0, 0],       # num3_pa
+        "band-pass": [wo / q, 0],     # num4_pb = R / L
+        "notch": [1, 0, wo ** 2],     # num5_rb
+    }
+    if tipo not in numeradores:
+        raise ValueError(f"Tipo de filtro desconocido: '{tipo}'")
+    return numeradores[tipo], [1, wo / q, wo ** 2]
+
+
+def discretizar(tipo, f0, q, fs):
+    """
+    Secciones de segundo orden (sos de scipy) del prototipo discretizado
+    con la bilineal predistorsionada en f0 para la frecuencia de muestreo fs.
+    """
+    if not 0 < f0 < fs / 2:
+        raise ValueError(f"La frecuencia del filtro tiene que estar entre 0 y fs/2 = {fs / 2:g} Hz.")
+    signal = _scipy_signal()
+    num, den = prototipo(tipo, f0, q)
+    # s = K (z - 1) / (z + 1) con K = wo / tan(wo / 2fs): la bilineal de scipy usa K = 2 fs'
+    wo = 2 * np.pi * f0
+    k = wo / np.tan(wo / (2 * fs))
+    ceros, polos, ganancia = signal.bilinear_zpk(*signal.tf2zpk(num, den), fs=k / 2)
+    return signal.zpk2sos(ceros, polos, ganancia)
+
+
+def _largo_extension(sos, n):
+    """Muestras de la extensión de cada borde, las mismas que usa sosfiltfilt (acotadas a la captura)."""
+    taps = 2 * len(sos) + 1 - min(int((sos[:, 2] == 0).sum()), int((sos[:, 5] == 0).sum()))
+    return min(3 * taps, n - 1)
+
+
+def _salida(n):
+    """Array de salida de n muestras: en memoria o, si es muy largo, un memmap temporal."""
+    if n <= MAX_MUESTRAS_EN_MEMORIA:
+        return np.empty(n)
+    return np.memmap(tempfile.TemporaryFile(prefix="filtro_"), dtype=np.float64, mode="w+", shape=(n,))
+
+
+def filtrar(sos, fila, fase_cero=True, progreso=None, tam=TAM_TROZO_FILTRO):
+    """
+    Aplica las secciones 'sos' a 'fila' (array o memmap) de a trozos de
+    'tam' muestras con el estado de cada trozo pasado al siguiente.
+    Causal: arranca en régimen con la primera muestra (sin el transitorio
+    de la continua). Fase cero: ida y vuelta con las extensiones impares de
+    los bordes; da lo mismo que sosfiltfilt sin pedirle la captura entera.
+    Devuelve un array nuevo de float64 (ver _salida).
+    """
+    signal = _scipy_signal()
+    n = len(fila)
+    salida = _salida(n)
+    if n == 0:
+        return salida
+    zi = signal.sosfilt_zi(sos) # Estado en régimen para una entrada constante 1
+    pasadas = 2 if fase_cero else 1
+    extension = _largo_extension(sos, n) if fase_cero else 0
+
+    # Ida: extensión inicial (sólo para llevar el estado), la fila y extensión final
+    if extension:
+        inicio = 2 * float(fila[0]) - np.asarray(fila[extension:0:-1], dtype=np.float64)
+        _, estado = signal.sosfilt(sos, inicio, zi=zi * inicio[0])
+    else:
+        estado = zi * float(fila[0])
+    for ini in range(0, n, tam):
+        fin = min(ini + tam, n)
+        salida[ini:fin], estado = signal.sosfilt(sos, np.asarray(fila[ini:fin], dtype=np.float64), zi=estado)
+        if progreso is not None:
+            progreso(fin / n / pasadas)
+    if not fase_cero:
+        return salida
+
+    # Vuelta: desde el final de la extensión final hacia el comienzo de la fila
+    if extension:
+        final = 2 * float(fila[n - 1]) - np.asarray(fila[n - 1 - extension:n - 1], dtype=np.float64)[::-1]
+        final, _ = signal.sosfilt(sos, final, zi=estado)
+        _, estado = signal.sosfilt(sos, final[::-1], zi=zi * final[-1])
+    else:
+        estado = zi * salida[n - 1]
+    for fin in range(n, 0, -tam):
+        ini = max(fin - tam, 0)
+        tramo, estado = signal.sosfilt(sos, salida[ini:fin][::-1], zi=estado)
+        salida[ini:fin] = tramo[::-1]
+        if progreso is not None:
+            progreso(0.5 + (n - ini) / n / 2)
+    return salida
+
+
+class CanalFiltrado:
+    """
+    Canal real pasado por un filtro digital, con la misma interfaz que
+    matematica.CanalMatematico (evaluar, trozos, invalidar) para que el
+    almacén lo trate como un canal derivado más. La fila se filtra entera
+    una sola vez (de a trozos) y queda guardada hasta que cambian las
+    muestras; otros parámetros son otro canal filtrado. Se puede filtrar
+    en un hilo de trabajo (preparar) antes de agregarlo al almacén.
+    """
+
+    def __init__(self, fuente, tipo, f0, q, modo=MODOS_FILTRO[0]):
+        f0, q = float(f0), float(q)
+        prototipo(tipo, f0, q) # Valida tipo, f0 y q
+        if modo not in MODOS_FILTRO:
+            raise ValueError(f"Modo de filtro desconocido: '{modo}'")
+        self.fuente = fuente # Canal real (0-index)
+        self.fuentes = [fuente]
+        self.operacion = "filtro"
+        self.tipo, self.f0, self.q, self.modo = tipo, f0, q, modo
+        self._lock = threading.Lock()
+        self._version = 0
+        self._filtrada = None
+
+    @property
+    def parametros(self):
+        return self.fuente, self.tipo, self.f0, self.q, self.modo
+
+    @property
+    def expresion(self):
+        """Nombre del canal, p. ej. 'notch 50 Hz Q=10 CH1'."""
+        return f"{self.tipo} {self.f0:g} Hz Q={self.q:.3g} CH{self.fuente + 1}" + (
+            " (causal)" if self.modo == "causal" else "")
+
+    @property
+    def canal_solo(self):
+        return None
+
+    @property
+    def listo(self):
+        """Si la fila ya está filtrada (evaluar no tiene que esperar)."""
+        return self._filtrada is not None
+
+    def secciones(self, tiempo):
+        """
+        Secciones de segundo orden para el muestreo de 'tiempo' (el paso
+        medio: con tiempo no uniforme el filtro es aproximado). Lanza
+        ValueError si f0 no queda por debajo de fs/2.
+        """
+        if len(tiempo) < 2 or not tiempo[-1] > tiempo[0]:
+            raise ValueError("Hacen falta al menos dos muestras para filtrar.")
+        fs = (len(tiempo) - 1) / (tiempo[-1] - tiempo[0])
+        return discretizar(self.tipo, self.f0, self.q, fs)
+
+    def invalidar(self):
+        """Descarta lo filtrado (cambiaron las muestras)."""
+        self._version += 1
+        self._filtrada = None
+
+    def preparar(self, tiempo, datos, progreso=None):
+        """
+        Fila filtrada completa (de sólo lectura), calculándola si hace falta.
+        Si mientras se calcula cambian las muestras, el resultado se
+        devuelve pero no se guarda.
+        """
+        with self._lock:
+            if self._filtrada is not None:
+                return self._filtrada
+            version = self._version
+            filtrada = filtrar(self.secciones(tiempo), datos[self.fuente], self.modo == "zero-phase", progreso)
+            filtrada.flags.writeable = False # Se entregan vistas: que nadie las modifique
+            if version == self._version:
+                self._filtrada = filtrada
+            return filtrada
+
+    def evaluar(self, tiempo, datos, i_ini, i_fin, indice=None, uniforme=False):
+        """Valores filtrados en las muestras [i_ini, i_fin) (vista de sólo lectura de lo guardado)."""
+        return self.preparar(tiempo, datos)[i_ini:i_fin]
+
+    def trozos(self, tiempo, datos, i_ini, i_fin, indice=None, uniforme=False, tam=TAM_TROZO_FILTRO):
+        """Como CanalMatematico.trozos: genera (ini, fin, valores) de a 'tam' muestras."""
+        filtrada = self.preparar(tiempo, datos)
+        for ini in range(i_ini, i_fin, tam):
+            fin = min(ini + tam, i_fin)
+            yield ini, fin, filtrada[ini:fin]
@@ -0,0 +1,335 @@
+"""
+Capturas en formatos binarios por columnas: Parquet, Feather (Arrow IPC)
+y HDF5 con datasets por bloques. Se leen sólo las columnas y el rango de
+filas pedidos (grupos de filas de Parquet, lotes de Arrow, bloques de
+HDF5) y se escriben por bloques, así una captura no se duplica en memoria.
+Si el tiempo es uniforme no se guarda como columna sino como inicio +
+incremento (como en los CSV de Rigol).
+
+pyarrow (Parquet/Feather) y h5py (HDF5) son opcionales: se importan al
+usarlos y, si faltan, el error dice qué instalar.
+
+    python formatos_columnares.py CAPTURA.csv [...] --formato parquet [--filas 0:1000000] [--canales "CH1 (V)"]
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+
+# --- CONSTANTES DE FORMATOS COLUMNARES ---
+EXTENSIONES_PARQUET = (".parquet", ".pq")
+EXTENSIONES_FEATHER = (".feather", ".arrow", ".ipc")
+EXTENSIONES_HDF5 = (".h5", ".hdf5")
+EXTENSIONES_COLUMNARES = EXTENSIONES_PARQUET + EXTENSIONES_FEATHER + EXTENSIONES_HDF5
+FORMATOS_EXPORTACION = {"parquet": ".parquet", "feather": ".feather", "hdf5": ".h5", "csv": ".csv"}
+FILAS_POR_GRUPO = 1 << 20      # Filas por grupo (Parquet), lote (Arrow) y bloque (HDF5)
+COMPRESION_ARROW = "zstd"
+COMPRESION_HDF5 = "gzip"       # Portable (cualquier lector de HDF5); con shuffle
+NIVEL_HDF5 = 1
+CLAVE_METADATOS = "tc_scope"   # Metadatos propios: nombres, inicio/incremento del tiempo
+DATASET_HDF5 = "captura"       # Dataset (columnas x filas) de los archivos que escribe este módulo
+TOLERANCIA_UNIFORME = 1e-6     # Error admitido al reconstruir el tiempo, en fracción del paso
+
+
+def es_columnar(ruta):
+    return ruta.lower().endswith(EXTENSIONES_COLUMNARES)
+
+
+def _requerir(modulo, formato):
+    """Importa una dependencia opcional con un mensaje que dice qué instalar."""
+    try:
+        return __import__(modulo, fromlist=["_"])
+    except ImportError:
+        paquete = "h5py" if modulo == "h5py" else "pyarrow"
+        raise ImportError(f"Para usar {formato} hay que instalar {paquete} (pip install {paquete})") from None
+
+
+def tiempo_uniforme(tiempo):
+    """(inicio, incremento) si inicio + k * incremento reproduce el tiempo; si no, None."""
+    n = len(tiempo)
+    if n < 2:
+        return None
+    inicio = float(tiempo[0])
+    incremento = (float(tiempo[-1]) - inicio) / (n - 1)
+    if incremento <= 0:
+        return None
+    # Por bloques: no se arma otro vector del largo de la captura
+    for a in range(0, n, FILAS_POR_GRUPO):
+        b = min(a + FILAS_POR_GRUPO, n)
+        error = np.abs(tiempo[a:b] - (inicio + np.arange(a, b) * incremento)).max()
+        if error > TOLERANCIA_UNIFORME * incremento:
+            return None
+    return inicio, incremento
+
+
+def _rango(filas, n):
+    """(inicio, fin) acotado a [0, n]; None es toda la captura."""
+    if filas is None:
+        return 0, n
+    inicio, fin = filas
+    inicio = min(max(inicio or 0, 0), n)
+    fin = n if fin is None else min(max(fin, inicio), n)
+    return inicio, fin
+
+
+def _elegir(disponibles, columnas):
+    """Índices de las columnas pedidas (por nombre o índice) entre las de canal disponibles."""
+    if columnas is None:
+        return list(range(len(disponibles)))
+    indices = []
+    for columna in columnas:
+        if isinstance(columna, str):
+            if columna not in disponibles:
+                raise ValueError(f"No existe la columna '{columna}'")
+            columna = disponibles.index(columna)
+        indices.append(columna)
+    return sorted(set(indices))
+
+
+def _llenar(lotes, inicio, fin, columnas, progreso):
+    """
+    Copia a un array (columnas, fin - inicio) las filas [inicio, fin) de
+    'lotes' = [(filas del lote, leer)], donde leer(columnas) devuelve una
+    tabla o lote de Arrow. Sólo se leen los lotes que tocan el rango.
+    """
+    datos = np.empty((len(columnas), fin - inicio))
+    desde = 0 # Primera fila del lote en la captura
+    for filas_lote, leer in lotes:
+        a, b = max(inicio, desde), min(fin, desde + filas_lote)
+        if a < b:
+            lote = leer(columnas)
+            for k, nombre in enumerate(columnas):
+                columna = lote.column(nombre)
+                valores = np.concatenate([c.to_numpy(zero_copy_only=False)
+                                          for c in getattr(columna, "chunks", [columna])])
+                datos[k, a - inicio:b - inicio] = valores[a - desde:b - desde]
+            if progreso is not None:
+                progreso((b - inicio) / max(fin - inicio, 1))
+        desde += filas_lote
+        if desde >= fin:
+            break
+    return datos
+
+
+def _metadatos_arrow(schema):
+    crudos = (schema.metadata or {}).get(CLAVE_METADATOS.encode())
+    return json.loads(crudos) if crudos else {}
+
+
+def _columnas_numericas(schema):
+    pa = _requerir("pyarrow", "Parquet/Feather")
+    return [campo.name for campo in schema
+            if pa.types.is_floating(campo.type) or pa.types.is_integer(campo.type)]
+
+
+def _leer_arrow(ruta):
+    """Parquet o Feather: (columnas numéricas, lotes, filas, metadatos); los lotes se leen a pedido."""
+    pa = _requerir("pyarrow", "Parquet/Feather")
+    if ruta.lower().endswith(EXTENSIONES_PARQUET):
+        import pyarrow.parquet as pq
+        archivo = pq.ParquetFile(ruta, memory_map=True)
+        schema = archivo.schema_arrow
+        lotes = [(archivo.metadata.row_group(i).num_rows,
+                  lambda cols, i=i: archivo.read_row_group(i, columns=cols))
+                 for i in range(archivo.num_row_groups)]
+    else:
+        try:
+            lector = pa.ipc.open_file(pa.memory_map(ruta, "r"))
+            schema = lector.schema
+            metadatos = _metadatos_arrow(schema)
+            if "filas" in metadatos and "filas_por_lote" in metadatos:
+                # Escrito por escribir_captura: lotes del largo guardado (sin
+                # descomprimir cada lote para saber su largo)
+                n, por_lote = metadatos["filas"], metadatos["filas_por_lote"]
+                filas = [min(por_lote, n - a) for a in range(0, n, por_lote)]
+            else:
+                filas = [lector.get_batch(i).num_rows for i in range(lector.num_record_batches)]
+            lotes = [(n, lambda cols, i=i: lector.get_batch(i)) for i, n in enumerate(filas)]
+        except pa.ArrowInvalid:
+            import pyarrow.feather as feather # Feather v1: se lee entero
+            tabla = feather.read_table(ruta, memory_map=True)
+            schema = tabla.schema
+            lotes = [(tabla.num_rows, lambda cols: tabla)]
+    metadatos = _metadatos_arrow(schema)
+    numericas = _columnas_numericas(schema)
+    filas_total = sum(n for n, _ in lotes)
+    return numericas, lotes, filas_total, metadatos
+
+
+def _leer_hdf5(ruta, columnas, filas, progreso):
+    """HDF5: el dataset DATASET_HDF5 (columnas x filas) o datasets 1-D del mismo largo en la raíz."""
+    h5py = _requerir("h5py", "HDF5")
+    with h5py.File(ruta, "r") as archivo:
+        if DATASET_HDF5 in archivo and archivo[DATASET_HDF5].ndim == 2:
+            dataset = archivo[DATASET_HDF5]
+            metadatos = json.loads(dataset.attrs.get(CLAVE_METADATOS, "{}"))
+            nombres = metadatos.get("nombres") or [f"Col{k}" for k in range(dataset.shape[0])]
+            filas_total = dataset.shape[1]
+
+            def leer(indices, a, b):
+                return dataset[indices, a:b]
+        else:
+            datasets = [(nombre, d) for nombre, d in archivo.items()
+                        if isinstance(d, h5py.Dataset) and d.ndim == 1 and d.dtype.kind in "fiu"]
+            if not datasets:
+                raise ValueError("El archivo HDF5 no tiene datasets numéricos")
+            filas_total = min(len(d) for _, d in datasets)
+            nombres = [nombre for nombre, _ in datasets]
+            metadatos = {}
+
+            def leer(indices, a, b):
+                return np.stack([datasets[k][1][a:b] for k in indices])
+
+        uniforme = "incremento" in metadatos
+        indices = _elegir(nombres, columnas) if uniforme else [0] + [k + 1 for k in _elegir(nombres[1:], columnas)]
+        inicio, fin = _rango(filas, filas_total)
+        datos = np.empty((len(indices), fin - inicio))
+        for a in range(inicio, fin, FILAS_POR_GRUPO):
+            b = min(a + FILAS_POR_GRUPO, fin)
+            datos[:, a - inicio:b - inicio] = leer(indices, a, b)
+            if progreso is not None:
+                progreso((b - inicio) / max(fin - inicio, 1))
+        return [nombres[k] for k in indices], datos, metadatos, (inicio, fin)
+
+
+def leer_columnar(ruta, columnas=None, filas=None, progreso=None):
+    """
+    Lee una captura Parquet/Feather/HDF5. 'columnas' elige canales (por
+    nombre o índice, sin contar el tiempo, que siempre se lee) y 'filas'
+    = (inicio, fin) un rango de muestras; None es todo. Devuelve
+    (nombres, datos) con 'datos' de forma (columnas, filas) en float64,
+    tiempo primero, como leer_csv. Las filas con algún NaN se descartan.
+    """
+    if ruta.lower().endswith(EXTENSIONES_HDF5):
+        nombres, datos, metadatos, (inicio, fin) = _leer_hdf5(ruta, columnas, filas, progreso)
+    else:
+        numericas, lotes, filas_total, metadatos = _leer_arrow(ruta)
+        uniforme = "incremento" in metadatos
+        canales = numericas if uniforme else numericas[1:]
+        nombres = [canales[k] for k in _elegir(canales, columnas)]
+        if not uniforme:
+            nombres = numericas[:1] + nombres
+        inicio, fin = _rango(filas, filas_total)
+        datos = _llenar(lotes, inicio, fin, nombres, progreso)
+
+    if "incremento" in metadatos:
+        # Tiempo uniforme: se reconstruye sólo para el rango leído
+        tiempo = metadatos["inicio"] + np.arange(inicio, fin) * metadatos["incremento"]
+        datos = np.concatenate([tiempo[None, :], datos])
+        nombres = [metadatos.get("nombre_tiempo", "Time (s)")] + nombres
+    if len(nombres) < 2:
+        return nombres, datos
+    validas = ~np.isnan(datos).any(axis=0)
+    if not validas.all():
+        datos = np.ascontiguousarray(datos[:, validas])
+    return nombres, datos
+
+
+def escribir_captura(ruta, nombres, filas, progreso=None):
+    """
+    Escribe una captura en el formato de la extensión: Parquet (grupos de
+    FILAS_POR_GRUPO filas, zstd), Feather (lotes comprimidos con zstd),
+    HDF5 (dataset por bloques con gzip) o CSV. 'filas' es una secuencia
+    de series del mismo largo, tiempo primero (un array columnas x
+    muestras, memmaps o vistas de un rango): se escribe de a bloques, sin
+    apilarlas.
+    """
+    nombres = list(nombres)
+    extension = os.path.splitext(ruta)[1].lower()
+    n = len(filas[0])
+    uniforme = tiempo_uniforme(filas[0]) if extension != ".csv" else None
+    metadatos = {"nombres": nombres if uniforme is None else nombres[1:], "filas": n,
+                 "filas_por_lote": FILAS_POR_GRUPO}
+    if uniforme is not None:
+        metadatos.update(nombre_tiempo=nombres[0], inicio=uniforme[0], incremento=uniforme[1])
+    desde = 0 if uniforme is None else 1 # Con tiempo uniforme no se guarda la columna
+    guardados = nombres[desde:]
+
+    def bloques():
+        for a in range(0, n, FILAS_POR_GRUPO):
+            b = min(a + FILAS_POR_GRUPO, n)
+            yield a, b, [fila[a:b] for fila in filas[desde:]]
+            if progreso is not None:
+                progreso(b / max(n, 1))
+
+    temporal = ruta + ".tmp" # Un archivo a medio escribir nunca queda con el nombre final
+    if extension in EXTENSIONES_PARQUET + EXTENSIONES_FEATHER:
+        pa = _requerir("pyarrow", "Parquet/Feather")
+        schema = pa.schema([(nombre, pa.float64()) for nombre in guardados],
+                           metadata={CLAVE_METADATOS: json.dumps(metadatos)})
+        if extension in EXTENSIONES_PARQUET:
+            import pyarrow.parquet as pq
+            escritor = pq.ParquetWriter(temporal, schema, compression=COMPRESION_ARROW)
+        else:
+            escritor = pa.ipc.new_file(temporal, schema,
+                                       options=pa.ipc.IpcWriteOptions(compression=COMPRESION_ARROW))
+        with escritor:
+            for _, _, bloque in bloques():
+                lote = pa.record_batch([pa.array(np.ascontiguousarray(fila)) for fila in bloque], schema=schema)
+                if extension in EXTENSIONES_PARQUET:
+                    escritor.write_batch(lote, row_group_size=FILAS_POR_GRUPO)
+                else:
+                    escritor.write_batch(lote)
+    elif extension in EXTENSIONES_HDF5:
+        h5py = _requerir("h5py", "HDF5")
+        with h5py.File(temporal, "w") as archivo:
+            dataset = archivo.create_dataset(DATASET_HDF5, shape=(len(guardados), n), dtype=np.float64,
+                                             chunks=(1, max(min(n, FILAS_POR_GRUPO), 1)),
+                                             compression=COMPRESION_HDF5, compression_opts=NIVEL_HDF5,
+                                             shuffle=True)
+            dataset.attrs[CLAVE_METADATOS] = json.dumps(metadatos)
+            for a, b, bloque in bloques():
+                for k, fila in enumerate(bloque):
+                    dataset[k, a:b] = fila
+    elif extension == ".csv":
+        with open(temporal, "w", encoding="utf-8", newline="") as archivo:
+            archivo.write(",".join(nombres) + "\n")
+            for _, _, bloque in bloques():
+                np.savetxt(archivo, np.column_stack(bloque), delimiter=",", fmt="%.9g")
+    else:
+        raise ValueError(f"Formato de exportación desconocido: '{extension}'")
+    os.replace(temporal, ruta)
+
+
+def _filas(texto):
+    """'1000:2000' -> (1000, 2000); los extremos pueden faltar (':5000')."""
+    inicio, _, fin = texto.partition(":")
+    return (int(float(inicio)) if inicio else None, int(float(fin)) if fin else None)
+
+
+def main(argv=None):
+    from carga_csv import leer_csv # pandas sólo si hay CSVs
+    parser = argparse.ArgumentParser(description="Convierte capturas entre CSV, Parquet, Feather y HDF5.")
+    parser.add_argument("capturas", nargs="+")
+    parser.add_argument("--formato", choices=list(FORMATOS_EXPORTACION), default="parquet")
+    parser.add_argument("--salida", help="Carpeta destino (por defecto, la de cada captura)")
+    parser.add_argument("--filas", type=_filas, help="Rango de muestras inicio:fin (sólo capturas columnares)")
+    parser.add_argument("--canales", help="Canales a convertir, separados por comas (sólo capturas columnares)")
+    opciones = parser.parse_args(argv)
+    canales = opciones.canales.split(",") if opciones.canales else None
+    fallidos = 0
+    for ruta in opciones.capturas:
+        base = os.path.splitext(os.path.basename(ruta))[0] + FORMATOS_EXPORTACION[opciones.formato]
+        destino = os.path.join(opciones.salida or os.path.dirname(ruta), base)
+        try:
+            if es_columnar(ruta):
+                nombres, datos = leer_columnar(ruta, canales, opciones.filas)
+            else:
+                nombres, datos = leer_csv(ruta)
+                if opciones.filas:
+                    inicio, fin = _rango(opciones.filas, datos.shape[1])
+                    datos = datos[:, inicio:fin]
+            escribir_captura(destino, nombres, datos)
+        except Exception as e:
+            fallidos += 1
+            print(f"ERROR {ruta}: {e}", file=sys.stderr)
+            continue
+        print(f"{destino}: {os.path.getsize(destino) / 1e6:.1f} MB ({os.path.getsize(ruta) / 1e6:.1f} MB)")
+    return 1 if fallidos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
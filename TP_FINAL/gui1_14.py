@@ -1,18 +1,44 @@
+import time
+INICIO_MODULO = time.perf_counter() # Referencia del reporte de arranque (--tiempos-arranque)
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import os
-import re
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+import sys
+from functools import lru_cache
+# matplotlib (pyplot, TkAgg) y pandas se importan donde se usan: juntos tardan
+# ~1 s y la ventana con los controles tiene que aparecer antes (iniciar_grafico)
+from decimacion import METODOS_DECIMACION, decimar, decimar_minmax
+from canales import AlmacenCanales
+from carga_csv import cargar_captura, columnas_bode
+from formatos_columnares import (EXTENSIONES_PARQUET, EXTENSIONES_FEATHER, EXTENSIONES_HDF5,
+                                 es_columnar, escribir_captura)
+from trabajos import GestorTrabajos
+from seguimiento import SeguidorCSV, MODOS_SEGUIMIENTO, INTERVALO_SEGUIMIENTO_MS
+from planificador import PlanificadorRedibujo
+from mediciones import MEDICIONES, formatear_medicion
+from espectro import VENTANAS_FFT, ESCALAS_FFT, PROMEDIOS_FFT, a_escala, limites_espectro
+from matematica import parsear_constantes
+from filtros_digitales import CanalFiltrado, TIPOS_FILTRO, MODOS_FILTRO, F0_RLC, Q_RLC, F_RED, Q_RED
+from perfilado import PERFIL, MARCA_ARRANQUE, reporte_arranque
+from disparo import FLANCOS_DISPARO, MODOS_DISPARO, DECAIMIENTOS_PERSISTENCIA
+from superposicion import Superposicion, cargar_superpuesta, rasterizar, ALFA_SUPERPOSICION
 
 
 # --- CONSTANTES DE CONFIGURACIÓN ---
 # Constantes para los tipos de archivo CSV
 CSV_FILE_TYPES_DESCRIPTION = "Archivos CSV"
 CSV_FILE_EXTENSION_PATTERN = "*.csv"
-DEFAULT_FILE_TYPES = [(CSV_FILE_TYPES_DESCRIPTION, CSV_FILE_EXTENSION_PATTERN)]
+CSV_FILE_TYPES = [(CSV_FILE_TYPES_DESCRIPTION, CSV_FILE_EXTENSION_PATTERN)]
+# Formatos columnares binarios (formatos_columnares): se abren y se exportan
+COLUMNAR_FILE_TYPES = [
+    ("Parquet", " ".join("*" + e for e in EXTENSIONES_PARQUET)),
+    ("Feather / Arrow IPC", " ".join("*" + e for e in EXTENSIONES_FEATHER)),
+    ("HDF5", " ".join("*" + e for e in EXTENSIONES_HDF5)),
+]
+DEFAULT_FILE_TYPES = ([("Capturas", " ".join(p for _, p in CSV_FILE_TYPES + COLUMNAR_FILE_TYPES))]
+                      + CSV_FILE_TYPES + COLUMNAR_FILE_TYPES)
+EXPORT_FILE_TYPES = COLUMNAR_FILE_TYPES + CSV_FILE_TYPES
 
 # Dimensiones de la pantalla del osciloscopio (en cm)
 OSCILLOSCOPE_SCREEN_WIDTH_CM = 32
@@ -20,6 +46,38 @@ OSCILLOSCOPE_SCREEN_HEIGHT_CM = 12
 SCREEN_DIVISIONS_X = 10
 SCREEN_DIVISIONS_Y = 8
 
+# Escalas de tiempo y de tensión de los comboboxes
+TIEMPOS_POR_DIV = [
+    ("1 ns/div", 1e-9), ("10 ns/div", 10e-9), ("25 ns/div", 25e-9), ("100 ns/div", 100e-9),
+    ("1 μs/div", 1e-6), ("10 μs/div", 10e-6), ("25 μs/div", 25e-6), ("50 μs/div", 50e-6), ("100 μs/div", 100e-6),
+    ("1 ms/div", 1e-3), ("10 ms/div", 10e-3), ("25 ms/div", 25e-3), ("50 ms/div", 50e-3), ("100 ms/div", 100e-3),
+    ("1 s/div", 1)
+]
+VOLTAJES_POR_DIV = [
+    ("1 mV/div", 1e-3), ("10 mV/div", 10e-3), ("25 mV/div", 25e-3), ("50 mV/div", 50e-3),
+    ("100 mV/div", 100e-3), ("1 V/div", 1), ("2 V/div", 2), ("5 V/div", 5), ("10 V/div", 10)
+]
+
+# Canales con controles antes de cargar una captura
+CANALES_POR_DEFECTO = 2
+
+# Sobre qué muestras se calculan las mediciones automáticas y el espectro
+ALCANCES_ANALISIS = ["visible", "full"]
+
+# Cuentas de la vista de persistencia que se distinguen (escala logarítmica hasta el máximo)
+RANGO_PERSISTENCIA = 1e4
+
+# Adquisición SCPI (adquisicion.py): por defecto, el simulador local (simulador_scpi.py)
+DIRECCION_INSTRUMENTO = "127.0.0.1:5025"
+
+# Arranque: la figura se crea después de mostrar la ventana
+ESPERA_GRAFICO_MS = 10            # Tras el primer <Map>, para que los controles se pinten
+ESPERA_MAXIMA_GRAFICO_MS = 1000   # Por si la ventana nunca se mapea (p. ej. minimizada)
+OPCION_TIEMPOS_ARRANQUE = "--tiempos-arranque"
+
+# Factores de escala para cada unidad de tiempo de visualización
+FACTORES_UNIDAD_TIEMPO = {"ns": 1e9, "µs": 1e6, "ms": 1e3, "s": 1}
+
 # Colores para el modo oscuro/claro
 LIGHT_MODE_COLORS = {
     "bg": "lightgray",
@@ -28,6 +86,7 @@ LIGHT_MODE_COLORS = {
     "grid": "gray",
     "line_colors": ['blue', 'orange', 'green', 'red', 'purple', 'brown', 'pink', 'gray'],
     "cursor_x": "darkgreen",
+    "persistence_cmap": "magma_r",
     "cursor_y": "darkmagenta",
     "frame_bg": "lightgray",
     "label_fg": "black",
@@ -42,6 +101,7 @@ DARK_MODE_COLORS = {
     "grid": "#444444",
     "line_colors": ['cyan', 'lime', 'magenta', 'yellow', 'orange', 'white', 'purple', 'lightgray'],
     "cursor_x": "lightblue",
+    "persistence_cmap": "inferno",
     "cursor_y": "lightcoral",
     "frame_bg": "#3c3c3c",
     "label_fg": "white",
@@ -50,45 +110,57 @@ DARK_MODE_COLORS = {
 }
 
 
+@lru_cache(maxsize=None)
+def segmentos_reticula(divisiones_x, divisiones_y, subdivisiones=5):
+    """
+    Segmentos (en coordenadas de ejes 0..1) de la cuadrícula principal y de la
+    subdivisión, sin repetir en la subdivisión las líneas principales.
+    """
+    def segmentos(n_x, n_y, saltear=None):
+        xs = [i / n_x for i in range(n_x + 1) if saltear is None or i % saltear]
+        ys = [j / n_y for j in range(n_y + 1) if saltear is None or j % saltear]
+        return [[(x, 0), (x, 1)] for x in xs] + [[(0, y), (1, y)] for y in ys]
+
+    principal = np.array(segmentos(divisiones_x, divisiones_y))
+    subdivision = np.array(segmentos(divisiones_x * subdivisiones, divisiones_y * subdivisiones, subdivisiones))
+    return principal, subdivision
+
+
+def tiempo_div_automatico(duracion_total):
+    """
+    Time/div (etiqueta de TIEMPOS_POR_DIV) más cercano al que muestra toda
+    la duración en el 80 % de las divisiones, para que quede un margen.
+    """
+    # Si el rango de tiempo es 0 (ej. un solo punto o datos inválidos)
+    if duracion_total == 0:
+        return TIEMPOS_POR_DIV[9][0] # Default a 1ms/div
+    tiempo_por_div_necesario = duracion_total / (SCREEN_DIVISIONS_X * 0.8)
+    return min(TIEMPOS_POR_DIV, key=lambda escala: abs(escala[1] - tiempo_por_div_necesario))[0]
+
+
+def tabla_bode(nombres, datos, bode):
+    """DataFrame de un Bode con las columnas renombradas a las que usa plot_bode."""
+    freq, gain, phase = bode
+    import pandas as pd
+    return pd.DataFrame(dict(zip(nombres, datos))).rename(columns={
+        freq: 'Frequency (Hz)',
+        gain: 'Gain (dB)',
+        phase: 'Phase ()'
+    })
+
+
 class TC1ScopeApp:
     def __init__(self, root):
-        self.is_bode = False     
         self.root = root
-        self.df = None
-        self.primera_grafica = True
-        self.df = None
-        self.primera_grafica = True
-        self.unidad_tiempo = "s"
-        self.unidad_valor = "V"
-        self.lineas = []
-        self.selected_cursor = None
-        self.cursor_x1 = None
-        self.cursor_x2 = None
-        self.cursor_y1 = None
-        self.cursor_y2 = None
-        self.ymin_global = None
-        self.ymax_global = None
-        self._actualizando_slider = False # Flag para evitar recursión en sliders
-        self.offset_divisiones = 0.0 # Offset de tiempo en número de divisiones
-        self.offset_tension_ch1 = 0.0
-        self.offset_tension_ch2 = 0.0
-        self.canal_offset = tk.IntVar(value=1) 
-        self.canal_cursores = tk.IntVar(value=1) 
-        self.var_cursores = tk.BooleanVar(value=False) 
-        self.var_offset_tiempo = tk.DoubleVar(value=0.0) 
-        self.var_modo_oscuro = tk.BooleanVar(value=False) 
-        self.current_colors = LIGHT_MODE_COLORS # Colores actuales
-        # Variables de control de visibilidad
-        self.mostrar_ch1 = tk.BooleanVar(value=True)
-        self.mostrar_ch2 = tk.BooleanVar(value=True)
+        self.inicializar_estado(lambda clase, valor: clase(value=valor))
+        # Trabajos pesados (carga, índices, análisis) en segundo plano
+        self.trabajos = GestorTrabajos(self.root, al_progreso=self.actualizar_progreso)
+        # Sliders, comboboxes y resize piden redibujo; se ejecuta a lo sumo uno por cuadro
+        self.redibujo = PlanificadorRedibujo(self.root, self.actualizar_grafica)
 
         # Checkboxes para mostrar/ocultar canales
-        self.chk_ch1 = tk.Checkbutton(self.root, text="View Channel 1", variable=self.mostrar_ch1,
-                              command=self.actualizar_grafica)
-        self.chk_ch2 = tk.Checkbutton(self.root, text="View Channel 2", variable=self.mostrar_ch2,
-                                    command=self.actualizar_grafica)
-        self.chk_ch1.pack()
-        self.chk_ch2.pack()
+        self.frame_visibilidad = tk.Frame(self.root)
+        self.frame_visibilidad.pack()
 
 
 
@@ -108,6 +180,136 @@ class TC1ScopeApp:
         self.apply_theme()
 
         self.create_widgets()
+        self.root.protocol("WM_DELETE_WINDOW", self.cerrar)
+
+        # La figura (y con ella el import de matplotlib) se crea recién cuando la
+        # ventana con los controles ya está en pantalla; si algo la necesita
+        # antes, iniciar_grafico la crea en el acto
+        self.t_ventana = None
+        self.root.bind("<Map>", self.ventana_mostrada, add="+")
+        self.root.after(ESPERA_MAXIMA_GRAFICO_MS, self.iniciar_grafico)
+
+    def inicializar_estado(self, variable):
+        """
+        Estado de la app que no depende de la ventana. variable(clase, valor)
+        crea cada variable de control: en la GUI la tk.*Var de esa clase; sin
+        ventana (render_lote) un reemplazo con get/set.
+        """
+        self.is_bode = False
+        self.df = None
+        self.primera_grafica = True
+        self.almacen = None # Captura de osciloscopio (AlmacenCanales: tiempo + canales x muestras)
+        self.nombre_tiempo = "Time (s)" # Columna de tiempo de la captura (se exporta con ese nombre)
+        self.unidad_tiempo = "s"
+        self.unidad_valor = "V"
+        self.lineas = []
+        self.selected_cursor = None
+        self.cursor_x1 = None
+        self.cursor_x2 = None
+        self.cursor_y1 = None
+        self.cursor_y2 = None
+        self.ymin_global = None
+        self.ymax_global = None
+        self._actualizando_slider = False # Flag para evitar recursión en sliders
+        self._ajustando_limites = False # Flag para ignorar xlim_changed propios
+        self.canales_lineas = [] # Índice de canal de cada línea en self.lineas
+        self.vista_construida = False # Ejes/líneas/cursores persistentes ya creados
+        self.leyenda_canales = None
+        self.canales_leyenda = []
+        self.artistas_cursor = []
+        self.artistas_reticula = []
+        self.ejes_cero = []
+        self.fondo_estatico = None # Bitmap de fondo+cuadrícula para blit
+        self.firma_fondo = None
+        self.fondo_arrastre = None # Vista sin cursores mientras se arrastra uno
+        # Modo seguimiento de un CSV que se sigue escribiendo
+        self.ruta_actual = None
+        self.seguidor = None
+        self.trabajo_seguimiento = None
+        self.trabajo_filtros = None # Filtrado de los canales filtrados restaurados o con muestras nuevas
+        self.almacen_filtros = None
+        self._tick_seguimiento = None
+        self.t_origen_seguimiento = None # Referencia fija de las pantallas en modo sweep
+        self.var_seguir = variable(tk.BooleanVar, False)
+        self.var_modo_seguimiento = variable(tk.StringVar, MODOS_SEGUIMIENTO[0])
+        # Adquisición continua de un osciloscopio SCPI por TCP
+        self.adquisidor = None
+        self.numero_adquisicion = 0 # Última captura del anillo que se mostró
+        self._tick_adquisicion = None
+        self.var_adquirir = variable(tk.BooleanVar, False)
+        self.var_direccion = variable(tk.StringVar, DIRECCION_INSTRUMENTO)
+        self.var_estado_adquisicion = variable(tk.StringVar, "")
+        # Mediciones automáticas (Vpp, frecuencia, tiempo de subida, ...)
+        self.var_mediciones = variable(tk.BooleanVar, False)
+        self.var_alcance_mediciones = variable(tk.StringVar, ALCANCES_ANALISIS[0])
+        # Vista de espectro (FFT) debajo de la de tiempo
+        self.var_fft = variable(tk.BooleanVar, False)
+        self.var_alcance_fft = variable(tk.StringVar, ALCANCES_ANALISIS[0])
+        self.var_ventana_fft = variable(tk.StringVar, VENTANAS_FFT[0])
+        self.var_promedios_fft = variable(tk.StringVar, str(PROMEDIOS_FFT[0]))
+        self.var_escala_fft = variable(tk.StringVar, ESCALAS_FFT[0])
+        self.ax_fft = None
+        self.lineas_fft = []
+        self.marcadores_fft = []
+        self.texto_fft = None
+        self.clave_espectro = None # Parámetros del último espectro pedido
+        self.espectro_actual = None # (frecuencias, amplitudes, armónicos, canales)
+        # Canales matemáticos definidos (se vuelven a crear al cargar otra captura)
+        self.definiciones_matematicas = [] # (expresión, constantes)
+        self.var_expresion = variable(tk.StringVar, "CH1-CH2")
+        self.var_constantes = variable(tk.StringVar, "R=50")
+        # Filtros digitales por canal (se vuelven a aplicar al cargar otra captura)
+        self.definiciones_filtros = [] # (fuente, tipo, f0, q, modo)
+        self.var_fuente_filtro = variable(tk.StringVar, "Ch1")
+        self.var_tipo_filtro = variable(tk.StringVar, TIPOS_FILTRO[0])
+        self.var_f0_filtro = variable(tk.StringVar, f"{F0_RLC:.6g}") # Los del RLC de 2.2/filtros.py
+        self.var_q_filtro = variable(tk.StringVar, f"{Q_RLC:.3g}")
+        self.var_modo_filtro = variable(tk.StringVar, MODOS_FILTRO[0])
+        # Disparo por flanco: promedio/envolvente de los segmentos alineados en cada disparo
+        self.var_disparo = variable(tk.BooleanVar, False)
+        self.var_fuente_disparo = variable(tk.StringVar, "Ch1")
+        self.var_flanco_disparo = variable(tk.StringVar, FLANCOS_DISPARO[0])
+        self.var_nivel_disparo = variable(tk.StringVar, "0")
+        self.var_histeresis_disparo = variable(tk.StringVar, "0.1")
+        self.var_modo_disparo = variable(tk.StringVar, MODOS_DISPARO[0])
+        self.var_decaimiento = variable(tk.StringVar, str(DECAIMIENTOS_PERSISTENCIA[0]))
+        self.var_segmentos_disparo = variable(tk.StringVar, "")
+        self.imagen_persistencia = None
+        # Capturas superpuestas a la principal, cada una con su corrimiento de tiempo y su color
+        self.superposicion = Superposicion()
+        self.superpuestas_pendientes = {} # ruta real -> capturas pedidas mientras se carga
+        self.var_superpuesta = variable(tk.StringVar, "")
+        self.var_offset_superpuesta = variable(tk.StringVar, "0")
+        self.imagen_superposicion = None
+        self.clave_leyenda_superpuestas = None
+        # Perfilado: tramos con nombre y overlay con fps y desglose del último cuadro
+        self.var_perfil = variable(tk.BooleanVar, PERFIL.activo)
+        self.texto_perfil = None
+        self.clave_disparo = None # Parámetros del último promedio pedido
+        self.disparo_actual = None # (id del almacén, modo, canales, tiempo relativo, valores, segmentos)
+        self.offset_divisiones = 0.0 # Offset de tiempo en número de divisiones
+        self.canal_offset = variable(tk.IntVar, 1)
+        self.canal_cursores = variable(tk.IntVar, 1)
+        self.var_cursores = variable(tk.BooleanVar, False)
+        self.var_offset_tiempo = variable(tk.DoubleVar, 0.0)
+        self.var_modo_oscuro = variable(tk.BooleanVar, False)
+        self.current_colors = LIGHT_MODE_COLORS # Colores actuales
+        # Variables de control de visibilidad (una por canal, se recrean al cargar)
+        self.mostrar_canales = []
+        self.chk_canales = []
+
+    def ventana_mostrada(self, event):
+        """Primer <Map> de la ventana principal: deja que se pinte y después crea la figura."""
+        if event.widget is not self.root or self.t_ventana is not None:
+            return
+        self.t_ventana = time.perf_counter()
+        self.marcar_arranque("ventana")
+        self.root.after(ESPERA_GRAFICO_MS, self.iniciar_grafico)
+
+    def iniciar_grafico(self):
+        """Crea la figura de Matplotlib y conecta sus eventos (sólo la primera vez)."""
+        if hasattr(self, 'canvas'):
+            return
         self.setup_plot()
 
         # Conectar eventos de Matplotlib para los cursores
@@ -115,6 +317,15 @@ class TC1ScopeApp:
         self.canvas.mpl_connect('button_release_event', self.on_release)
         self.canvas.mpl_connect('motion_notify_event', self.on_motion)
         self.canvas.mpl_connect('resize_event', self.on_resize) # Capturar evento de redimensionado de figura
+        self.marcar_arranque("grafico")
+        if OPCION_TIEMPOS_ARRANQUE in sys.argv[1:]:
+            self.root.after(0, self.cerrar) # Proceso lanzado por reporte_arranque: termina acá
+
+    def marcar_arranque(self, etapa):
+        """Con --tiempos-arranque avisa en stderr cada etapa a reporte_arranque."""
+        if OPCION_TIEMPOS_ARRANQUE in sys.argv[1:]:
+            print(f"{MARCA_ARRANQUE} {etapa} {(time.perf_counter() - INICIO_MODULO) * 1000:.1f}",
+                  file=sys.stderr, flush=True)
 
     def apply_theme(self):
         """Aplica el tema (claro/oscuro) a la interfaz y el gráfico."""
@@ -186,26 +397,22 @@ class TC1ScopeApp:
             for line in self.ax.get_xgridlines() + self.ax.get_ygridlines():
                 line.set_color(self.current_colors["grid"])
             
-            # Re-dibuja líneas de datos y cursores con los nuevos colores si ya existen
-            self.actualizar_grafica() 
+            # Re-crea líneas de datos y cursores con los nuevos colores si ya existen
+            self.vista_construida = False
+            self.redibujo.pedir()
 
         # Actualiza el estilo de los checkboxes personalizados según el modo
-        if hasattr(self, 'chk_ch1') and hasattr(self, 'chk_ch2'):
+        if hasattr(self, 'chk_canales'):
             texto_color = "white" if self.var_modo_oscuro.get() else "black"
-            self.chk_ch1.config(
-                bg=self.current_colors["bg"],
-                fg=texto_color,
-                selectcolor=self.current_colors["bg"],
-                activebackground=self.current_colors["bg"],
-                activeforeground=texto_color
-            )
-            self.chk_ch2.config(
-                bg=self.current_colors["bg"],
-                fg=texto_color,
-                selectcolor=self.current_colors["bg"],
-                activebackground=self.current_colors["bg"],
-                activeforeground=texto_color
-            )
+            self.frame_visibilidad.config(bg=self.current_colors["bg"])
+            for chk in self.chk_canales:
+                chk.config(
+                    bg=self.current_colors["bg"],
+                    fg=texto_color,
+                    selectcolor=self.current_colors["bg"],
+                    activebackground=self.current_colors["bg"],
+                    activeforeground=texto_color
+                )
 
 
 
@@ -220,20 +427,41 @@ class TC1ScopeApp:
         top_frame = ttk.Frame(self.root)
         top_frame.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
 
-        # Botón Abrir CSV
-        self.btn_abrir = ttk.Button(top_frame, text="Open CSV", command=self.abrir_csv)
+        # Botón Abrir captura (CSV, Parquet, Feather o HDF5)
+        self.btn_abrir = ttk.Button(top_frame, text="Open capture", command=self.abrir_csv)
         self.btn_abrir.pack(side=tk.LEFT, padx=5)
+        self.btn_exportar = ttk.Button(top_frame, text="Export...", command=self.exportar_captura)
+        self.btn_exportar.pack(side=tk.LEFT, padx=5)
+
+        # Progreso y cancelación de los trabajos en segundo plano
+        self.barra_progreso = ttk.Progressbar(top_frame, orient='horizontal', length=150,
+                                              mode='determinate', maximum=1.0)
+        self.barra_progreso.pack(side=tk.LEFT, padx=5)
+        self.btn_cancelar = ttk.Button(top_frame, text="Cancel", command=self.trabajos.cancelar_todos,
+                                       state=tk.DISABLED)
+        self.btn_cancelar.pack(side=tk.LEFT, padx=5)
+
+        # Seguimiento de un CSV en escritura (roll/sweep)
+        self.chk_seguir = ttk.Checkbutton(top_frame, text="Follow", variable=self.var_seguir,
+                                          command=self.toggle_seguimiento)
+        self.chk_seguir.pack(side=tk.LEFT, padx=5)
+        self.combo_modo_seguimiento = ttk.Combobox(
+            top_frame, values=MODOS_SEGUIMIENTO,
+            state="readonly", width=6, textvariable=self.var_modo_seguimiento
+        )
+        self.combo_modo_seguimiento.pack(side=tk.LEFT, padx=5)
+        self.combo_modo_seguimiento.bind("<<ComboboxSelected>>", self.redibujo.pedir)
 
         # Checkbox Usar Cursores
-        self.chk_cursores = ttk.Checkbutton(top_frame, text="Use cursors", variable=self.var_cursores, command=self.actualizar_grafica)
+        self.chk_cursores = ttk.Checkbutton(top_frame, text="Use cursors", variable=self.var_cursores, command=self.redibujo.pedir)
         self.chk_cursores.pack(side=tk.LEFT, padx=10)
 
         # Controles de Cursores y Deltas
         frame_deltas = ttk.Frame(top_frame)
         frame_deltas.pack(side=tk.LEFT, padx=10)
         ttk.Label(frame_deltas, text="ΔY Channel:").pack(side="left")
-        ttk.Radiobutton(frame_deltas, text="Ch1", variable=self.canal_cursores, value=1, command=self.actualizar_deltas_cursores).pack(side="left")
-        ttk.Radiobutton(frame_deltas, text="Ch2", variable=self.canal_cursores, value=2, command=self.actualizar_deltas_cursores).pack(side="left")
+        self.frame_canal_cursores = ttk.Frame(frame_deltas) # Un Radiobutton por canal
+        self.frame_canal_cursores.pack(side="left")
         
         # Etiqueta de Deltas
         self.label_deltas = ttk.Label(top_frame, text="ΔX = 0, ΔY = 0")
@@ -252,12 +480,7 @@ class TC1ScopeApp:
         time_control_frame.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
 
         ttk.Label(time_control_frame, text="Time/div:").pack(side=tk.LEFT)
-        self.tiempos_por_div = [
-            ("1 ns/div", 1e-9), ("10 ns/div", 10e-9), ("25 ns/div", 25e-9), ("100 ns/div", 100e-9),
-            ("1 μs/div", 1e-6), ("10 μs/div", 10e-6), ("25 μs/div", 25e-6), ("50 μs/div", 50e-6), ("100 μs/div", 100e-6),
-            ("1 ms/div", 1e-3), ("10 ms/div", 10e-3), ("25 ms/div", 25e-3), ("50 ms/div", 50e-3), ("100 ms/div", 100e-3),
-            ("1 s/div", 1)
-        ]
+        self.tiempos_por_div = TIEMPOS_POR_DIV
         self.var_tiempo_div = tk.StringVar()
         self.combo_tiempo_div = ttk.Combobox(
             time_control_frame, values=[v[0] for v in self.tiempos_por_div],
@@ -265,7 +488,7 @@ class TC1ScopeApp:
         )
         self.combo_tiempo_div.current(9) # Default a 1ms/div
         self.combo_tiempo_div.pack(side=tk.LEFT, padx=5)
-        self.combo_tiempo_div.bind("<<ComboboxSelected>>", self.actualizar_grafica)
+        self.combo_tiempo_div.bind("<<ComboboxSelected>>", self.redibujo.pedir)
 
         # Slider de Offset de Tiempo
         self.scl_toffset = ttk.Scale(
@@ -283,6 +506,16 @@ class TC1ScopeApp:
         self.btn_reset_toffset = ttk.Button(time_control_frame, text="Reset", command=self.reset_offset)
         self.btn_reset_toffset.pack(side=tk.LEFT, padx=5)
 
+        # Método de decimación para capturas largas
+        ttk.Label(time_control_frame, text="Decimation:").pack(side=tk.LEFT, padx=(10, 0))
+        self.var_decimacion = tk.StringVar(value=METODOS_DECIMACION[0])
+        self.combo_decimacion = ttk.Combobox(
+            time_control_frame, values=METODOS_DECIMACION,
+            state="readonly", width=8, textvariable=self.var_decimacion
+        )
+        self.combo_decimacion.pack(side=tk.LEFT, padx=5)
+        self.combo_decimacion.bind("<<ComboboxSelected>>", self.redibujo.pedir)
+
 
         # Frame para controles de voltaje (Volt/div y Offset de tensión)
         volt_control_frame = ttk.Frame(self.root)
@@ -290,8 +523,8 @@ class TC1ScopeApp:
 
         # Selector de canal para offset
         ttk.Label(volt_control_frame, text="Voltage Offset Ch:").pack(side="left")
-        ttk.Radiobutton(volt_control_frame, text="Ch1", variable=self.canal_offset, value=1, command=self.actualizar_slider_offset).pack(side="left")
-        ttk.Radiobutton(volt_control_frame, text="Ch2", variable=self.canal_offset, value=2, command=self.actualizar_slider_offset).pack(side="left")
+        self.frame_canal_offset = ttk.Frame(volt_control_frame) # Un Radiobutton por canal
+        self.frame_canal_offset.pack(side="left")
 
         # Slider de Offset de Tensión
         self.scl_tension_offset = ttk.Scale(
@@ -313,25 +546,154 @@ class TC1ScopeApp:
         self.frame_voltdiv = ttk.LabelFrame(self.root, text="Volts/div per channel")
         self.frame_voltdiv.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
 
-        self.voltajes_por_div = [
-            ("1 mV/div", 1e-3), ("10 mV/div", 10e-3), ("25 mV/div", 25e-3), ("50 mV/div", 50e-3),
-            ("100 mV/div", 100e-3), ("1 V/div", 1), ("2 V/div", 2), ("5 V/div", 5), ("10 V/div", 10)
-        ]
+        self.voltajes_por_div = VOLTAJES_POR_DIV
 
         self.volt_div_vars = []
         self.volt_div_combos = []
-        # Inicialmente, crea 2 combobox para los 2 canales más comunes.
+        self.radios_canales = []
+        # Inicialmente, crea los controles para los 2 canales más comunes.
         # Se recrearán dinámicamente en inicializar_volt_div si se carga un CSV con más/menos canales.
-        for i in range(2): # Crea 2 combos por defecto
-             var = tk.StringVar(value="1 V/div")
-             combo = ttk.Combobox(self.frame_voltdiv, values=[v[0] for v in self.voltajes_por_div], textvariable=var, state='readonly', width=12)
-             combo.pack(side=tk.LEFT, padx=5, pady=5)
-             combo.bind("<<ComboboxSelected>>", self.actualizar_grafica)
-             self.volt_div_vars.append(var)
-             self.volt_div_combos.append(combo)
+        self.crear_controles_canales(CANALES_POR_DEFECTO)
+
+        # Frame para las mediciones automáticas: una fila por canal visible
+        self.frame_mediciones = ttk.LabelFrame(self.root, text="Measurements")
+        self.frame_mediciones.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
+        frame_opciones = ttk.Frame(self.frame_mediciones)
+        frame_opciones.pack(side=tk.LEFT, fill=tk.Y, padx=5)
+        self.chk_mediciones = ttk.Checkbutton(frame_opciones, text="Measure", variable=self.var_mediciones,
+                                              command=self.redibujo.pedir)
+        self.chk_mediciones.pack(side=tk.TOP, anchor="w")
+        self.combo_alcance_mediciones = ttk.Combobox(
+            frame_opciones, values=ALCANCES_ANALISIS,
+            state="readonly", width=8, textvariable=self.var_alcance_mediciones
+        )
+        self.combo_alcance_mediciones.pack(side=tk.TOP, pady=2)
+        self.combo_alcance_mediciones.bind("<<ComboboxSelected>>", self.redibujo.pedir)
+        self.tabla_mediciones = ttk.Treeview(self.frame_mediciones, columns=MEDICIONES, height=2)
+        self.tabla_mediciones.heading("#0", text="Channel")
+        self.tabla_mediciones.column("#0", width=80, stretch=False)
+        for nombre in MEDICIONES:
+            self.tabla_mediciones.heading(nombre, text=nombre)
+            self.tabla_mediciones.column(nombre, width=80, anchor="e")
+        self.tabla_mediciones.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+
+        # Frame para la vista de espectro (ventana, promedios de Welch y escala)
+        frame_fft = ttk.LabelFrame(self.root, text="Spectrum")
+        frame_fft.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
+        self.chk_fft = ttk.Checkbutton(frame_fft, text="FFT", variable=self.var_fft, command=self.toggle_fft)
+        self.chk_fft.pack(side=tk.LEFT, padx=5)
+        for texto, valores, variable in (("Range:", ALCANCES_ANALISIS, self.var_alcance_fft),
+                                         ("Window:", VENTANAS_FFT, self.var_ventana_fft),
+                                         ("Averages:", [str(p) for p in PROMEDIOS_FFT], self.var_promedios_fft),
+                                         ("Scale:", ESCALAS_FFT, self.var_escala_fft)):
+            ttk.Label(frame_fft, text=texto).pack(side=tk.LEFT, padx=(10, 0))
+            combo = ttk.Combobox(frame_fft, values=valores, state="readonly", width=10, textvariable=variable)
+            combo.pack(side=tk.LEFT, padx=5)
+            combo.bind("<<ComboboxSelected>>", self.redibujo.pedir)
+
+        # Frame para canales matemáticos: CH1-CH2, CH1*CH2/R, d/dt CH2, ∫CH1
+        frame_math = ttk.LabelFrame(self.root, text="Math channels")
+        frame_math.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
+        ttk.Label(frame_math, text="Expression:").pack(side=tk.LEFT, padx=(5, 0))
+        self.entry_expresion = ttk.Entry(frame_math, textvariable=self.var_expresion, width=24)
+        self.entry_expresion.pack(side=tk.LEFT, padx=5)
+        self.entry_expresion.bind("<Return>", self.agregar_matematico)
+        ttk.Label(frame_math, text="Constants:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Entry(frame_math, textvariable=self.var_constantes, width=16).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_math, text="Add", command=self.agregar_matematico).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_math, text="Clear", command=self.quitar_matematicos).pack(side=tk.LEFT, padx=5)
+        ttk.Label(frame_math, text="(CHn, + - * /, d/dt, ∫)").pack(side=tk.LEFT, padx=5)
+
+        # Frame para filtrar un canal con los prototipos del RLC (2.2/filtros.py) discretizados
+        frame_filtro = ttk.LabelFrame(self.root, text="Filter")
+        frame_filtro.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
+        ttk.Label(frame_filtro, text="Source:").pack(side=tk.LEFT, padx=(5, 0))
+        self.combo_fuente_filtro = ttk.Combobox(frame_filtro, state="readonly", width=5,
+                                                textvariable=self.var_fuente_filtro,
+                                                values=[self.etiqueta_canal(i) for i in range(CANALES_POR_DEFECTO)])
+        self.combo_fuente_filtro.pack(side=tk.LEFT, padx=5)
+        for texto, valores, variable in (("Type:", TIPOS_FILTRO, self.var_tipo_filtro),
+                                         ("Mode:", MODOS_FILTRO, self.var_modo_filtro)):
+            ttk.Label(frame_filtro, text=texto).pack(side=tk.LEFT, padx=(10, 0))
+            ttk.Combobox(frame_filtro, values=valores, state="readonly", width=10,
+                         textvariable=variable).pack(side=tk.LEFT, padx=5)
+        for texto, variable in (("f0 (Hz):", self.var_f0_filtro), ("Q:", self.var_q_filtro)):
+            ttk.Label(frame_filtro, text=texto).pack(side=tk.LEFT, padx=(10, 0))
+            entry = ttk.Entry(frame_filtro, textvariable=variable, width=10)
+            entry.pack(side=tk.LEFT, padx=5)
+            entry.bind("<Return>", self.aplicar_filtro)
+        ttk.Button(frame_filtro, text="Apply", command=self.aplicar_filtro).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_filtro, text="50 Hz hum", command=self.filtro_red).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_filtro, text="Clear", command=self.quitar_filtros).pack(side=tk.LEFT, padx=5)
+
+        # Frame para adquirir de un osciloscopio SCPI (o del simulador local)
+        frame_instrumento = ttk.LabelFrame(self.root, text="Instrument")
+        frame_instrumento.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
+        ttk.Label(frame_instrumento, text="Address:").pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Entry(frame_instrumento, textvariable=self.var_direccion, width=20).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(frame_instrumento, text="Acquire", variable=self.var_adquirir,
+                        command=self.toggle_adquisicion).pack(side=tk.LEFT, padx=5)
+        ttk.Label(frame_instrumento, textvariable=self.var_estado_adquisicion).pack(side=tk.LEFT, padx=5)
+
+        # Frame para superponer otras capturas: corrimiento de tiempo y color de cada una
+        frame_superposicion = ttk.LabelFrame(self.root, text="Overlay")
+        frame_superposicion.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
+        ttk.Button(frame_superposicion, text="Add...", command=self.agregar_superpuestas).pack(side=tk.LEFT, padx=5)
+        ttk.Label(frame_superposicion, text="Capture:").pack(side=tk.LEFT, padx=(10, 0))
+        self.combo_superpuesta = ttk.Combobox(frame_superposicion, state="readonly", width=28,
+                                              textvariable=self.var_superpuesta, values=[])
+        self.combo_superpuesta.pack(side=tk.LEFT, padx=5)
+        self.combo_superpuesta.bind("<<ComboboxSelected>>", self.seleccionar_superpuesta)
+        ttk.Label(frame_superposicion, text="Time offset (s):").pack(side=tk.LEFT, padx=(10, 0))
+        entry = ttk.Entry(frame_superposicion, textvariable=self.var_offset_superpuesta, width=10)
+        entry.pack(side=tk.LEFT, padx=5)
+        entry.bind("<Return>", self.aplicar_offset_superpuesta)
+        ttk.Button(frame_superposicion, text="Color...", command=self.elegir_color_superpuesta).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_superposicion, text="Remove", command=self.quitar_superpuesta).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_superposicion, text="Clear", command=self.limpiar_superposicion).pack(side=tk.LEFT, padx=5)
+
+        # Frame para el disparo por flanco: fuente, flanco, nivel, histéresis y modo
+        frame_disparo = ttk.LabelFrame(self.root, text="Trigger")
+        frame_disparo.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
+        ttk.Checkbutton(frame_disparo, text="Trigger", variable=self.var_disparo,
+                        command=self.redibujo.pedir).pack(side=tk.LEFT, padx=5)
+        ttk.Label(frame_disparo, text="Source:").pack(side=tk.LEFT, padx=(10, 0))
+        self.combo_fuente_disparo = ttk.Combobox(frame_disparo, state="readonly", width=5,
+                                                 textvariable=self.var_fuente_disparo,
+                                                 values=[self.etiqueta_canal(i) for i in range(CANALES_POR_DEFECTO)])
+        self.combo_fuente_disparo.pack(side=tk.LEFT, padx=5)
+        self.combo_fuente_disparo.bind("<<ComboboxSelected>>", self.redibujo.pedir)
+        for texto, valores, variable in (("Edge:", FLANCOS_DISPARO, self.var_flanco_disparo),
+                                         ("Mode:", MODOS_DISPARO, self.var_modo_disparo)):
+            ttk.Label(frame_disparo, text=texto).pack(side=tk.LEFT, padx=(10, 0))
+            combo = ttk.Combobox(frame_disparo, values=valores, state="readonly", width=9, textvariable=variable)
+            combo.pack(side=tk.LEFT, padx=5)
+            combo.bind("<<ComboboxSelected>>", self.redibujo.pedir)
+        for texto, variable in (("Level (V):", self.var_nivel_disparo),
+                                ("Hysteresis (V):", self.var_histeresis_disparo)):
+            ttk.Label(frame_disparo, text=texto).pack(side=tk.LEFT, padx=(10, 0))
+            entry = ttk.Entry(frame_disparo, textvariable=variable, width=8)
+            entry.pack(side=tk.LEFT, padx=5)
+            entry.bind("<Return>", self.redibujo.pedir)
+        ttk.Button(frame_disparo, text="50%", command=self.nivel_disparo_medio).pack(side=tk.LEFT, padx=5)
+        ttk.Label(frame_disparo, text="Decay:").pack(side=tk.LEFT, padx=(10, 0))
+        combo = ttk.Combobox(frame_disparo, values=[str(d) for d in DECAIMIENTOS_PERSISTENCIA], state="readonly",
+                             width=6, textvariable=self.var_decaimiento)
+        combo.pack(side=tk.LEFT, padx=5)
+        combo.bind("<<ComboboxSelected>>", self.redibujo.pedir)
+        ttk.Label(frame_disparo, textvariable=self.var_segmentos_disparo).pack(side=tk.LEFT, padx=5)
+
+        # Frame para el perfilado: overlay de tiempos y volcado de la traza
+        frame_perfil = ttk.LabelFrame(self.root, text="Profiling")
+        frame_perfil.pack(side=tk.TOP, fill=tk.X, padx=10, pady=5)
+        ttk.Checkbutton(frame_perfil, text="Timing overlay", variable=self.var_perfil,
+                        command=self.toggle_perfil).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_perfil, text="Save trace...", command=self.guardar_traza).pack(side=tk.LEFT, padx=5)
 
     def setup_plot(self):
         """Configura el área de trazado de Matplotlib."""
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
         ancho_in = OSCILLOSCOPE_SCREEN_WIDTH_CM / 2.54
         alto_in = OSCILLOSCOPE_SCREEN_HEIGHT_CM / 2.54
         self.fig, self.ax = plt.subplots(figsize=(ancho_in, alto_in))
@@ -360,8 +722,8 @@ class TC1ScopeApp:
         self.scl_toffset.set(0.0)
         self.offset_divisiones = 0.0
         self.scl_tension_offset.set(0.0)
-        self.offset_tension_ch1 = 0.0
-        self.offset_tension_ch2 = 0.0
+        if self.almacen is not None:
+            self.almacen.offsets[:] = 0.0
         self.canal_offset.set(1) # Canal de offset por defecto
 
         # Restablecer combobox de tiempo/div
@@ -375,183 +737,515 @@ class TC1ScopeApp:
         self.var_cursores.set(False)
 
         # Actualiza la gráfica con la nueva configuración
-        self.actualizar_grafica()
+        self.redibujo.pedir()
 
 
     def inicializar_volt_div(self):
         """
-        Destruye y recrea los comboboxes de Volt/div
-        según el número de columnas de datos en el CSV cargado.
+        Destruye y recrea los comboboxes de Volt/div (y los demás controles
+        por canal) según el número de canales del CSV cargado.
         """
-        # Elimina comboboxes existentes
-        for combo in self.volt_div_combos:
-            combo.destroy()
-        self.volt_div_vars, self.volt_div_combos = [], []
-
-        if self.df is None or self.df.shape[1] < 2:
+        if self.almacen is None or self.almacen.n_canales == 0:
             return # No hay datos o solo columna de tiempo
+        self.crear_controles_canales(self.almacen.n_canales)
+        # Cualquier canal (también los matemáticos) puede ser fuente del disparo
+        self.combo_fuente_disparo['values'] = [self.etiqueta_canal(i) for i in range(self.almacen.n_canales)]
+        if self.var_fuente_disparo.get() not in self.combo_fuente_disparo['values']:
+            self.var_fuente_disparo.set(self.etiqueta_canal(0))
+        # Sólo se filtran canales reales
+        self.combo_fuente_filtro['values'] = [self.etiqueta_canal(i) for i in range(self.almacen.n_reales)]
+        if self.var_fuente_filtro.get() not in self.combo_fuente_filtro['values']:
+            self.var_fuente_filtro.set(self.etiqueta_canal(0))
+        self.apply_theme() # Reaplica el tema a los nuevos comboboxes
+
+    def crear_controles_canales(self, n_canales):
+        """
+        Crea un combobox de Volt/div, un checkbox de visibilidad y los
+        Radiobuttons de offset y de ΔY para cada canal.
+        """
+        # Elimina controles existentes
+        for widget in self.volt_div_combos + self.chk_canales + self.radios_canales:
+            widget.destroy()
+        self.volt_div_vars, self.volt_div_combos = [], []
+        self.mostrar_canales, self.chk_canales, self.radios_canales = [], [], []
 
         opciones = [v[0] for v in self.voltajes_por_div]
-        # Crea un combobox por cada columna de datos (excluyendo la primera de tiempo)
-        for i in range(self.df.shape[1] - 1):
+        for i in range(n_canales):
             var = tk.StringVar(value="1 V/div") # Valor por defecto
             combo = ttk.Combobox(self.frame_voltdiv, values=opciones, state="readonly", width=12, textvariable=var)
             combo.pack(side=tk.LEFT, padx=5, pady=5)
-            combo.bind("<<ComboboxSelected>>", self.actualizar_grafica)
+            combo.bind("<<ComboboxSelected>>", self.redibujo.pedir)
             self.volt_div_vars.append(var)
             self.volt_div_combos.append(combo)
-        
-        self.apply_theme() # Reaplica el tema a los nuevos comboboxes
+
+            mostrar = tk.BooleanVar(value=True)
+            texto = f"View {self.etiqueta_canal(i)}" if self.es_matematico(i) else f"View Channel {i + 1}"
+            chk = tk.Checkbutton(self.frame_visibilidad, text=texto, variable=mostrar,
+                                 command=self.redibujo.pedir)
+            chk.pack(side=tk.LEFT)
+            self.mostrar_canales.append(mostrar)
+            self.chk_canales.append(chk)
+
+            self.radios_canales.append(ttk.Radiobutton(self.frame_canal_offset, text=self.etiqueta_canal(i), variable=self.canal_offset,
+                                                       value=i + 1, command=self.actualizar_slider_offset))
+            self.radios_canales.append(ttk.Radiobutton(self.frame_canal_cursores, text=self.etiqueta_canal(i), variable=self.canal_cursores,
+                                                       value=i + 1, command=self.actualizar_deltas_cursores))
+        for radio in self.radios_canales:
+            radio.pack(side="left")
+        if self.canal_offset.get() > n_canales:
+            self.canal_offset.set(1)
+        if self.canal_cursores.get() > n_canales:
+            self.canal_cursores.set(1)
+
+    def es_matematico(self, i):
+        return self.almacen is not None and self.almacen.es_matematico(i)
+
+    def etiqueta_canal(self, i):
+        """'Ch1', 'Ch2', ... para los canales reales y 'M1', 'M2', ... para los matemáticos."""
+        if self.es_matematico(i):
+            return f"M{i - self.almacen.n_reales + 1}"
+        return f"Ch{i + 1}"
+
+    def factor_volt_div(self, i):
+        """Volt/div elegido para el canal i (0-index)."""
+        volt_div_str = self.volt_div_vars[i].get() if i < len(self.volt_div_vars) else "1 V/div"
+        return dict(self.voltajes_por_div).get(volt_div_str, 1)
+
+    def sincronizar_canales(self):
+        """Copia Volt/div y visibilidad de los controles a los vectores del almacén."""
+        if self.almacen is None:
+            return
+        for i in range(self.almacen.n_canales):
+            self.almacen.escalas[i] = self.factor_volt_div(i)
+            self.almacen.visibles[i] = self.canal_visible(i)
 
     def dibujar_divisiones(self):
-        """Dibuja la cuadrícula principal y subdivisión simulando un osciloscopio."""
+        """
+        Dibuja la cuadrícula principal y subdivisión simulando un osciloscopio.
+        Se crea una sola vez por vista (tema/archivo) como dos LineCollection en
+        coordenadas de ejes, así no depende de los límites ni del tamaño.
+        """
+        from matplotlib.collections import LineCollection
         self.ax.grid(False) # Desactiva la cuadrícula automática de Matplotlib
+        for artista in self.artistas_reticula:
+            artista.remove()
+
+        principal, subdivision = segmentos_reticula(SCREEN_DIVISIONS_X, SCREEN_DIVISIONS_Y)
+        self.artistas_reticula = [
+            LineCollection(principal, transform=self.ax.transAxes, colors=self.current_colors["grid"],
+                           linestyles='-', linewidths=0.8, zorder=0),
+            LineCollection(subdivision, transform=self.ax.transAxes, colors=self.current_colors["grid"],
+                           linestyles=':', linewidths=0.4, zorder=0),
+        ]
+        for coleccion in self.artistas_reticula:
+            self.ax.add_collection(coleccion, autolim=False)
 
-        x_min, x_max = self.ax.get_xlim()
-        y_min, y_max = self.ax.get_ylim()
-
-        # Calcula el espaciado real de las divisiones basado en el rango visible
-        # y el número de divisiones deseadas
-        x_div_spacing = (x_max - x_min) / SCREEN_DIVISIONS_X
-        y_div_spacing = (y_max - y_min) / SCREEN_DIVISIONS_Y
-
-        # Líneas de la cuadrícula principal
-        for x_val in np.arange(x_min, x_max + x_div_spacing, x_div_spacing):
-            self.ax.axvline(x=x_val, color=self.current_colors["grid"], linestyle='-', linewidth=0.8, zorder=0)
-        for x_val in np.arange(x_min, x_max - x_div_spacing, -x_div_spacing):
-            self.ax.axvline(x=x_val, color=self.current_colors["grid"], linestyle='-', linewidth=0.8, zorder=0)
-
-        for y_val in np.arange(y_min, y_max + y_div_spacing, y_div_spacing):
-            self.ax.axhline(y=y_val, color=self.current_colors["grid"], linestyle='-', linewidth=0.8, zorder=0)
-        for y_val in np.arange(y_min, y_max - y_div_spacing, -y_div_spacing):
-            self.ax.axhline(y=y_val, color=self.current_colors["grid"], linestyle='-', linewidth=0.8, zorder=0)
-
-        # Líneas de la cuadrícula de subdivisión
-        # Cada división principal se divide en 5
-        x_sub_spacing = x_div_spacing / 5
-        y_sub_spacing = y_div_spacing / 5
-
-        for x_val in np.arange(x_min, x_max + x_sub_spacing, x_sub_spacing):
-            self.ax.axvline(x=x_val, color=self.current_colors["grid"], linestyle=':', linewidth=0.4, zorder=0)
-        for x_val in np.arange(x_min, x_max - x_sub_spacing, -x_sub_spacing):
-            self.ax.axvline(x=x_val, color=self.current_colors["grid"], linestyle=':', linewidth=0.4, zorder=0)
-
-        for y_val in np.arange(y_min, y_max + y_sub_spacing, y_sub_spacing):
-            self.ax.axhline(y=y_val, color=self.current_colors["grid"], linestyle=':', linewidth=0.4, zorder=0)
-        for y_val in np.arange(y_min, y_max - y_sub_spacing, -y_sub_spacing):
-            self.ax.axhline(y=y_val, color=self.current_colors["grid"], linestyle=':', linewidth=0.4, zorder=0)
-
-        # Ejes centrales (cero)
-        self.ax.axvline(x=0, color=self.current_colors["fg"], linewidth=1.0, zorder=1) # Eje Y en x=0
-        self.ax.axhline(y=0, color=self.current_colors["fg"], linewidth=1.0, zorder=1) # Eje X en y=0
+        # Ejes centrales (cero): en coordenadas de datos, se mueven con los límites
+        self.ejes_cero = [
+            self.ax.axvline(x=0, color=self.current_colors["fg"], linewidth=1.0, zorder=1), # Eje Y en x=0
+            self.ax.axhline(y=0, color=self.current_colors["fg"], linewidth=1.0, zorder=1), # Eje X en y=0
+        ]
         
         # Elimina los ticks por defecto de Matplotlib y usa los queridos
         self.ax.set_xticks([])
         self.ax.set_yticks([])
 
+    def artistas_dinamicos(self):
+        """Artistas que cambian en cada redibujo (todo lo que no es fondo)."""
+        artistas = self.lineas + self.artistas_cursor + self.ejes_cero + self.lineas_fft + self.marcadores_fft
+        if self.texto_fft is not None:
+            artistas.append(self.texto_fft)
+        if self.imagen_persistencia is not None:
+            artistas.append(self.imagen_persistencia)
+        if self.imagen_superposicion is not None:
+            artistas.append(self.imagen_superposicion)
+        if self.texto_perfil is not None:
+            artistas.append(self.texto_perfil)
+        if self.leyenda_canales is not None:
+            artistas.append(self.leyenda_canales)
+        return artistas
+
+    def capturar_fondo(self):
+        """
+        Renderiza una vez la figura sin los artistas dinámicos (fondo, cuadrícula,
+        bordes y etiquetas) y guarda el bitmap para reutilizarlo con blit.
+        """
+        dinamicos = [a for a in self.artistas_dinamicos() if a.get_visible()]
+        for artista in dinamicos:
+            artista.set_visible(False)
+        try:
+            self.canvas.draw()
+            self.fondo_estatico = self.canvas.copy_from_bbox(self.fig.bbox)
+        finally:
+            for artista in dinamicos:
+                artista.set_visible(True)
+
+    def refrescar_canvas(self):
+        """
+        Redibuja la vista de osciloscopio restaurando el fondo cacheado y
+        pintando sólo los artistas dinámicos. El fondo se vuelve a capturar
+        cuando cambian el tema, el tamaño o los textos de los ejes.
+        """
+        firma = (id(self.ax), self.fig.bbox.width, self.fig.bbox.height,
+                 self.ax.get_title(), self.ax.get_xlabel(), self.ax.get_ylabel())
+        if self.ax_fft is not None:
+            firma += (self.ax_fft.get_xlim(), self.ax_fft.get_ylim(), self.ax_fft.get_ylabel())
+        firma += (self.clave_leyenda_superpuestas,) # La leyenda de las superpuestas es parte del fondo
+        try:
+            if self.fondo_estatico is None or firma != self.firma_fondo:
+                # Render completo con Agg: sólo cuando cambia el fondo
+                with PERFIL.tramo("canvas.fondo"):
+                    self.capturar_fondo()
+                self.firma_fondo = firma
+            with PERFIL.tramo("canvas.artistas"):
+                self.canvas.restore_region(self.fondo_estatico)
+                for artista in sorted(self.artistas_dinamicos(), key=lambda a: a.get_zorder()):
+                    if artista.get_visible():
+                        self.ax.draw_artist(artista)
+            with PERFIL.tramo("canvas.blit"):
+                self.canvas.blit(self.fig.bbox)
+        except Exception:
+            # Si el backend no permite blit, redibujo completo
+            self.fondo_estatico = None
+            self.canvas.draw_idle()
 
     def abrir_csv(self):
         """
-        Abre un CSV, limpia nombres de columna de símbolos no ASCII (°, θ, etc.),
-        convierte todo a numérico descartando columnas vacías, detecta Bode
-        por regex y renombra sus columnas, o inicializa osciloscopio en caso contrario.
+        Pide el archivo (CSV o columnar) y lanza la carga en segundo plano
+        (cache binario, parser C, orden e índice de bloques, ver
+        carga_csv.cargar_captura).
+        La GUI sigue respondiendo; captura_cargada aplica el resultado.
         """
         ruta = filedialog.askopenfilename(filetypes=DEFAULT_FILE_TYPES)
         if not ruta:
             return
+        self.detener_seguimiento()
+        self.detener_adquisicion()
+        self.ruta_actual = ruta
+        self.trabajos.enviar("carga", PERFIL.envolver("carga", cargar_captura), ruta,
+                             al_terminar=self.captura_cargada, al_fallar=self.error_carga)
 
-        try:
-            # 1) detecta separador
-            with open(ruta, 'r', encoding='latin1', errors='ignore') as f:
-                primera = f.readline()
-            sep = '\t' if '\t' in primera else ','
-
-            # 2) lee CSV (saltando líneas malformadas)
-            df = pd.read_csv(ruta,
-                             sep=sep,
-                             encoding='latin1',
-                             engine='python',
-                             on_bad_lines='skip')
-
-            # 3) limpia caracteres: quitar todo lo que no sea ASCII
-            df.columns = [
-                re.sub(r'[^\x20-\x7E]+', '', col).strip()
-                for col in df.columns
-            ]
-
-            # 4) convertie todo a numérico (coerce), luego descarta columnas totalmente
-            df = df.apply(pd.to_numeric, errors='coerce')
-            df = df.loc[:, df.notna().any(axis=0)]
-            if df.shape[1] < 2:
-                messagebox.showwarning(
-                    "Formato Inválido",
-                    "No quedan al menos dos columnas numéricas tras la limpieza."
-                )
-                return
-
-            # 5) elimina filas con cualquier
-            df = df.dropna()
-            if df.empty:
-                messagebox.showwarning(
-                    "Archivo Vacío",
-                    "No quedan filas con datos completos tras la limpieza."
-                )
-                return
+    def captura_cargada(self, resultado):
+        """
+        Aplica en el hilo de Tk una captura ya cargada: detecta Bode por
+        regex y renombra sus columnas, o inicializa el osciloscopio.
+        """
+        nombres, datos, indice = resultado
+        if len(nombres) < 2:
+            messagebox.showwarning(
+                "Formato Inválido",
+                "No quedan al menos dos columnas numéricas tras la limpieza."
+            )
+            return
 
-            
-            self.df = df
+        # sin filas con datos completos
+        if datos.shape[1] == 0:
+            messagebox.showwarning(
+                "Archivo Vacío",
+                "No quedan filas con datos completos tras la limpieza."
+            )
+            return
 
+        try:
             # Detectar si es Bode por regex sobre nombres
-            freq = next((c for c in df.columns
-                         if re.search(r'frequency', c, re.I) and re.search(r'hz', c, re.I)), None)
-            gain = next((c for c in df.columns
-                         if re.search(r'gain', c, re.I) and re.search(r'db', c, re.I)), None)
-            phase = next((c for c in df.columns
-                          if re.search(r'phase', c, re.I)), None)
-
-            if freq and gain and phase:
+            bode = columnas_bode(nombres)
+            if bode:
                 self.is_bode = True
+                self.almacen = None
                 # renombra para plot_bode
-                self.df = df.rename(columns={
-                    freq: 'Frequency (Hz)',
-                    gain: 'Gain (dB)',
-                    phase: 'Phase ()'
-                })
+                self.df = tabla_bode(nombres, datos, bode)
             else:
-                self.is_bode = False
-                # Prepara la vista como un osciloscopio.
-                self.inicializar_volt_div()
-                self.actualizar_rango_y_global()
-                self.update_voltage_offset_range()
-                self.t_min = self.df.iloc[:, 0].min()
-                self.t_max = self.df.iloc[:, 0].max()
-                self.ajustar_escala_tiempo()
-
-            # 7) refresca la gráfica
-            self.actualizar_grafica()
-
-        except pd.errors.EmptyDataError:
-            messagebox.showwarning("Error de Lectura", "El archivo CSV está vacío.")
+                with PERFIL.tramo("carga.preparar"):
+                    self.is_bode = False
+                    self.df = None
+                    # Canales x muestras contiguo (vista de 'datos', sin copia)
+                    self.almacen = AlmacenCanales(datos[0], datos[1:], nombres[1:], indice)
+                    self.nombre_tiempo = nombres[0]
+                    self.restaurar_matematicos()
+                    # Prepara la vista como un osciloscopio.
+                    self.inicializar_volt_div()
+                    self.actualizar_rango_y_global()
+                    self.update_voltage_offset_range()
+                    self.t_min = self.almacen.tiempo[0]
+                    self.t_max = self.almacen.tiempo[-1]
+                    self.ajustar_escala_tiempo()
+            self.vista_construida = False
+
+            # refresca la gráfica
+            self.redibujo.ahora()
+
         except Exception as e:
+            self.error_carga(e)
+
+    def error_carga(self, error):
+        """Muestra el error de una carga que falló en segundo plano."""
+        from pandas.errors import EmptyDataError
+        if isinstance(error, EmptyDataError):
+            messagebox.showwarning("Error de Lectura", "El archivo CSV está vacío.")
+        else:
             messagebox.showerror(
                 "Error Inesperado",
-                f"Ocurrió un error al procesar el CSV:\n{e}"
+                f"Ocurrió un error al procesar el archivo:\n{error}"
             )
 
+    def exportar_captura(self):
+        """
+        Escribe la captura cargada, entera o sólo la ventana visible, en
+        Parquet, Feather, HDF5 o CSV según la extensión elegida. Se exportan
+        el tiempo y los canales reales (los matemáticos se recalculan al
+        abrirla); la escritura va en segundo plano.
+        """
+        if self.almacen is None:
+            messagebox.showwarning("Sin Captura", "Abra una captura de osciloscopio antes de exportar.")
+            return
+        i_ini, i_fin = 0, self.almacen.n_muestras
+        if hasattr(self, 'ax') and not self.var_disparo.get():
+            x_min, x_max = self.ax.get_xlim()
+            factor = FACTORES_UNIDAD_TIEMPO[self.unidad_tiempo]
+            i_ini, i_fin = self.almacen.ventana(x_min / factor, x_max / factor)
+        if (i_ini, i_fin) != (0, self.almacen.n_muestras) and i_fin - i_ini >= 2:
+            recortar = messagebox.askyesnocancel(
+                "Exportar", "¿Exportar sólo la ventana visible?\n(No: la captura completa)")
+            if recortar is None:
+                return
+            if not recortar:
+                i_ini, i_fin = 0, self.almacen.n_muestras
+        else:
+            i_ini, i_fin = 0, self.almacen.n_muestras
+        ruta = filedialog.asksaveasfilename(defaultextension=EXTENSIONES_PARQUET[0],
+                                            filetypes=EXPORT_FILE_TYPES)
+        if not ruta:
+            return
+
+        # Vistas del rango, sin copiar: escribir_captura recorre por bloques
+        n = self.almacen.n_reales
+        nombres = [self.nombre_tiempo] + self.almacen.nombres[:n]
+        filas = [self.almacen.tiempo[i_ini:i_fin]] + [self.almacen.datos[c, i_ini:i_fin] for c in range(n)]
+        self.trabajos.enviar(
+            "exportar", PERFIL.envolver("exportar", escribir_captura), ruta, nombres, filas,
+            al_terminar=lambda _: messagebox.showinfo(
+                "Exportación", f"Se exportaron {i_fin - i_ini:,} muestras a:\n{ruta}"),
+            al_fallar=lambda e: messagebox.showerror(
+                "Error al Exportar", f"No se pudo escribir el archivo:\n{e}"))
+
+    def actualizar_progreso(self, activos):
+        """Refleja en la barra el avance del trabajo en curso (lo llama GestorTrabajos)."""
+        # Las lecturas periódicas del modo seguimiento y las mediciones no mueven la barra
+        activos = [t for t in activos if t.nombre not in ("seguimiento", "mediciones", "espectro", "disparo")]
+        if activos:
+            self.barra_progreso['value'] = activos[0].fraccion
+            self.btn_cancelar.config(state=tk.NORMAL)
+        else:
+            self.barra_progreso['value'] = 0
+            self.btn_cancelar.config(state=tk.DISABLED)
+
+    def toggle_seguimiento(self):
+        """
+        Activa/desactiva el seguimiento del CSV abierto (o de uno que se
+        elige): se leen sólo las filas agregadas y se muestran en roll/sweep.
+        """
+        if not self.var_seguir.get():
+            self.detener_seguimiento()
+            return
+        ruta = self.ruta_actual or filedialog.askopenfilename(filetypes=CSV_FILE_TYPES)
+        if not ruta:
+            self.var_seguir.set(False)
+            return
+        if es_columnar(ruta):
+            self.var_seguir.set(False)
+            messagebox.showwarning("Formato Inválido",
+                                   "El modo seguimiento sólo sigue archivos CSV que se siguen escribiendo.")
+            return
+        try:
+            seguidor = SeguidorCSV(ruta)
+        except Exception as e:
+            self.var_seguir.set(False)
+            messagebox.showerror("Error Inesperado", f"No se puede seguir el archivo:\n{e}")
+            return
+        if len(seguidor.nombres) < 2 or columnas_bode(seguidor.nombres):
+            self.var_seguir.set(False)
+            messagebox.showwarning("Formato Inválido",
+                                   "El modo seguimiento necesita una captura de osciloscopio.")
+            return
+
+        # Una carga completa en curso quedaría pisada por el seguimiento
+        for trabajo in self.trabajos.activos:
+            if trabajo.nombre == "carga":
+                trabajo.cancelar()
+        self.detener_adquisicion()
+        self.ruta_actual = ruta
+        self.seguidor = seguidor
+        self.is_bode = False
+        self.df = None
+        self.almacen = None # Se crea con las primeras filas leídas
+        self.vista_construida = False
+        self.tick_seguimiento()
+
+    def tick_seguimiento(self):
+        """
+        Cada INTERVALO_SEGUIMIENTO_MS pide leer lo nuevo en segundo plano,
+        salvo que la lectura anterior siga en curso: así hay a lo sumo un
+        redibujo por intervalo aunque el archivo crezca más rápido.
+        """
+        self._tick_seguimiento = None
+        if self.seguidor is None:
+            return
+        if self.trabajo_seguimiento not in self.trabajos.activos:
+            self.trabajo_seguimiento = self.trabajos.enviar(
+                "seguimiento", self.seguidor.leer_nuevo,
+                al_terminar=self.datos_seguimiento, al_fallar=self.error_seguimiento)
+        self._tick_seguimiento = self.root.after(INTERVALO_SEGUIMIENTO_MS, self.tick_seguimiento)
+
+    def datos_seguimiento(self, resultado):
+        """Agrega al buffer circular las filas nuevas y redibuja (hilo de Tk)."""
+        if self.seguidor is None:
+            return
+        reinicio, datos, indice = resultado[2:]
+        if not self.seguidor.aplicar(resultado):
+            return # Sin filas nuevas: no hace falta redibujar
+        if datos.shape[1] < 2:
+            return
+        # 'datos' es un array nuevo por lectura: los trabajos que siguen con
+        # el anterior (mediciones, espectro, filtros) no lo ven cambiar
+        if self.almacen is None or reinicio:
+            self.almacen = AlmacenCanales(datos[0], datos[1:], self.seguidor.nombres[1:], indice)
+            self.nombre_tiempo = self.seguidor.nombres[0]
+            self.restaurar_matematicos()
+            self.t_origen_seguimiento = datos[0, 0]
+            self.inicializar_volt_div()
+            self.vista_construida = False
+        else:
+            # Mismo almacén: se conservan volt/div, offsets y visibilidad
+            self.almacen.actualizar_datos(datos[0], datos[1:], indice)
+            self.pedir_filtros()
+        self.actualizar_rango_y_global()
+        self.redibujo.pedir()
+
+    def error_seguimiento(self, error):
+        self.detener_seguimiento()
+        messagebox.showerror("Error Inesperado", f"Se detuvo el seguimiento del CSV:\n{error}")
+
+    def detener_seguimiento(self):
+        """Deja de seguir el archivo; la última vista queda en pantalla."""
+        self.seguidor = None
+        self.var_seguir.set(False)
+        if self.trabajo_seguimiento is not None:
+            self.trabajo_seguimiento.cancelar()
+            self.trabajo_seguimiento = None
+        if self._tick_seguimiento is not None:
+            self.root.after_cancel(self._tick_seguimiento)
+            self._tick_seguimiento = None
+
+    def toggle_adquisicion(self):
+        """
+        Activa/desactiva la adquisición continua del instrumento de la
+        dirección (ver adquisicion.Adquisidor): capturas single-shot una
+        tras otra en un hilo propio, que se muestran a medida que llegan.
+        """
+        if not self.var_adquirir.get():
+            self.detener_adquisicion()
+            return
+        from adquisicion import Adquisidor, parsear_direccion # asyncio sólo si se adquiere
+        try:
+            host, puerto = parsear_direccion(self.var_direccion.get())
+        except ValueError:
+            self.var_adquirir.set(False)
+            messagebox.showwarning("Dirección Inválida",
+                                   "La dirección del instrumento tiene que ser 'host' o 'host:puerto'.")
+            return
+
+        self.detener_seguimiento()
+        for trabajo in self.trabajos.activos:
+            if trabajo.nombre == "carga":
+                trabajo.cancelar()
+        self.ruta_actual = None
+        self.is_bode = False
+        self.df = None
+        self.almacen = None # Se crea con la primera captura
+        self.vista_construida = False
+        self.numero_adquisicion = 0
+        self.adquisidor = Adquisidor(host, puerto)
+        self.adquisidor.iniciar()
+        self.var_estado_adquisicion.set(f"Connecting to {host}:{puerto}...")
+        self.tick_adquisicion()
+
+    def tick_adquisicion(self):
+        """
+        Cada INTERVALO_SEGUIMIENTO_MS toma del anillo la última captura; las
+        que llegaron en el medio se saltean, así la vista nunca se atrasa
+        respecto del instrumento aunque adquiera más rápido de lo que se dibuja.
+        """
+        self._tick_adquisicion = None
+        adquisidor = self.adquisidor
+        if adquisidor is None:
+            return
+        ultima = adquisidor.anillo.ultima(self.numero_adquisicion)
+        if ultima is not None:
+            self.numero_adquisicion, datos, _, _ = ultima
+            with PERFIL.tramo("adquisicion.captura"):
+                self.captura_adquirida(datos, adquisidor.nombres)
+            self.var_estado_adquisicion.set(f"{adquisidor.capturas_por_segundo:.1f} captures/s, "
+                                            f"latency {adquisidor.latencia * 1000:.1f} ms")
+        elif not adquisidor.activo:
+            error = adquisidor.error
+            self.detener_adquisicion()
+            if error is not None:
+                messagebox.showerror("Error de Adquisición", f"Se detuvo la adquisición:\n{error}")
+            return
+        self._tick_adquisicion = self.root.after(INTERVALO_SEGUIMIENTO_MS, self.tick_adquisicion)
+
+    def captura_adquirida(self, datos, nombres):
+        """Muestra una captura del instrumento (tiempo en la fila 0), conservando volt/div y offsets."""
+        if self.almacen is None or self.almacen.n_reales != datos.shape[0] - 1:
+            self.almacen = AlmacenCanales(datos[0], datos[1:], nombres)
+            self.nombre_tiempo = "Time (s)"
+            self.restaurar_matematicos()
+            self.inicializar_volt_div()
+            self.actualizar_rango_y_global()
+            self.update_voltage_offset_range()
+            self.t_min = self.almacen.tiempo[0]
+            self.t_max = self.almacen.tiempo[-1]
+            self.ajustar_escala_tiempo()
+            self.vista_construida = False
+        else:
+            self.almacen.actualizar_datos(datos[0], datos[1:])
+            self.pedir_filtros()
+            self.actualizar_rango_y_global()
+        self.redibujo.pedir()
+
+    def detener_adquisicion(self):
+        """Deja de adquirir; la última captura queda en pantalla. No espera al hilo de red."""
+        if self.adquisidor is not None:
+            self.adquisidor.detener(esperar=False)
+            self.adquisidor = None
+        self.var_adquirir.set(False)
+        self.var_estado_adquisicion.set("")
+        if self._tick_adquisicion is not None:
+            self.root.after_cancel(self._tick_adquisicion)
+            self._tick_adquisicion = None
+
+    def cerrar(self):
+        """Cancela los trabajos pendientes antes de cerrar la ventana."""
+        self.detener_seguimiento()
+        self.detener_adquisicion()
+        self.trabajos.cerrar()
+        self.root.destroy()
+
     def actualizar_rango_y_global(self):
         """
         Calcula el rango global Y (min y max) de todos los datos
         sin considerar offset ni escala por división, para el auto-escalado inicial.
         """
-        if self.df is None:
+        if self.almacen is None:
             self.ymin_global = None
             self.ymax_global = None
             return
         
-        columnas_datos = self.df.columns[1:] 
-        if not columnas_datos.empty:
-            self.ymin_global = self.df[columnas_datos].min().min()
-            self.ymax_global = self.df[columnas_datos].max().max()
+        if self.almacen.n_canales:
+            # Sólo canales reales: no se evalúan los matemáticos sobre toda la captura
+            minimos, maximos = self.almacen.minmax(matematicos=False)
+            self.ymin_global = float(minimos.min())
+            self.ymax_global = float(maximos.max())
         else:
             self.ymin_global = None
             self.ymax_global = None
@@ -559,40 +1253,32 @@ class TC1ScopeApp:
 
     def on_slider_offset(self, valor_offset):
         """Maneja el evento del slider de offset de tiempo."""
-        if self.df is None:
+        if self.almacen is None:
             return
         # El valor del slider es el número de divisiones que se quiere mover.
         self.offset_divisiones = float(valor_offset)
-        self.actualizar_grafica()
+        self.redibujo.pedir()
         
 
     def reset_offset(self):
         self.var_offset_tiempo.set(0.0)
         self.offset_divisiones = 0.0
-        self.actualizar_grafica()
+        self.redibujo.pedir()
 
     def on_slider_offset_volt(self, valor_offset_entero):
         """Maneja el evento del slider de offset de tensión para el canal seleccionado."""
         # No hacemos nada si todavía estamos actualizando o no hay datos
-        if self._actualizando_slider or self.df is None:
+        if self._actualizando_slider or self.almacen is None:
             return
-        # Ignorar el slider si el canal está oculto
+        # Ignorar el slider si el canal está oculto (o no existe en la captura)
         canal = self.canal_offset.get()
-        if (canal == 1 and not self.mostrar_ch1.get()) or (canal == 2 and not self.mostrar_ch2.get()):
+        if canal > self.almacen.n_canales or not self.canal_visible(canal - 1):
             return
         self._actualizando_slider = True
         try:
-            # Obteniene factor de volt/div del canal
-            volt_div_str = self.volt_div_vars[canal-1].get() if canal-1 < len(self.volt_div_vars) else "1 V/div"
-            volt_div_value = dict(self.voltajes_por_div).get(volt_div_str, 1)
-            # Convertierte divisiones a volts
-            offset_real = float(valor_offset_entero) * volt_div_value
-            # Asigna al atributo correcto
-            if canal == 1:
-                self.offset_tension_ch1 = offset_real
-            else:
-                self.offset_tension_ch2 = offset_real
-            self.actualizar_grafica()
+            # Convertierte divisiones a volts con el volt/div del canal
+            self.almacen.offsets[canal - 1] = float(valor_offset_entero) * self.factor_volt_div(canal - 1)
+            self.redibujo.pedir()
         finally:
             self._actualizando_slider = False
     
@@ -605,64 +1291,35 @@ class TC1ScopeApp:
             return
         canal = self.canal_offset.get()
         # Si el canal está oculto, ponemos slider en cero y no hacemos nada
-        if (canal == 1 and not self.mostrar_ch1.get()) or (canal == 2 and not self.mostrar_ch2.get()):
+        if self.almacen is None or canal > self.almacen.n_canales or not self.canal_visible(canal - 1):
             self.scl_tension_offset.set(0)
             return
         self._actualizando_slider = True
         try:
             # Convertierte el offset real a divisiones
-            if canal == 1:
-                volt_div_str = self.volt_div_vars[0].get() if len(self.volt_div_vars) > 0 else "1 V/div"
-                factor = dict(self.voltajes_por_div).get(volt_div_str, 1)
-                self.scl_tension_offset.set(self.offset_tension_ch1 / factor if factor else 0)
-            else:
-                volt_div_str = self.volt_div_vars[1].get() if len(self.volt_div_vars) > 1 else "1 V/div"
-                factor = dict(self.voltajes_por_div).get(volt_div_str, 1)
-                self.scl_tension_offset.set(self.offset_tension_ch2 / factor if factor else 0)
+            factor = self.factor_volt_div(canal - 1)
+            self.scl_tension_offset.set(self.almacen.offsets[canal - 1] / factor if factor else 0)
         finally:
             self._actualizando_slider = False
             self.update_voltage_offset_range()
 
     def reset_offset_volt(self):
-        """Restablece los offsets de tensión de ambos canales a cero."""
+        """Restablece los offsets de tensión de todos los canales a cero."""
         self.scl_tension_offset.set(0) # Reinicia el slider visualmente
-        self.offset_tension_ch1 = 0.0
-        self.offset_tension_ch2 = 0.0
-        self.actualizar_grafica()
+        if self.almacen is not None:
+            self.almacen.offsets[:] = 0.0
+        self.redibujo.pedir()
 
     def ajustar_escala_tiempo(self):
         """
         Ajusta el combobox de tiempo/div para que muestre una escala
         apropiada para la duración total de los datos.
         """
-        if self.df is None:
+        if self.almacen is None:
             return
 
-        t_min_data = self.df.iloc[:, 0].min()
-        t_max_data = self.df.iloc[:, 0].max()
-        duracion_total = t_max_data - t_min_data
-
-        # Si el rango de tiempo es 0 (ej. un solo punto o datos inválidos)
-        if duracion_total == 0:
-            self.var_tiempo_div.set(self.tiempos_por_div[9][0]) # Default a 1ms/div
-            return
-
-        # Calcula el tiempo por división necesario para mostrar toda la duración en 10 divisiones
-        # Usamos 8 divisiones para que la señal no ocupe todo el ancho
-        tiempo_por_div_necesario = duracion_total / (SCREEN_DIVISIONS_X * 0.8) # Deja un poco de margen
-
-        # Encuentra la mejor escala de tiempo por división
-        best_match_idx = 0
-        min_diff = float('inf')
-        for i, (label, val) in enumerate(self.tiempos_por_div):
-            diff = abs(val - tiempo_por_div_necesario)
-            if diff < min_diff:
-                min_diff = diff
-                best_match_idx = i
-
-        self.var_tiempo_div.set(self.tiempos_por_div[best_match_idx][0])
-        
-
+        # El tiempo está ordenado: los extremos son la primera y la última muestra
+        self.var_tiempo_div.set(tiempo_div_automatico(self.almacen.tiempo[-1] - self.almacen.tiempo[0]))
         self.scl_toffset.config(from_=-SCREEN_DIVISIONS_X / 2, to=SCREEN_DIVISIONS_X / 2)
 
 
@@ -689,32 +1346,41 @@ class TC1ScopeApp:
             return valores, "V"
 
     def on_resize(self, event):
-        """Maneja el evento de redimensionamiento de la figura para actualizar la cuadrícula."""
-        self.actualizar_grafica()
+        """
+        Maneja el evento de redimensionamiento de la figura. Los tamaños
+        intermedios de un arrastre se juntan en un solo redibujo por cuadro.
+        """
+        self.redibujo.pedir()
 
 
-    def actualizar_grafica(self, event=None):
-        self.update_voltage_offset_range()
+    def construir_vista(self):
         """
-        Limpia y redibuja el gráfico, aplicando offsets, escalas,
-        y actualizando cursores y cuadrícula.
+        Crea una sola vez (por archivo, tema o vuelta desde Bode) los ejes, las
+        líneas de cada canal, la leyenda y los cursores. Después
+        actualizar_grafica sólo les cambia los datos y los límites.
         """
-        # Si es CSV de Bode, plot_bode()
-        if self.is_bode:
-            self.plot_bode()
-            return
-        # Guardado de las posiciones
-        abs_pos = self.obtener_posiciones_absolutas()
+        from matplotlib import colormaps
+        from matplotlib.colors import LogNorm
+        from imagen_pixeles import ImagenPixeles
         self.fig.clear()
-        self.ax = self.fig.add_subplot(1,1,1)
-
-        if not self.is_bode:
-            self.fig.clear()
+        if self.var_fft.get():
+            # Tiempo arriba, espectro abajo
+            self.ax, self.ax_fft = self.fig.subplots(2, 1, gridspec_kw={'height_ratios': [3, 2]})
+        else:
             self.ax = self.fig.add_subplot(1,1,1)
-        posiciones_relativas = self.obtener_posiciones_relativas()
-        
-        self.ax.clear()
-        self.lineas.clear() # Limpia las referencias a las líneas antiguas
+            self.ax_fft = None
+        self.lineas_fft = []
+        self.marcadores_fft = []
+        self.texto_fft = None
+        self.clave_espectro = None
+        self.espectro_actual = None
+        self.lineas = []
+        self.canales_lineas = []
+        self.leyenda_canales = None
+        self.artistas_reticula = []
+        self.fondo_estatico = None
+        for attr in ['cursor_x1', 'cursor_x2', 'cursor_y1', 'cursor_y2']:
+            setattr(self, attr, None)
 
         # Establece el color de fondo del eje y la figura
         self.fig.set_facecolor(self.current_colors["plot_bg"])
@@ -728,71 +1394,371 @@ class TC1ScopeApp:
         self.ax.xaxis.label.set_color(self.current_colors["fg"])
         self.ax.yaxis.label.set_color(self.current_colors["fg"])
         self.ax.title.set_color(self.current_colors["fg"])
-        
-        if self.df is None:
+
+        if self.almacen is not None and not self.is_bode:
+            # Una línea por canal; los canales ocultos sólo se marcan invisibles
+            colores = self.current_colors["line_colors"]
+            for i in range(self.almacen.n_canales):
+                linea, = self.ax.plot([], [], color=colores[i % len(colores)],
+                                      label=self.almacen.nombres[i])
+                self.lineas.append(linea)
+                self.canales_lineas.append(i)
+
+        # Imagen de la vista de persistencia (oculta fuera de ese modo); las cuentas
+        # en cero quedan transparentes para que se vea la cuadrícula
+        mapa = colormaps[self.current_colors["persistence_cmap"]].with_extremes(bad=(0, 0, 0, 0),
+                                                                                 under=(0, 0, 0, 0))
+        self.imagen_persistencia = self.ax.imshow(np.zeros((1, 1)), cmap=mapa, norm=LogNorm(1, RANGO_PERSISTENCIA),
+                                                  aspect='auto', origin='lower', interpolation='nearest',
+                                                  zorder=1, visible=False)
+        # Capturas superpuestas: una sola imagen RGBA para todas, debajo de los canales propios
+        self.imagen_superposicion = ImagenPixeles(self.ax, zorder=1.5, visible=False)
+        self.ax.add_artist(self.imagen_superposicion)
+        self.leyenda_superpuestas = None
+        self.clave_leyenda_superpuestas = None
+
+        # Cursores persistentes: se muestran/ocultan y se mueven con set_data
+        self.artistas_cursor = [
+            self.ax.axvline(0, color=self.current_colors["cursor_x"], linestyle='--', picker=5, visible=False),
+            self.ax.axvline(0, color=self.current_colors["cursor_x"], linestyle='--', picker=5, visible=False),
+            self.ax.axhline(0, color=self.current_colors["cursor_y"], linestyle='--', picker=5, visible=False),
+            self.ax.axhline(0, color=self.current_colors["cursor_y"], linestyle='--', picker=5, visible=False),
+        ]
+        if self.ax_fft is not None:
+            self.construir_espectro()
+        # Overlay del perfilado (fps, tramos del último cuadro, muestras)
+        self.texto_perfil = self.ax.text(0.01, 0.98, "", transform=self.ax.transAxes, ha='left', va='top',
+                                         color=self.current_colors["fg"], fontsize=7, family='monospace',
+                                         zorder=10, visible=self.var_perfil.get(),
+                                         bbox=dict(facecolor=self.current_colors["plot_bg"], alpha=0.8,
+                                                   edgecolor=self.current_colors["grid"]))
+        # Cuadrícula fija del osciloscopio (una vez por vista)
+        self.dibujar_divisiones()
+        # Evita que las líneas vacías/cursores muevan los límites
+        self.ax.set_autoscale_on(False)
+
+        # Re-decima las líneas cuando el zoom/pan de la toolbar cambia el rango X
+        self.ax.callbacks.connect('xlim_changed', self.on_xlim_cambiado)
+        self.ax.callbacks.connect('ylim_changed', self.on_ylim_cambiado)
+        self.vista_construida = True
+
+    def construir_espectro(self):
+        """
+        Artistas persistentes de la vista de espectro: una línea y una serie
+        de marcadores (fundamental y armónicos) por canal, y un texto con
+        pico y THD. Se actualizan con set_data igual que los del osciloscopio.
+        """
+        from matplotlib.ticker import EngFormatter
+        fg = self.current_colors["fg"]
+        self.ax_fft.set_facecolor(self.current_colors["plot_bg"])
+        for spine in self.ax_fft.spines.values():
+            spine.set_edgecolor(fg)
+        self.ax_fft.tick_params(axis='both', colors=fg)
+        self.ax_fft.xaxis.set_major_formatter(EngFormatter(unit="Hz"))
+        self.ax_fft.set_xlabel("Frequency", color=fg)
+        self.ax_fft.grid(True, linestyle='--', linewidth=0.5, color=self.current_colors["grid"])
+        colores = self.current_colors["line_colors"]
+        for i in range(self.almacen.n_canales if self.almacen is not None else 0):
+            color = colores[i % len(colores)]
+            linea, = self.ax_fft.plot([], [], color=color, linewidth=0.8)
+            marcas, = self.ax_fft.plot([], [], linestyle='none', marker='v', color=color, markersize=6)
+            self.lineas_fft.append(linea)
+            self.marcadores_fft.append(marcas)
+        self.texto_fft = self.ax_fft.text(0.99, 0.95, "", transform=self.ax_fft.transAxes,
+                                          ha='right', va='top', color=fg, fontsize=8, family='monospace')
+        self.ax_fft.set_autoscale_on(False)
+
+    def agregar_matematico(self, event=None):
+        """Define un canal matemático con la expresión y las constantes ingresadas."""
+        if self.almacen is None:
+            messagebox.showwarning("Sin Captura", "Cargue una captura antes de definir canales matemáticos.")
+            return
+        expresion = self.var_expresion.get().strip()
+        try:
+            constantes = parsear_constantes(self.var_constantes.get())
+            self.almacen.agregar_matematico(expresion, constantes)
+        except ValueError as e:
+            messagebox.showerror("Expresión Inválida", str(e))
+            return
+        self.definiciones_matematicas.append((expresion, constantes))
+        self.reconstruir_controles_canales()
+
+    def quitar_matematicos(self):
+        self.definiciones_matematicas = []
+        if self.almacen is not None and self.almacen.matematicos:
+            self.almacen.quitar_matematicos()
+            self.reconstruir_controles_canales()
+
+    def restaurar_matematicos(self):
+        """
+        Vuelve a definir en la captura nueva los canales matemáticos y los
+        filtros que sigan siendo válidos. Los filtros se filtran en segundo
+        plano (pedir_filtros); hasta entonces no se trazan.
+        """
+        validas = []
+        for expresion, constantes in self.definiciones_matematicas:
+            try:
+                self.almacen.agregar_matematico(expresion, constantes)
+                validas.append((expresion, constantes))
+            except ValueError:
+                pass # Usa un canal que la captura nueva no tiene
+        self.definiciones_matematicas = validas
+        validos = []
+        for parametros in self.definiciones_filtros:
+            try:
+                self.almacen.aplicar_filtro(CanalFiltrado(*parametros))
+                validos.append(parametros)
+            except (ValueError, ImportError):
+                pass # Canal que no existe o f0 por encima de fs/2 con este muestreo
+        self.definiciones_filtros = validos
+        self.pedir_filtros()
+
+    def aplicar_filtro(self, event=None):
+        """
+        Filtra el canal elegido con el tipo, f0, Q y modo ingresados. La fila
+        se filtra en segundo plano en un canal nuevo, que recién al terminar
+        reemplaza al filtro anterior de ese canal (o se agrega); si los
+        parámetros no cambiaron se usa lo ya filtrado.
+        """
+        if self.almacen is None:
+            messagebox.showwarning("Sin Captura", "Cargue una captura antes de filtrar un canal.")
+            return
+        try:
+            fuente = int(self.var_fuente_filtro.get().removeprefix("Ch")) - 1
+            f0, q = float(self.var_f0_filtro.get()), float(self.var_q_filtro.get())
+        except ValueError:
+            messagebox.showerror("Filtro Inválido", "La frecuencia y el Q tienen que ser números.")
+            return
+        try:
+            filtrado = CanalFiltrado(fuente, self.var_tipo_filtro.get(), f0, q, self.var_modo_filtro.get())
+            if not 0 <= fuente < self.almacen.n_reales:
+                raise ValueError(f"No existe el canal CH{fuente + 1}")
+            filtrado.secciones(self.almacen.tiempo) # f0 < fs/2 y scipy instalado, antes de filtrar
+        except ValueError as e:
+            messagebox.showerror("Filtro Inválido", str(e))
+            return
+        except ImportError as e:
+            messagebox.showerror("Falta una Dependencia", str(e))
+            return
+        anterior = self.almacen.filtro(fuente)
+        if anterior is not None and anterior.parametros == filtrado.parametros:
+            return
+        almacen, tiempo, datos = self.almacen, self.almacen.tiempo, self.almacen.datos
+        self.trabajos.enviar("filtro", PERFIL.envolver("filtro", filtrado.preparar), tiempo, datos,
+                             al_terminar=lambda _: self.filtro_listo(almacen, datos, filtrado),
+                             al_fallar=self.error_filtro)
+
+    def filtro_listo(self, almacen, datos, filtrado):
+        """Agrega o reemplaza el canal filtrado ya calculado (hilo de Tk)."""
+        if almacen is not self.almacen:
+            return # Se cargó otra captura mientras se filtraba
+        if almacen.datos is not datos:
+            filtrado.invalidar() # Llegaron muestras nuevas (seguimiento): se filtra de nuevo
+        almacen.aplicar_filtro(filtrado)
+        self.definiciones_filtros = [p for p in self.definiciones_filtros if p[0] != filtrado.fuente]
+        self.definiciones_filtros.append(filtrado.parametros)
+        self.reconstruir_controles_canales()
+        self.pedir_filtros()
+
+    def pedir_filtros(self):
+        """
+        Filtra en segundo plano los canales filtrados que no estén listos
+        (captura nueva o muestras nuevas), a lo sumo un trabajo a la vez:
+        si llegan muestras mientras tanto, se vuelve a pedir al terminar. El
+        de otra captura se cancela.
+        """
+        almacen = self.almacen
+        if almacen is None or not almacen.filtros_pendientes:
+            return
+        if self.trabajo_filtros in self.trabajos.activos and self.almacen_filtros is almacen:
+            return
+        self.trabajo_filtros = self.trabajos.enviar(
+            "filtros", PERFIL.envolver("filtro", almacen.preparar_filtros),
+            al_terminar=lambda _: self.filtros_listos(almacen), al_fallar=self.error_filtro)
+        self.almacen_filtros = almacen
+
+    def filtros_listos(self, almacen):
+        """Traza los canales recién filtrados (hilo de Tk)."""
+        if almacen is not self.almacen:
+            return # Se cargó otra captura mientras se filtraba
+        self.redibujo.pedir()
+        self.pedir_filtros()
+
+    def error_filtro(self, error):
+        messagebox.showerror("Error Inesperado", f"No se pudo filtrar el canal:\n{error}")
+
+    def filtro_red(self):
+        """Rechaza-banda de 50 Hz para sacar el zumbido de línea del canal elegido."""
+        self.var_tipo_filtro.set("notch")
+        self.var_f0_filtro.set(f"{F_RED:g}")
+        self.var_q_filtro.set(f"{Q_RED:g}")
+        self.aplicar_filtro()
+
+    def quitar_filtros(self):
+        self.definiciones_filtros = []
+        if self.almacen is not None and any(isinstance(d, CanalFiltrado) for d in self.almacen.matematicos):
+            self.almacen.quitar_filtros()
+            self.reconstruir_controles_canales()
+
+    def reconstruir_controles_canales(self):
+        """Recrea los controles por canal (cambió la cantidad) conservando volt/div y visibilidad."""
+        volt_div = [var.get() for var in self.volt_div_vars]
+        mostrar = [var.get() for var in self.mostrar_canales]
+        self.inicializar_volt_div()
+        for var, valor in zip(self.volt_div_vars, volt_div):
+            var.set(valor)
+        for var, valor in zip(self.mostrar_canales, mostrar):
+            var.set(valor)
+        self.vista_construida = False
+        self.redibujo.pedir()
+
+    def toggle_fft(self):
+        """Muestra/oculta la vista de espectro (cambia la disposición de los ejes)."""
+        self.vista_construida = False
+        self.redibujo.pedir()
+
+    def actualizar_leyenda(self, visibles):
+        """
+        Reconstruye la leyenda sólo si cambió el conjunto de canales visibles;
+        si no, actualiza el texto de cada entrada.
+        """
+        if self.leyenda_canales is not None and self.canales_leyenda == visibles:
+            for texto, linea in zip(self.leyenda_canales.get_texts(), [self.lineas[i] for i in visibles]):
+                texto.set_text(linea.get_label())
+            return
+        if self.leyenda_canales is not None:
+            self.leyenda_canales.remove()
+            self.leyenda_canales = None
+        self.canales_leyenda = visibles
+        if visibles:
+            self.leyenda_canales = self.ax.legend(
+                handles=[self.lineas[i] for i in visibles], loc='upper right',
+                facecolor=self.current_colors["plot_bg"], edgecolor=self.current_colors["fg"],
+                labelcolor=self.current_colors["fg"])
+
+    def actualizar_leyenda_superpuestas(self):
+        """
+        Leyenda aparte (abajo a la derecha) con el nombre y el color de cada
+        captura superpuesta. No es un artista dinámico: queda en el fondo
+        cacheado, que se vuelve a capturar sólo si cambian las capturas
+        (ver refrescar_canvas), así no suma al costo de cada cuadro.
+        """
+        from matplotlib.legend import Legend
+        from matplotlib.lines import Line2D
+        clave = ()
+        if self.imagen_superposicion.get_visible():
+            clave = tuple((captura.nombre, captura.color) for captura in self.superposicion.capturas)
+        if clave == self.clave_leyenda_superpuestas:
+            return
+        if self.leyenda_superpuestas is not None:
+            self.leyenda_superpuestas.remove()
+            self.leyenda_superpuestas = None
+        self.clave_leyenda_superpuestas = clave
+        if clave:
+            muestras = [Line2D([], [], color=color, alpha=ALFA_SUPERPOSICION) for _, color in clave]
+            self.leyenda_superpuestas = Legend(
+                self.ax, muestras, [nombre for nombre, _ in clave], loc='lower right',
+                facecolor=self.current_colors["plot_bg"], edgecolor=self.current_colors["fg"],
+                labelcolor=self.current_colors["fg"])
+            self.ax.add_artist(self.leyenda_superpuestas)
+
+    def canal_visible(self, i):
+        """Indica si el canal i (0-index) está habilitado por los checkboxes."""
+        if i < len(self.mostrar_canales):
+            return self.mostrar_canales[i].get()
+        return True
+
+    def actualizar_grafica(self, event=None):
+        self.update_voltage_offset_range()
+        """
+        Actualiza el gráfico aplicando offsets, escalas, cursores y cuadrícula.
+        Los artistas se crean en construir_vista; acá sólo se les cambian
+        datos, límites y etiquetas.
+        """
+        if not hasattr(self, 'canvas'):
+            self.iniciar_grafico() # Un redibujo pedido antes de que se mostrara la ventana
+        # Si es CSV de Bode, plot_bode()
+        if self.is_bode:
+            self.plot_bode()
+            return
+        with PERFIL.tramo("cuadro"):
+            if not self.vista_construida:
+                with PERFIL.tramo("vista.construir"):
+                    self.construir_vista()
+
+            self._ajustando_limites = True
+            try:
+                self.actualizar_vista()
+            finally:
+                self._ajustando_limites = False
+            if self.var_perfil.get() and self.texto_perfil is not None:
+                # Desglose del cuadro anterior (el actual todavía no terminó)
+                self.texto_perfil.set_text(PERFIL.resumen(self.redibujo.estadisticas()))
+            self.refrescar_canvas()
+        PERFIL.cuadro_terminado()
+
+    def actualizar_vista(self):
+        """Calcula la ventana visible y la vuelca en los artistas existentes."""
+        if self.almacen is None:
             self.ax.set_title("Load a CSV file", color=self.current_colors["fg"])
             self.ax.set_xlabel("Time", color=self.current_colors["fg"])
             self.ax.set_ylabel("Voltage", color=self.current_colors["fg"])
-            self.canvas.draw_idle()
             return
 
-        tiempo_col = self.df.columns[0]
-        tiempo_original = self.df[tiempo_col].values
+        # Volt/div y visibilidad de los controles a los vectores por canal
+        self.sincronizar_canales()
+        tiempo_original = self.almacen.tiempo
 
         tiempo_div_str = self.var_tiempo_div.get()
         tiempo_div_segs = dict(self.tiempos_por_div).get(tiempo_div_str, 1e-3) # Default a 1ms/div si no se encuentra
 
 
         center_time = tiempo_original[0] + (tiempo_original[-1] - tiempo_original[0]) / 2 + (self.offset_divisiones * tiempo_div_segs)
+        if self.seguidor is not None:
+            ancho_pantalla = SCREEN_DIVISIONS_X * tiempo_div_segs
+            if self.var_modo_seguimiento.get() == "sweep":
+                # Pantalla fija que salta un ancho completo cuando el trazo llega al borde derecho
+                pantallas = np.floor((tiempo_original[-1] - self.t_origen_seguimiento) / ancho_pantalla)
+                center_time = self.t_origen_seguimiento + (pantallas + 0.5) * ancho_pantalla
+            else:
+                # Roll: la última muestra siempre en el borde derecho
+                center_time = tiempo_original[-1] - ancho_pantalla / 2 + (self.offset_divisiones * tiempo_div_segs)
         
         t_start_visible = center_time - (SCREEN_DIVISIONS_X / 2 * tiempo_div_segs)
         t_end_visible = center_time + (SCREEN_DIVISIONS_X / 2 * tiempo_div_segs)
 
-        # Filtra los datos para la ventana de tiempo actual
-        idx_visible = np.where((tiempo_original >= t_start_visible) & (tiempo_original <= t_end_visible))[0]
+        # Filtra los datos para la ventana de tiempo actual (el tiempo está ordenado)
+        with PERFIL.tramo("vista.ventana"):
+            i_ini, i_fin = self.almacen.ventana(t_start_visible, t_end_visible)
 
-        if len(idx_visible) < 2:
+        if i_fin - i_ini < 2:
+            for linea in self.lineas:
+                linea.set_data([], [])
+            self.imagen_superposicion.set_visible(False)
             self.ax.set_title("No hay suficientes datos en el rango visible.", color=self.current_colors["fg"])
             self.ax.set_xlabel(f"Tiempo ({self.unidad_tiempo})", color=self.current_colors["fg"])
             self.ax.set_ylabel(f"Voltaje ({self.unidad_valor})", color=self.current_colors["fg"])
-            self.canvas.draw_idle()
             return
+        self.ax.set_title("")
         
-        tiempo_ventana = tiempo_original[idx_visible]
-        tiempo_ajustado, self.unidad_tiempo = self.ajustar_unidades_tiempo(tiempo_ventana)
+        # Los extremos de la ventana ordenada alcanzan para elegir la unidad
+        extremos = tiempo_original[[i_ini, i_fin - 1]]
+        if self.seguidor is not None and self.var_modo_seguimiento.get() == "sweep":
+            extremos = np.array([t_start_visible, t_end_visible]) # El trazo avanza sobre una pantalla fija
+        extremos_ajustados, self.unidad_tiempo = self.ajustar_unidades_tiempo(extremos)
         
         # Establecer límites X del gráfico
-        self.ax.set_xlim(tiempo_ajustado.min(), tiempo_ajustado.max())
-        
-        ymin_current_view = float('inf')
-        ymax_current_view = float('-inf')
+        self.ax.set_xlim(extremos_ajustados[0], extremos_ajustados[-1])
 
-        num_canales = len(self.df.columns) - 1
-        
         # Si no hay datos, o si todas las columnas de datos están vacías,
         # asegura un rango Y por defecto
-        if num_canales == 0:
+        if self.almacen.n_canales == 0:
             ymin_current_view = -5 # 1 V/div, 10 div = 10V. Cero en el medio.
             ymax_current_view = 5
         else:
-             # Calcula el rango visible de Y para cada canal y luego combinar
-            for i in range(num_canales):
-                datos_originales = self.df[self.df.columns[i + 1]].values[idx_visible]
-                
-                volt_div_str = (self.volt_div_vars[i].get() if i < len(self.volt_div_vars) else "1 V/div")
-                factor_volt_div = dict(self.voltajes_por_div).get(volt_div_str, 1)
-
-                datos_ajustados = datos_originales / factor_volt_div
-
-                # Aplica offset de tensión
-                if i == 0:
-                    datos_ajustados += self.offset_tension_ch1 / factor_volt_div # Offset está en V, se divide por factor_volt_div
-                elif i == 1:
-                    datos_ajustados += self.offset_tension_ch2 / factor_volt_div
-                
-                if datos_ajustados.size > 0:
-                    ymin_current_view = min(ymin_current_view, np.min(datos_ajustados))
-                    ymax_current_view = max(ymax_current_view, np.max(datos_ajustados))
+            # Rango visible de todos los canales (índice de bloques + escala/offset vectorizados)
+            with PERFIL.tramo("vista.rango_y"):
+                ymin_current_view, ymax_current_view = self.almacen.limites_pantalla(i_ini, i_fin)
 
             # Asegurar un rango Y mínimo si los datos son planos
             if ymax_current_view - ymin_current_view < 1e-9: # Si el rango es casi cero
@@ -802,11 +1768,8 @@ class TC1ScopeApp:
             
             # Ajustar los límites Y del eje para que los datos quepan dentro de 8 divisiones verticales
             # Se centra el rango y se asegura que el total sea 8 * volt_div_factor_medio
-            volt_div_factor_medio = 1 
-            if num_canales > 0 and len(self.volt_div_vars) > 0:
-                # Tomar el volt/div del primer canal como referencia para el escalado general Y
-                ref_volt_div_str = self.volt_div_vars[0].get()
-                volt_div_factor_medio = dict(self.voltajes_por_div).get(ref_volt_div_str, 1)
+            # Tomar el volt/div del primer canal como referencia para el escalado general Y
+            volt_div_factor_medio = self.factor_volt_div(0)
             
             y_range_target = SCREEN_DIVISIONS_Y * volt_div_factor_medio
 
@@ -815,58 +1778,463 @@ class TC1ScopeApp:
             self.ax.set_ylim(current_y_center - y_range_target / 2, current_y_center + y_range_target / 2)
 
 
-        # Dibujar las líneas de datos (sin duplicación y con visibilidad controlada)
-        colores = self.current_colors["line_colors"]
-
-        for i in range(num_canales):
-            # Chequea si el canal está habilitado por los checkboxes
-            if (i == 0 and not self.mostrar_ch1.get()) or (i == 1 and not self.mostrar_ch2.get()):
-                continue  # Salta canal oculto
-
-            datos_originales = self.df[self.df.columns[i + 1]].values[idx_visible]
-
+        # Actualiza las líneas de datos existentes (visibilidad controlada por los checkboxes)
+        parametros_disparo = self.parametros_disparo() if self.var_disparo.get() else None
+        with PERFIL.tramo("vista.trazado"):
+            if parametros_disparo is not None:
+                # Las superpuestas no tienen disparo propio: se ocultan en ese modo
+                self.imagen_superposicion.set_visible(False)
+                visibles = self.trazar_disparo(tiempo_div_segs, *parametros_disparo)
+            else:
+                self.var_segmentos_disparo.set("")
+                if self.imagen_persistencia is not None:
+                    self.imagen_persistencia.set_visible(False)
+                visibles = self.trazar_ventana(i_ini, i_fin)
+        for i in visibles:
             volt_div_str = self.volt_div_vars[i].get() if i < len(self.volt_div_vars) else "1 V/div"
-            factor_volt_div = dict(self.voltajes_por_div).get(volt_div_str, 1)
-            datos_ajustados = datos_originales / factor_volt_div
-
-            # Aplica offset según canal
-            if i == 0:
-                datos_ajustados += self.offset_tension_ch1 / factor_volt_div
-            elif i == 1:
-                datos_ajustados += self.offset_tension_ch2 / factor_volt_div
-
-            linea, = self.ax.plot(
-                tiempo_ajustado, datos_ajustados,
-                color=colores[i % len(colores)],
-                label=f"{self.df.columns[i + 1]} ({volt_div_str})"
-            )
-            self.lineas.append(linea)
-
-        
-
+            self.lineas[i].set_label(f"{self.almacen.nombres[i]} ({volt_div_str})")
 
         self.ax.set_xlabel(f"Time ({self.unidad_tiempo})", color=self.current_colors["fg"])
         self.ax.set_ylabel(f"Voltage ({self.unidad_valor})", color=self.current_colors["fg"])
-        if self.lineas:
-            self.ax.legend(facecolor=self.current_colors["plot_bg"], edgecolor=self.current_colors["fg"], labelcolor=self.current_colors["fg"])
-
-        # Redibuja las divisiones de la cuadrícula
-        self.dibujar_divisiones()
+        with PERFIL.tramo("vista.leyenda"):
+            self.actualizar_leyenda(visibles)
+            self.actualizar_leyenda_superpuestas()
+        with PERFIL.tramo("vista.analisis"):
+            self.pedir_mediciones(i_ini, i_fin, visibles)
+            if self.ax_fft is not None:
+                self.pedir_espectro(i_ini, i_fin, visibles)
 
         # Actualiza cursores si están activados
+        abs_pos = self.obtener_posiciones_absolutas()
         if self.var_cursores.get() and abs_pos:
             self.crear_cursores_absoluto(abs_pos)
         elif self.var_cursores.get():
             self.crear_cursores()  # posiciones por defecto
         else:
-            # remover cursores
+            # oculta los cursores
+            for cur in self.artistas_cursor:
+                cur.set_visible(False)
             for attr in ['cursor_x1','cursor_x2','cursor_y1','cursor_y2']:
-                cur = getattr(self, attr)
-                if cur and cur in self.ax.lines:
-                    self.ax.lines.remove(cur)
-                    setattr(self, attr, None)
+                setattr(self, attr, None)
+
+
+    def pedir_mediciones(self, i_ini, i_fin, visibles):
+        """
+        Mediciones de los canales visibles sobre la ventana (o toda la
+        captura). Si ya están en el cache del almacén se muestran en el
+        acto; si no, se calculan en segundo plano y un pedido nuevo (otro
+        cuadro del slider) cancela al anterior.
+        """
+        if not self.var_mediciones.get():
+            self.mostrar_mediciones({})
+            return
+        if self.var_alcance_mediciones.get() == "full":
+            i_ini, i_fin = 0, self.almacen.n_muestras
+        guardadas = self.almacen.mediciones_guardadas(visibles, i_ini, i_fin)
+        if guardadas is not None:
+            self.mostrar_mediciones(guardadas)
+            return
+        almacen = self.almacen
+        self.trabajos.enviar("mediciones", almacen.mediciones, visibles, i_ini, i_fin,
+                             al_terminar=lambda resultado: self.mostrar_mediciones(resultado, almacen))
+
+    def mostrar_mediciones(self, resultado, almacen=None):
+        """Vuelca en la tabla las mediciones {canal: {medición: valor}}."""
+        if almacen is not None and almacen is not self.almacen:
+            return # Se cargó otra captura mientras se medía
+        self.tabla_mediciones.delete(*self.tabla_mediciones.get_children())
+        for canal, valores in resultado.items():
+            self.tabla_mediciones.insert("", tk.END, text=self.almacen.nombres[canal],
+                                         values=[formatear_medicion(m, valores[m]) for m in MEDICIONES])
+
+    def pedir_espectro(self, i_ini, i_fin, visibles):
+        """
+        Pide el espectro de los canales visibles en segundo plano. Si los
+        parámetros no cambiaron (p. ej. sólo se movió un cursor) se reusa
+        el último; así sólo la escala dBV/lineal se aplica en el acto.
+        """
+        if self.var_alcance_fft.get() == "full":
+            i_ini, i_fin = 0, self.almacen.n_muestras
+        ventana, promedios = self.var_ventana_fft.get(), int(self.var_promedios_fft.get())
+        # Con la versión de los datos: en seguimiento/adquisición el almacén es el mismo con otras muestras
+        clave = (id(self.almacen), self.almacen.version_datos, tuple(visibles), i_ini, i_fin, ventana, promedios)
+        if clave == self.clave_espectro:
+            if self.espectro_actual is not None:
+                self.mostrar_espectro(self.espectro_actual, redibujar=False)
+            return
+        self.clave_espectro = clave
+        if not visibles:
+            self.mostrar_espectro(None, redibujar=False)
+            return
+        almacen = self.almacen
+        self.trabajos.enviar(
+            "espectro", almacen.espectro, visibles, i_ini, i_fin, ventana, promedios,
+            al_terminar=lambda resultado: self.espectro_listo(resultado + (visibles,), almacen))
+
+    def espectro_listo(self, resultado, almacen):
+        """Guarda y muestra el espectro calculado (hilo de Tk)."""
+        if almacen is not self.almacen or self.ax_fft is None:
+            return # Cambió la captura o se cerró la vista de espectro mientras se calculaba
+        self.espectro_actual = resultado
+        self.mostrar_espectro(resultado)
+
+    def mostrar_espectro(self, resultado, redibujar=True):
+        """
+        Vuelca el espectro en las líneas (decimado por columna de píxel con
+        min/max, que conserva los picos) y marca fundamental y armónicos.
+        Los límites se redondean para que el fondo cacheado no cambie en
+        cada cuadro.
+        """
+        for linea, marcas in zip(self.lineas_fft, self.marcadores_fft):
+            linea.set_visible(False)
+            marcas.set_visible(False)
+        if resultado is None:
+            self.texto_fft.set_text("")
+            if redibujar:
+                self.refrescar_canvas()
+            return
+        frecuencias, amplitudes, armonicos, canales = resultado
+        escala = self.var_escala_fft.get()
+        valores = a_escala(amplitudes, escala)
+        ancho = self.ancho_ejes_px()
+        textos = []
+        for fila, i in enumerate(canales):
+            f, v = decimar_minmax(frecuencias, valores[fila], ancho)
+            self.lineas_fft[i].set_data(f, v)
+            self.lineas_fft[i].set_visible(True)
+            f_arm, v_arm, thd = armonicos[fila]
+            self.marcadores_fft[i].set_data(f_arm, a_escala(v_arm, escala))
+            self.marcadores_fft[i].set_visible(True)
+            if len(f_arm):
+                if escala == "dBV":
+                    pico = f"{a_escala(v_arm[0], escala):.1f} dBV"
+                else:
+                    pico = formatear_medicion('Vrms', v_arm[0])
+                textos.append(f"{self.almacen.nombres[i]}: {formatear_medicion('Freq', f_arm[0])}, "
+                              f"{pico}, THD {formatear_medicion('THD', thd)}")
+        self.texto_fft.set_text("\n".join(textos))
+        y_min, y_max = limites_espectro(valores, escala)
+        self.ax_fft.set_xlim(0, frecuencias[-1])
+        self.ax_fft.set_ylim(y_min, y_max)
+        self.ax_fft.set_ylabel("Amplitude (dBV)" if escala == "dBV" else "Amplitude (V rms)",
+                               color=self.current_colors["fg"])
+        if redibujar:
+            self.refrescar_canvas()
+
+    def ancho_ejes_px(self):
+        """Ancho en píxeles del área de trazado, usado como resolución de la decimación."""
+        try:
+            return max(int(self.ax.get_window_extent().width), 1)
+        except Exception:
+            return int(self.fig.get_figwidth() * self.fig.dpi)
+
+    def trazar_ventana(self, i_ini, i_fin):
+        """
+        Vuelca en las líneas los canales visibles entre las muestras
+        [i_ini, i_fin): una sola decimación y una sola transformación
+        (volt/div + offset) para todos los canales. Devuelve los visibles.
+        """
+        visibles = [int(i) for i in np.flatnonzero(self.almacen.visibles)]
+        for linea, i in zip(self.lineas, self.canales_lineas):
+            linea.set_visible(i in visibles)
+        reales = [i for i in visibles if not self.almacen.es_matematico(i)]
+        factor = FACTORES_UNIDAD_TIEMPO[self.unidad_tiempo]
+        if reales:
+            # Con el cache binario son memmaps: sólo se lee la ventana visible
+            tiempo, valores = self.almacen.serie_pantalla(i_ini, i_fin, self.ancho_ejes_px(),
+                                                          self.var_decimacion.get(), reales)
+            tiempo = tiempo * factor
+            for fila, i in enumerate(reales):
+                self.lineas[i].set_data(tiempo if tiempo.ndim == 1 else tiempo[fila], valores[fila])
+            if PERFIL.activo:
+                PERFIL.contar("muestras", i_fin - i_ini)
+                PERFIL.contar("puntos", valores.size)
+        # Los canales matemáticos se evalúan sólo sobre la ventana (y quedan en cache).
+        # Un filtrado que se está filtrando conserva el trazo anterior (o ninguno)
+        for i in visibles[len(reales):]:
+            if not self.almacen.derivado_listo(i):
+                continue
+            tiempo, valores = self.almacen.serie_matematica(i, i_ini, i_fin, self.ancho_ejes_px(),
+                                                            self.var_decimacion.get())
+            self.lineas[i].set_data(tiempo * factor, valores)
+        self.trazar_superposicion(reales)
+        return visibles
+
+    def alto_ejes_px(self):
+        """Alto en píxeles del área de trazado."""
+        try:
+            return max(int(self.ax.get_window_extent().height), 1)
+        except Exception:
+            return int(self.fig.get_figheight() * self.fig.dpi)
+
+    def trazar_superposicion(self, canales):
+        """
+        Alinea las capturas superpuestas en la base de tiempo común del eje
+        X visible (sólo esa ventana de cada una, ver superposicion) y las
+        pinta en la imagen: una columna de píxeles por punto, así el costo
+        no crece con las muestras de cada captura y son un solo artista
+        para todas.
+        """
+        from matplotlib.colors import to_rgba
+        imagen = self.imagen_superposicion
+        if not self.superposicion.capturas or not canales:
+            imagen.set_visible(False)
+            return
+        factor = FACTORES_UNIDAD_TIEMPO[self.unidad_tiempo]
+        x_min, x_max = self.ax.get_xlim()
+        y_min, y_max = self.ax.get_ylim()
+        with PERFIL.tramo("vista.superposicion"):
+            series = self.superposicion.series(x_min / factor, x_max / factor, self.ancho_ejes_px(),
+                                               canales, self.almacen.escalas, self.almacen.offsets)
+            trazas, colores = [], []
+            for captura, _, valores in series:
+                trazas.extend(valores)
+                colores.extend([to_rgba(captura.color, ALFA_SUPERPOSICION)] * len(valores))
+            if not trazas:
+                imagen.set_visible(False) # Ninguna superpuesta tiene los canales visibles
+                return
+            imagen.set_data(rasterizar(trazas, colores, y_min, y_max, self.alto_ejes_px()))
+            imagen.set_visible(True)
+
+    def agregar_superpuestas(self):
+        """
+        Pide una o más capturas y las carga en segundo plano para
+        superponerlas a la principal. Cada archivo se lee una sola vez: si
+        ya está superpuesto o cargándose, la captura nueva comparte sus
+        muestras.
+        """
+        if self.almacen is None or self.is_bode:
+            messagebox.showwarning("Sin Captura", "Abra una captura de osciloscopio antes de superponer otras.")
+            return
+        for ruta in filedialog.askopenfilenames(filetypes=DEFAULT_FILE_TYPES):
+            almacen = self.superposicion.almacen(ruta)
+            if almacen is not None:
+                self.superpuesta_cargada(ruta, almacen)
+                continue
+            clave = os.path.realpath(ruta)
+            if clave in self.superpuestas_pendientes:
+                self.superpuestas_pendientes[clave] += 1
+                continue
+            self.superpuestas_pendientes[clave] = 1
+            # Un nombre por archivo: el gestor cancela el trabajo anterior con el mismo nombre
+            self.trabajos.enviar(f"superposicion {clave}", PERFIL.envolver("carga", cargar_superpuesta), ruta,
+                                 al_terminar=lambda almacen, ruta=ruta: self.superpuesta_cargada(ruta, almacen),
+                                 al_fallar=lambda e, ruta=ruta: self.error_superpuesta(ruta, e))
+
+    def superpuesta_cargada(self, ruta, almacen):
+        """Agrega (hilo de Tk) las capturas pedidas de un archivo ya cargado y deja seleccionada la última."""
+        for _ in range(self.superpuestas_pendientes.pop(os.path.realpath(ruta), 1)):
+            try:
+                self.superposicion.agregar(ruta, almacen)
+            except ValueError as e:
+                messagebox.showwarning("Superposición", str(e))
+                break
+        self.actualizar_lista_superpuestas(len(self.superposicion) - 1 if self.superposicion.capturas else None)
+        self.redibujo.pedir()
+
+    def error_superpuesta(self, ruta, error):
+        self.superpuestas_pendientes.pop(os.path.realpath(ruta), None)
+        messagebox.showerror("Error al Superponer", f"No se pudo cargar {os.path.basename(ruta)}:\n{error}")
+
+    def actualizar_lista_superpuestas(self, seleccion=None):
+        """Carga el combobox con las capturas superpuestas y selecciona la indicada."""
+        etiquetas = [f"{k + 1}: {captura.nombre}" for k, captura in enumerate(self.superposicion.capturas)]
+        self.combo_superpuesta['values'] = etiquetas
+        if seleccion is None or not etiquetas:
+            self.var_superpuesta.set("")
+            self.var_offset_superpuesta.set("0")
+            return
+        self.var_superpuesta.set(etiquetas[seleccion])
+        self.seleccionar_superpuesta()
+
+    def superpuesta_elegida(self):
+        """Captura superpuesta elegida en el combobox, o None."""
+        etiqueta = self.var_superpuesta.get()
+        if not etiqueta:
+            return None
+        return self.superposicion.capturas[int(etiqueta.split(":")[0]) - 1]
+
+    def seleccionar_superpuesta(self, event=None):
+        captura = self.superpuesta_elegida()
+        if captura is not None:
+            self.var_offset_superpuesta.set(f"{captura.offset:g}")
+
+    def aplicar_offset_superpuesta(self, event=None):
+        """Corre en el tiempo la captura elegida (los datos no cambian, sólo su alineación)."""
+        captura = self.superpuesta_elegida()
+        if captura is None:
+            return
+        try:
+            captura.offset = float(self.var_offset_superpuesta.get())
+        except ValueError:
+            messagebox.showerror("Offset Inválido", "El corrimiento de tiempo debe ser un número (en s).")
+            return
+        self.redibujo.pedir()
+
+    def elegir_color_superpuesta(self):
+        from tkinter import colorchooser
+        captura = self.superpuesta_elegida()
+        if captura is None:
+            return
+        _, color = colorchooser.askcolor(captura.color, title="Overlay color")
+        if color:
+            captura.color = color
+            self.redibujo.pedir()
+
+    def quitar_superpuesta(self):
+        captura = self.superpuesta_elegida()
+        if captura is None:
+            return
+        self.superposicion.quitar(captura)
+        self.actualizar_lista_superpuestas(0 if self.superposicion.capturas else None)
+        self.redibujo.pedir()
+
+    def limpiar_superposicion(self):
+        self.superposicion.limpiar()
+        self.actualizar_lista_superpuestas()
+        self.redibujo.pedir()
+
+    def parametros_disparo(self):
+        """(nivel, histéresis) ingresados; si no son números avisa, apaga el disparo y devuelve None."""
+        try:
+            return float(self.var_nivel_disparo.get()), abs(float(self.var_histeresis_disparo.get()))
+        except ValueError:
+            messagebox.showerror("Nivel Inválido", "El nivel y la histéresis del disparo deben ser números.")
+            self.var_disparo.set(False)
+            return None
+
+    def trazar_disparo(self, tiempo_div_segs, nivel, histeresis):
+        """
+        Modo disparo: el eje de tiempo es relativo al disparo (t = 0 en el
+        centro de la pantalla, corrido por el offset de tiempo) y cada canal
+        visible muestra el promedio o la envolvente de los segmentos; en
+        persistencia, una sola imagen con el histograma de todos. El
+        cálculo va en segundo plano; mientras tanto queda el último
+        resultado, que sigue bien ubicado porque su tiempo es relativo.
+        Devuelve los canales visibles.
+        """
+        visibles = [int(i) for i in np.flatnonzero(self.almacen.visibles)]
+        centro = self.offset_divisiones * tiempo_div_segs
+        t_ini = centro - SCREEN_DIVISIONS_X / 2 * tiempo_div_segs
+        t_fin = centro + SCREEN_DIVISIONS_X / 2 * tiempo_div_segs
+        extremos_ajustados, self.unidad_tiempo = self.ajustar_unidades_tiempo(np.array([t_ini, t_fin]))
+        self.ax.set_xlim(extremos_ajustados[0], extremos_ajustados[-1])
+        fuente = self.combo_fuente_disparo['values'].index(self.var_fuente_disparo.get())
+        modo = self.var_modo_disparo.get()
+
+        base = (fuente, nivel, self.var_flanco_disparo.get(), histeresis, t_ini, t_fin)
+        # Con la versión de los datos: seguimiento, adquisición o un filtro reemplazado cambian las muestras
+        clave = (id(self.almacen), self.almacen.version_datos, modo, tuple(visibles)) + base
+        if modo == "persistence":
+            # El histograma depende también del rango vertical, del tamaño en píxeles y del volt/div
+            alto = max(int(self.ax.get_window_extent().height), 1)
+            extra = self.ax.get_ylim() + ((alto, self.ancho_ejes_px()), float(self.var_decaimiento.get()))
+            parametros = base + (visibles,) + extra
+            clave += extra + (tuple(self.almacen.escalas[visibles]), tuple(self.almacen.offsets[visibles]))
+            funcion = self.almacen.persistencia
+        else:
+            parametros = base + (modo, visibles)
+            funcion = self.almacen.disparo
+        if clave != self.clave_disparo and visibles:
+            self.clave_disparo = clave
+            almacen = self.almacen
+            self.trabajos.enviar(
+                "disparo", funcion, *parametros,
+                al_terminar=lambda resultado: self.disparo_listo((id(almacen), modo, visibles) + resultado, almacen))
+
+        for linea in self.lineas:
+            linea.set_visible(False)
+        self.imagen_persistencia.set_visible(False)
+        if self.disparo_actual is None or self.disparo_actual[0] != id(self.almacen):
+            self.var_segmentos_disparo.set("Waiting for trigger...")
+            return visibles
+        _, modo_actual, canales, tiempo, valores, n_segmentos = self.disparo_actual
+        self.var_segmentos_disparo.set(f"{n_segmentos} segments")
+        factor = FACTORES_UNIDAD_TIEMPO[self.unidad_tiempo]
+        if modo_actual == "persistence":
+            (t0, t1), (y_min, y_max) = tiempo, self.ax.get_ylim()
+            if valores.size and n_segmentos:
+                self.imagen_persistencia.set_data(valores)
+                self.imagen_persistencia.set_extent((t0 * factor, t1 * factor, y_min, y_max))
+                # Escala logarítmica fija respecto del máximo: lo vacío queda transparente
+                maximo = float(valores.max())
+                self.imagen_persistencia.set_clim(maximo / RANGO_PERSISTENCIA, maximo)
+                self.imagen_persistencia.set_visible(True)
+            return visibles
+        for fila, i in enumerate(canales):
+            if i not in visibles or not len(tiempo):
+                continue
+            if modo_actual == "average":
+                t, v = decimar(tiempo, valores[fila], self.ancho_ejes_px(), self.var_decimacion.get())
+            else:
+                # Envolvente: mínimo y máximo intercalados, decimados conservando los extremos
+                t, v = decimar_minmax(np.repeat(tiempo, 2), valores[fila].T.ravel(), 2 * self.ancho_ejes_px())
+            self.lineas[i].set_data(t * factor, (v + self.almacen.offsets[i]) / self.almacen.escalas[i])
+            self.lineas[i].set_visible(True)
+        return visibles
+
+    def disparo_listo(self, resultado, almacen):
+        """Guarda el promedio calculado y pide un redibujo para mostrarlo (hilo de Tk)."""
+        if almacen is not self.almacen:
+            return
+        self.disparo_actual = resultado
+        self.redibujo.pedir()
+
+    def nivel_disparo_medio(self):
+        """Pone el nivel de disparo en la mitad del rango del canal fuente (y la histéresis en el 5 %)."""
+        if self.almacen is None:
+            return
+        fuente = self.combo_fuente_disparo['values'].index(self.var_fuente_disparo.get())
+        # Sólo el canal fuente: no se evalúan los demás matemáticos/filtrados sobre toda la captura
+        minimo, maximo = self.almacen.minmax_canal(fuente)
+        rango = maximo - minimo
+        self.var_nivel_disparo.set(f"{minimo + rango / 2:.4g}")
+        self.var_histeresis_disparo.set(f"{rango * 0.05:.3g}")
+        self.redibujo.pedir()
+
+    def toggle_perfil(self):
+        """Activa/desactiva el perfilado y su overlay; al desactivarlo se descarta la traza."""
+        PERFIL.activo = self.var_perfil.get()
+        if not PERFIL.activo:
+            PERFIL.limpiar()
+        if self.texto_perfil is not None:
+            self.texto_perfil.set_visible(PERFIL.activo)
+        self.redibujo.pedir()
+
+    def guardar_traza(self):
+        """Guarda los tramos medidos como traza de Chrome (.json) o JSON lines (.jsonl)."""
+        if not PERFIL.eventos:
+            messagebox.showinfo("Sin Datos", "Active el perfilado y use la vista antes de guardar la traza.")
+            return
+        ruta = filedialog.asksaveasfilename(defaultextension=".json",
+                                            filetypes=[("Chrome trace", "*.json"), ("JSON lines", "*.jsonl")])
+        if ruta:
+            PERFIL.guardar(ruta)
+
+    def on_xlim_cambiado(self, ax):
+        """
+        Recalcula la decimación cuando la toolbar hace zoom/pan, así al
+        acercarse se ven los datos con resolución completa.
+        """
+        if (self._ajustando_limites or self.almacen is None or self.is_bode or not self.lineas
+                or self.var_disparo.get()):
+            return
+        x_min, x_max = ax.get_xlim()
+        factor = FACTORES_UNIDAD_TIEMPO[self.unidad_tiempo]
+        i_ini, i_fin = self.almacen.ventana(x_min / factor, x_max / factor)
+        # Una muestra de margen a cada lado para que el trazo llegue a los bordes
+        i_ini = max(i_ini - 1, 0)
+        i_fin = min(i_fin + 1, self.almacen.n_muestras)
+        self.trazar_ventana(i_ini, i_fin)
         self.canvas.draw_idle()
 
+    def on_ylim_cambiado(self, ax):
+        """La imagen de las superpuestas está en píxeles: se repinta si la toolbar cambia el rango Y."""
+        if (self._ajustando_limites or self.almacen is None or self.is_bode or not self.superposicion.capturas
+                or self.var_disparo.get()):
+            return
+        self.trazar_superposicion([int(i) for i in np.flatnonzero(self.almacen.visibles[:self.almacen.n_reales])])
+        self.canvas.draw_idle()
 
     def obtener_posiciones_relativas(self):
         """
@@ -901,18 +2269,6 @@ class TC1ScopeApp:
         x_min, x_max = self.ax.get_xlim()
         y_min, y_max = self.ax.get_ylim()
 
-        # Eliminar cursores existentes antes de crear nuevos
-        for cursor_attr in ['cursor_x1', 'cursor_x2', 'cursor_y1', 'cursor_y2']:
-            cursor = getattr(self, cursor_attr)
-            if cursor:
-                try:
-                    if cursor in self.ax.lines:
-                        self.ax.lines.remove(cursor)
-                except Exception as e:
-                    print(f"Error al intentar eliminar cursor {cursor_attr}: {e}")
-                setattr(self, cursor_attr, None)
-
-
         # Posiciones predeterminadas si no se especifican
         if posiciones is None:
             pos_x1 = x_min + (x_max - x_min) * 0.25
@@ -929,13 +2285,19 @@ class TC1ScopeApp:
             pos_y1 = y_min + max(0, min(1, posiciones.get('y1', 0.25))) * dy_range
             pos_y2 = y_min + max(0, min(1, posiciones.get('y2', 0.75))) * dy_range
 
-        self.cursor_x1 = self.ax.axvline(pos_x1, color=self.current_colors["cursor_x"], linestyle='--', picker=5)
-        self.cursor_x2 = self.ax.axvline(pos_x2, color=self.current_colors["cursor_x"], linestyle='--', picker=5)
-        self.cursor_y1 = self.ax.axhline(pos_y1, color=self.current_colors["cursor_y"], linestyle='--', picker=5)
-        self.cursor_y2 = self.ax.axhline(pos_y2, color=self.current_colors["cursor_y"], linestyle='--', picker=5)
-
+        self.colocar_cursores(pos_x1, pos_x2, pos_y1, pos_y2)
         self.canvas.draw_idle()
 
+    def colocar_cursores(self, pos_x1, pos_x2, pos_y1, pos_y2):
+        """Mueve y muestra los artistas persistentes de los cursores."""
+        self.cursor_x1, self.cursor_x2, self.cursor_y1, self.cursor_y2 = self.artistas_cursor
+        self.cursor_x1.set_xdata([pos_x1, pos_x1])
+        self.cursor_x2.set_xdata([pos_x2, pos_x2])
+        self.cursor_y1.set_ydata([pos_y1, pos_y1])
+        self.cursor_y2.set_ydata([pos_y2, pos_y2])
+        for cursor in self.artistas_cursor:
+            cursor.set_visible(True)
+
 
     def on_press(self, event):
         """Maneja el evento de presionar el botón del mouse para seleccionar un cursor."""
@@ -949,15 +2311,32 @@ class TC1ScopeApp:
                 contains, _ = cursor_obj.contains(event)
                 if contains:
                     self.selected_cursor = cursor_obj
-                    self.canvas.mpl_disconnect('motion_notify_event') # Desconecta temporalmente para evitar que se mueva durante on_press
-                    self.canvas.mpl_connect('motion_notify_event', self.on_motion) # Reconecta para mover
+                    self.capturar_fondo_arrastre()
                     break
 
+    def capturar_fondo_arrastre(self):
+        """
+        Guarda la vista actual sin los cursores para arrastrarlos con blit:
+        fondo cacheado + trazas + leyenda, sin volver a renderizar la figura.
+        """
+        self.fondo_arrastre = None
+        try:
+            if self.fondo_estatico is None:
+                self.refrescar_canvas()
+            self.canvas.restore_region(self.fondo_estatico)
+            for artista in sorted(self.artistas_dinamicos(), key=lambda a: a.get_zorder()):
+                if artista.get_visible() and artista not in self.artistas_cursor:
+                    self.ax.draw_artist(artista)
+            self.fondo_arrastre = self.canvas.copy_from_bbox(self.fig.bbox)
+        except Exception:
+            self.fondo_arrastre = None # Sin blit: on_motion usa draw_idle
+
     def on_release(self, event):
         """Maneja el evento de soltar el botón del mouse."""
         if not self.var_cursores.get():
             return
         self.selected_cursor = None # Desselecciona el cursor
+        self.fondo_arrastre = None
         self.actualizar_deltas_cursores() # Recalcular deltas al soltar el cursor
 
 
@@ -972,8 +2351,20 @@ class TC1ScopeApp:
         elif self.selected_cursor in [self.cursor_y1, self.cursor_y2]:
             if event.ydata is not None:
                 self.selected_cursor.set_ydata([event.ydata, event.ydata])
-        
-        self.canvas.draw_idle() # Actualiza solo el área afectada
+
+        # Deltas en vivo mientras se arrastra
+        self.actualizar_deltas_cursores()
+
+        if self.fondo_arrastre is None:
+            self.canvas.draw_idle()
+            return
+        # Restaura la vista sin cursores y pinta sólo los cuatro cursores
+        with PERFIL.tramo("cursor.arrastre"):
+            self.canvas.restore_region(self.fondo_arrastre)
+            for cursor in self.artistas_cursor:
+                self.ax.draw_artist(cursor)
+            self.canvas.blit(self.fig.bbox)
+        PERFIL.cuadro_terminado()
 
     def calcular_deltas(self):
         pass
@@ -994,9 +2385,9 @@ class TC1ScopeApp:
             delta_y = abs(y2 - y1)
 
             # Para delta Y, escala según el canal elegido para los cursores
-            canal_idx = self.canal_cursores.get() - 1 # 0 para Ch1, 1 para Ch2
+            canal_idx = self.canal_cursores.get() - 1 # 0 para Ch1, 1 para Ch2, ...
 
-            if self.df is not None and canal_idx < len(self.volt_div_vars):
+            if self.almacen is not None and canal_idx < len(self.volt_div_vars):
                 volt_div_str = self.volt_div_vars[canal_idx].get()
                 factor_volt_div = dict(self.voltajes_por_div).get(volt_div_str, 1)
 
@@ -1049,6 +2440,7 @@ class TC1ScopeApp:
         """Dibuja el diagrama de Bode (Gain dB y Phase ° vs Frequency) respetando el tema."""
         # Limpio la figura y creo dos ejes apilados
         self.fig.clear()
+        self.vista_construida = False # La vista de osciloscopio se re-crea al volver
         ax1 = self.fig.add_subplot(211)
         ax2 = self.fig.add_subplot(212)
 
@@ -1106,17 +2498,8 @@ class TC1ScopeApp:
         """
         Vuelve a colocar los cursores en posiciones absolutas de datos, sin cambiar su valor.
         """
-        # Eliminar cursores existentes
-        for attr in ['cursor_x1','cursor_x2','cursor_y1','cursor_y2']:
-            cur = getattr(self, attr)
-            if cur and cur in self.ax.lines:
-                self.ax.lines.remove(cur)
-            setattr(self, attr, None)
-        # Dibujar en coordenadas de datos sin escalar
-        self.cursor_x1 = self.ax.axvline(posiciones['x1'], color=self.current_colors['cursor_x'], linestyle='--', picker=5)
-        self.cursor_x2 = self.ax.axvline(posiciones['x2'], color=self.current_colors['cursor_x'], linestyle='--', picker=5)
-        self.cursor_y1 = self.ax.axhline(posiciones['y1'], color=self.current_colors['cursor_y'], linestyle='--', picker=5)
-        self.cursor_y2 = self.ax.axhline(posiciones['y2'], color=self.current_colors['cursor_y'], linestyle='--', picker=5)
+        # Reubica en coordenadas de datos sin escalar
+        self.colocar_cursores(posiciones['x1'], posiciones['x2'], posiciones['y1'], posiciones['y2'])
 
     def update_voltage_offset_range(self):
         """
@@ -1124,7 +2507,7 @@ class TC1ScopeApp:
         quepa en pantalla (± mitad del rango global de Y / Volt/div).
         """
         # Necesitamos un rango global válido
-        if self.df is None or self.ymin_global is None or self.ymax_global is None:
+        if self.almacen is None or self.ymin_global is None or self.ymax_global is None:
             return
 
         total_range = self.ymax_global - self.ymin_global
@@ -1146,6 +2529,9 @@ class TC1ScopeApp:
 
 
 if __name__ == "__main__":
+    if OPCION_TIEMPOS_ARRANQUE in sys.argv[1:] and "importtime" not in sys._xoptions:
+        # Se vuelve a lanzar con -X importtime y se imprime el resumen
+        sys.exit(reporte_arranque(os.path.abspath(__file__), [OPCION_TIEMPOS_ARRANQUE]))
     root = tk.Tk()
     app = TC1ScopeApp(root)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,42 @@
+import numpy as np
+from matplotlib.artist import Artist
+
+
+class ImagenPixeles(Artist):
+    """
+    Imagen RGBA que ya tiene el tamaño en píxeles del área de los ejes
+    (fila 0 abajo): se copia tal cual con renderer.draw_image, sin el
+    remuestreo de AxesImage, que para una imagen del tamaño de los ejes
+    cuesta ~30 ms por cuadro contra ~2 ms. No sigue a los límites de los
+    ejes: quien la pinta la rehace cuando cambian. Si el área no mide lo
+    mismo que la imagen (savefig con otro dpi) se estira al vecino más
+    cercano.
+    """
+
+    def __init__(self, ax, **kwargs):
+        super().__init__()
+        self.set_figure(ax.figure)
+        self.axes = ax
+        self._rgba = None
+        self.update(kwargs)
+
+    def set_data(self, rgba):
+        # draw_image espera la fila de arriba primero
+        self._rgba = np.ascontiguousarray(rgba[::-1])
+        self.stale = True
+
+    def draw(self, renderer):
+        if not self.get_visible() or self._rgba is None:
+            return
+        caja = self.axes.bbox
+        rgba = self._rgba
+        alto, ancho = max(round(caja.height), 1), max(round(caja.width), 1)
+        if rgba.shape[:2] != (alto, ancho):
+            filas = np.linspace(0, rgba.shape[0] - 1, alto).round().astype(np.intp)
+            columnas = np.linspace(0, rgba.shape[1] - 1, ancho).round().astype(np.intp)
+            rgba = np.ascontiguousarray(rgba[filas][:, columnas])
+        gc = renderer.new_gc()
+        gc.set_clip_rectangle(caja)
+        renderer.draw_image(gc, round(caja.x0), round(caja.y0), rgba)
+        gc.restore()
+        self.stale = False
@@ -0,0 +1,211 @@
+import numpy as np
+
+
+# --- CONSTANTES DEL ÍNDICE ---
+TAM_BLOQUE = 4096      # Muestras por bloque del nivel 0
+FACTOR_NIVEL = 16      # Bloques de un nivel que forman un bloque del nivel siguiente
+BLOQUES_POR_COLUMNA = 8  # Resolución mínima (en bloques) de cada columna de píxel
+
+
+def _estadisticas(datos):
+    """Mínimo, máximo, suma y suma de cuadrados sobre el último eje."""
+    datos = np.asarray(datos, dtype=np.float64)
+    return (datos.min(axis=-1), datos.max(axis=-1),
+            datos.sum(axis=-1), np.einsum('...i,...i->...', datos, datos))
+
+
+def _combinar(partes):
+    """Combina una lista de estadísticas (mín, máx, suma, suma²) parciales."""
+    minimo = partes[0][0]
+    maximo = partes[0][1]
+    suma = partes[0][2]
+    suma2 = partes[0][3]
+    for p in partes[1:]:
+        minimo = np.minimum(minimo, p[0])
+        maximo = np.maximum(maximo, p[1])
+        suma = suma + p[2]
+        suma2 = suma2 + p[3]
+    return minimo, maximo, suma, suma2
+
+
+class IndiceBloques:
+    """
+    Índice piramidal de estadísticas por bloque de una o varias series
+    (forma (..., n_muestras)). El nivel 0 guarda mín, máx, suma y suma² de
+    bloques de TAM_BLOQUE muestras; cada nivel superior agrupa FACTOR_NIVEL
+    bloques del anterior. Las consultas de rango cuestan O(bloques) en vez
+    de O(muestras): sólo los bordes incompletos se leen de los datos.
+    """
+
+    def __init__(self, datos, tam_bloque=TAM_BLOQUE, factor=FACTOR_NIVEL):
+        self.tam_bloque = tam_bloque
+        self.factor = factor
+        self.niveles = []   # Cada nivel: tupla (mín, máx, suma, suma²) de arrays
+        self.n_muestras = 0  # Muestras cubiertas por bloques completos
+        self.actualizar(datos)
+
+    def actualizar(self, datos):
+        """
+        Indexa los bloques completos nuevos de 'datos'. Si se agregaron
+        muestras al final desde la última llamada sólo se procesa lo nuevo.
+        """
+        datos = np.asarray(datos)
+        n_bloques_total = datos.shape[-1] // self.tam_bloque
+        n_bloques = self.n_muestras // self.tam_bloque
+        if n_bloques_total > n_bloques:
+            nuevos = datos[..., n_bloques * self.tam_bloque:n_bloques_total * self.tam_bloque]
+            nuevos = nuevos.reshape(nuevos.shape[:-1] + (-1, self.tam_bloque))
+            self._agregar_nivel(0, _estadisticas(nuevos))
+            self.n_muestras = n_bloques_total * self.tam_bloque
+
+        # Propaga los bloques completos nuevos hacia los niveles superiores
+        nivel = 0
+        while nivel < len(self.niveles):
+            inferior = self.niveles[nivel]
+            n_completos = inferior[0].shape[-1] // self.factor
+            if n_completos == 0:
+                break
+            n_sup = self.niveles[nivel + 1][0].shape[-1] if nivel + 1 < len(self.niveles) else 0
+            if n_completos > n_sup:
+                ini, fin = n_sup * self.factor, n_completos * self.factor
+                forma = inferior[0].shape[:-1] + (-1, self.factor)
+                nuevas = (inferior[0][..., ini:fin].reshape(forma).min(axis=-1),
+                          inferior[1][..., ini:fin].reshape(forma).max(axis=-1),
+                          inferior[2][..., ini:fin].reshape(forma).sum(axis=-1),
+                          inferior[3][..., ini:fin].reshape(forma).sum(axis=-1))
+                self._agregar_nivel(nivel + 1, nuevas)
+            nivel += 1
+
+    def guardar(self, ruta):
+        """Guarda los niveles del índice en un .npz (para el cache binario)."""
+        arrays = {'parametros': np.array([self.tam_bloque, self.factor, self.n_muestras])}
+        for k, nivel in enumerate(self.niveles):
+            for nombre, arr in zip(('min', 'max', 'suma', 'suma2'), nivel):
+                arrays[f"{nombre}_{k}"] = arr
+        np.savez(ruta, **arrays)
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Reconstruye un índice guardado con guardar() sin volver a leer los datos."""
+        with np.load(ruta) as arrays:
+            tam_bloque, factor, n_muestras = (int(v) for v in arrays['parametros'])
+            indice = cls.__new__(cls)
+            indice.tam_bloque, indice.factor, indice.n_muestras = tam_bloque, factor, n_muestras
+            indice.niveles = []
+            k = 0
+            while f"min_{k}" in arrays:
+                indice.niveles.append(tuple(arrays[f"{nombre}_{k}"]
+                                            for nombre in ('min', 'max', 'suma', 'suma2')))
+                k += 1
+        return indice
+
+    def _agregar_nivel(self, nivel, estadisticas):
+        if nivel == len(self.niveles):
+            self.niveles.append(tuple(np.ascontiguousarray(e) for e in estadisticas))
+        else:
+            self.niveles[nivel] = tuple(np.concatenate((viejo, nuevo), axis=-1)
+                                        for viejo, nuevo in zip(self.niveles[nivel], estadisticas))
+
+    def tam_nivel(self, nivel):
+        """Muestras que abarca un bloque del nivel dado."""
+        return self.tam_bloque * self.factor ** nivel
+
+    def _bloques(self, nivel, b0, b1):
+        """Estadísticas de los bloques [b0, b1) de un nivel, subiendo de nivel donde se pueda."""
+        partes = []
+        while b0 < b1:
+            if nivel + 1 < len(self.niveles):
+                c0 = -(-b0 // self.factor)
+                c1 = min(b1 // self.factor, self.niveles[nivel + 1][0].shape[-1])
+                if c0 < c1:
+                    for ini, fin in ((b0, c0 * self.factor), (c1 * self.factor, b1)):
+                        if ini < fin:
+                            partes.append(self._reducir(nivel, ini, fin))
+                    nivel, b0, b1 = nivel + 1, c0, c1
+                    continue
+            partes.append(self._reducir(nivel, b0, b1))
+            break
+        return partes
+
+    def _reducir(self, nivel, ini, fin):
+        mn, mx, s, s2 = self.niveles[nivel]
+        return (mn[..., ini:fin].min(axis=-1), mx[..., ini:fin].max(axis=-1),
+                s[..., ini:fin].sum(axis=-1), s2[..., ini:fin].sum(axis=-1))
+
+    def rango(self, datos, i_ini, i_fin):
+        """
+        Estadísticas (mín, máx, suma, suma², n) de las muestras [i_ini, i_fin).
+        'datos' es la misma serie indexada; sólo se leen los bordes que no
+        llenan un bloque.
+        """
+        n = np.shape(datos)[-1]
+        i_ini, i_fin = max(int(i_ini), 0), min(int(i_fin), n)
+        if i_fin <= i_ini:
+            raise ValueError("Rango vacío")
+        tb = self.tam_bloque
+        b0 = -(-i_ini // tb)
+        b1 = min(i_fin // tb, self.n_muestras // tb)
+        if b0 >= b1:
+            return _estadisticas(datos[..., i_ini:i_fin]) + (i_fin - i_ini,)
+
+        partes = self._bloques(0, b0, b1)
+        for ini, fin in ((i_ini, b0 * tb), (b1 * tb, i_fin)):
+            if ini < fin:
+                partes.append(_estadisticas(datos[..., ini:fin]))
+        return _combinar(partes) + (i_fin - i_ini,)
+
+    def minmax(self, datos, i_ini, i_fin):
+        """Mínimo y máximo de las muestras [i_ini, i_fin)."""
+        minimo, maximo, _, _, _ = self.rango(datos, i_ini, i_fin)
+        return minimo, maximo
+
+    def media(self, datos, i_ini, i_fin):
+        """Valor medio de las muestras [i_ini, i_fin)."""
+        _, _, suma, _, n = self.rango(datos, i_ini, i_fin)
+        return suma / n
+
+    def rms(self, datos, i_ini, i_fin):
+        """Valor eficaz de las muestras [i_ini, i_fin)."""
+        _, _, _, suma2, n = self.rango(datos, i_ini, i_fin)
+        return np.sqrt(suma2 / n)
+
+    def minmax_columnas(self, datos, i_ini, i_fin, n_columnas):
+        """
+        Mínimo y máximo por columna de píxel usando sólo los bloques, para
+        ventanas donde cada columna abarca al menos BLOQUES_POR_COLUMNA
+        bloques. Devuelve (muestra_central, mínimos, máximos) o None si la
+        ventana es demasiado corta y conviene decimar los datos crudos.
+        Los bordes se redondean hacia afuera al bloque, así un glitch nunca
+        se pierde (a lo sumo se corre menos de 1/BLOQUES_POR_COLUMNA de columna).
+        """
+        if not self.niveles or n_columnas < 1:
+            return None
+        muestras_col = (i_fin - i_ini) / n_columnas
+        nivel = None
+        for k in range(len(self.niveles)):
+            if self.tam_nivel(k) * BLOQUES_POR_COLUMNA <= muestras_col:
+                nivel = k
+        if nivel is None:
+            return None
+
+        tb = self.tam_nivel(nivel)
+        mn, mx, _, _ = self.niveles[nivel]
+        n_bloques = mn.shape[-1]
+        bordes = np.rint(np.linspace(i_ini, i_fin, n_columnas + 1) / tb).astype(np.intp)
+        bordes[0] = i_ini // tb
+        bordes[-1] = -(-i_fin // tb)
+        bordes = np.unique(np.clip(bordes, 0, n_bloques))
+        if len(bordes) < 2:
+            return None
+
+        minimos = np.minimum.reduceat(mn[..., :bordes[-1]], bordes[:-1], axis=-1)
+        maximos = np.maximum.reduceat(mx[..., :bordes[-1]], bordes[:-1], axis=-1)
+        centros = ((bordes[:-1] + bordes[1:]) * tb) // 2
+
+        # Lo que queda después del último bloque completo del nivel va a la última columna
+        cubierto = int(bordes[-1]) * tb
+        if cubierto < i_fin:
+            resto_min, resto_max = self.minmax(datos, cubierto, i_fin)
+            minimos[..., -1] = np.minimum(minimos[..., -1], resto_min)
+            maximos[..., -1] = np.maximum(maximos[..., -1], resto_max)
+        return centros, minimos, maximos
@@ -0,0 +1,209 @@
+import ast
+import re
+import threading
+
+import numpy as np
+
+
+# --- CONSTANTES DE CANALES MATEMÁTICOS ---
+TAM_TROZO = 1 << 18        # Muestras que se evalúan de una vez al recorrer ventanas largas
+TAM_BLOQUE_INTEGRAL = 4096 # Bloque de las sumas parciales que dan el valor inicial de ∫
+OPERACIONES = ["d/dt", "∫"] # Operaciones que pueden preceder a la expresión
+PATRON_CANAL = re.compile(r"CH(\d+)$", re.IGNORECASE)
+OPERADORES = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide}
+
+
+def parsear_constantes(texto):
+    """'R=50, C=47e-9' -> {'R': 50.0, 'C': 4.7e-08}. Lanza ValueError si no se entiende."""
+    constantes = {}
+    for parte in re.split(r"[,;]", texto):
+        if not parte.strip():
+            continue
+        nombre, signo, valor = parte.partition("=")
+        nombre = nombre.strip()
+        if not signo or not nombre.isidentifier() or PATRON_CANAL.match(nombre):
+            raise ValueError(f"Constante inválida: '{parte.strip()}'")
+        constantes[nombre] = float(valor)
+    return constantes
+
+
+def _separar_operacion(expresion):
+    """'d/dt CH2' -> ('d/dt', 'CH2'); sin operación -> ('', expresión)."""
+    for operacion in OPERACIONES:
+        if expresion.startswith(operacion):
+            return operacion, expresion[len(operacion):].strip()
+    return "", expresion
+
+
+def _validar(nodo, n_canales, constantes):
+    """
+    Recorre el árbol y devuelve los canales (0-index) que usa. Sólo se
+    aceptan + - * /, signo, números, CHn y las constantes definidas.
+    """
+    if isinstance(nodo, ast.BinOp) and type(nodo.op) in OPERADORES:
+        return _validar(nodo.left, n_canales, constantes) | _validar(nodo.right, n_canales, constantes)
+    if isinstance(nodo, ast.UnaryOp) and isinstance(nodo.op, (ast.USub, ast.UAdd)):
+        return _validar(nodo.operand, n_canales, constantes)
+    if isinstance(nodo, ast.Constant) and isinstance(nodo.value, (int, float)):
+        return set()
+    if isinstance(nodo, ast.Name):
+        canal = PATRON_CANAL.match(nodo.id)
+        if canal:
+            indice = int(canal.group(1)) - 1
+            if not 0 <= indice < n_canales:
+                raise ValueError(f"No existe el canal {nodo.id}")
+            return {indice}
+        if nodo.id in constantes:
+            return set()
+        raise ValueError(f"Nombre desconocido: {nodo.id}")
+    raise ValueError("Sólo se admiten + - * /, números, CHn y constantes")
+
+
+class CanalMatematico:
+    """
+    Canal definido por una expresión sobre los canales reales, p. ej.
+    'CH1-CH2', 'CH1*CH2/R', 'd/dt CH2' o '∫CH1'. No guarda muestras: se
+    evalúa a pedido sobre una ventana [i_ini, i_fin). Para '∫' el valor
+    al comienzo de la ventana sale de sumas parciales por bloque, que se
+    calculan sólo hasta donde se necesitan (o del índice de bloques si el
+    integrando es un canal solo y el tiempo es uniforme).
+    """
+
+    def __init__(self, expresion, n_canales, constantes=None):
+        self.expresion = expresion.strip()
+        self.operacion, cuerpo = _separar_operacion(self.expresion)
+        self.constantes = dict(constantes or {})
+        try:
+            self.arbol = ast.parse(cuerpo, mode='eval').body
+        except SyntaxError:
+            raise ValueError(f"Expresión inválida: '{cuerpo}'")
+        self.fuentes = sorted(_validar(self.arbol, n_canales, self.constantes))
+        if not self.fuentes:
+            raise ValueError("La expresión tiene que usar al menos un canal")
+        self._sumas = np.empty(0) # Integral (trapecios) de cada bloque, calculada a demanda
+        self._lock_sumas = threading.Lock() # invalidar (Tk) contra publicar sumas (trabajos)
+
+    @property
+    def canal_solo(self):
+        """Índice del canal si la expresión es sólo 'CHn' (sin operar), si no None."""
+        if isinstance(self.arbol, ast.Name):
+            return self.fuentes[0]
+        return None
+
+    def invalidar(self):
+        """Descarta lo calculado (cambiaron las muestras de los canales fuente)."""
+        with self._lock_sumas:
+            self._sumas = np.empty(0)
+
+    def _evaluar_arbol(self, nodo, datos, i_ini, i_fin):
+        if isinstance(nodo, ast.BinOp):
+            return OPERADORES[type(nodo.op)](self._evaluar_arbol(nodo.left, datos, i_ini, i_fin),
+                                             self._evaluar_arbol(nodo.right, datos, i_ini, i_fin))
+        if isinstance(nodo, ast.UnaryOp):
+            operando = self._evaluar_arbol(nodo.operand, datos, i_ini, i_fin)
+            return -operando if isinstance(nodo.op, ast.USub) else operando
+        if isinstance(nodo, ast.Constant):
+            return float(nodo.value)
+        canal = PATRON_CANAL.match(nodo.id)
+        if canal:
+            return datos[int(canal.group(1)) - 1, i_ini:i_fin]
+        return self.constantes[nodo.id]
+
+    def integrando(self, datos, i_ini, i_fin):
+        """La expresión (sin d/dt ni ∫) sobre las muestras [i_ini, i_fin), en float64."""
+        valores = self._evaluar_arbol(self.arbol, datos, i_ini, i_fin)
+        return np.broadcast_to(np.asarray(valores, dtype=np.float64), (i_fin - i_ini,))
+
+    def _incrementos(self, tiempo, datos, i_ini, i_fin):
+        """Área de cada trapecio entre las muestras k y k+1, para k en [i_ini, i_fin)."""
+        x = self.integrando(datos, i_ini, i_fin + 1)
+        areas = np.add(x[1:], x[:-1])
+        areas *= 0.5
+        areas *= np.diff(tiempo[i_ini:i_fin + 1])
+        return areas
+
+    def _extender_sumas(self, tiempo, datos, n_bloques):
+        """
+        Devuelve las sumas por bloque hasta al menos n_bloques, calculando
+        (en trozos) las que falten. Puede correr en un hilo de trabajo
+        mientras el de Tk invalida: lo calculado se guarda sólo si _sumas
+        sigue siendo el array del que se partió, así nunca quedan sumas de
+        las muestras viejas.
+        """
+        anteriores = self._sumas
+        if len(anteriores) >= n_bloques:
+            return anteriores
+        tb = TAM_BLOQUE_INTEGRAL
+        sumas = [anteriores]
+        desde = len(anteriores)
+        por_trozo = max(TAM_TROZO // tb, 1)
+        while desde < n_bloques:
+            hasta = min(desde + por_trozo, n_bloques)
+            incrementos = self._incrementos(tiempo, datos, desde * tb, hasta * tb)
+            sumas.append(incrementos.reshape(-1, tb).sum(axis=1))
+            desde = hasta
+        sumas = np.concatenate(sumas)
+        with self._lock_sumas:
+            if self._sumas is anteriores:
+                self._sumas = sumas
+        return sumas
+
+    def integral_hasta(self, tiempo, datos, i, indice=None, uniforme=False):
+        """Integral (regla del trapecio) desde la primera muestra hasta la muestra i."""
+        canal = self.canal_solo
+        if canal is not None and indice is not None and uniforme:
+            # Tiempo uniforme: trapecios = dt * (suma de x_0..x_i - (x_0 + x_i) / 2),
+            # y la suma sale casi toda de las sumas del nivel 0 del índice
+            tb = indice.tam_bloque
+            completos = min((i + 1) // tb, indice.n_muestras // tb)
+            suma = indice.niveles[0][2][canal][:completos].sum() if completos else 0.0
+            suma += datos[canal, completos * tb:i + 1].sum(dtype=np.float64)
+            dt = (tiempo[-1] - tiempo[0]) / (len(tiempo) - 1)
+            return float(dt * (suma - (datos[canal, 0] + datos[canal, i]) / 2))
+        tb = TAM_BLOQUE_INTEGRAL
+        completos = i // tb
+        sumas = self._extender_sumas(tiempo, datos, completos)
+        return float(sumas[:completos].sum()
+                     + self._incrementos(tiempo, datos, completos * tb, i).sum())
+
+    def evaluar(self, tiempo, datos, i_ini, i_fin, indice=None, uniforme=False):
+        """Valores del canal en las muestras [i_ini, i_fin) (un array nuevo del largo de la ventana)."""
+        if self.operacion == "d/dt":
+            # Una muestra extra a cada lado para que el borde use diferencias centradas
+            a, b = max(i_ini - 1, 0), min(i_fin + 1, datos.shape[1])
+            if b - a < 2:
+                return np.zeros(i_fin - i_ini)
+            # Con paso uniforme np.gradient con un escalar evita el cálculo por muestra
+            paso = (tiempo[b - 1] - tiempo[a]) / (b - a - 1) if uniforme else tiempo[a:b]
+            derivada = np.gradient(self.integrando(datos, a, b), paso)
+            return derivada[i_ini - a:i_ini - a + i_fin - i_ini]
+        if self.operacion == "∫":
+            if i_fin <= i_ini:
+                return np.empty(0)
+            return self._acumular(tiempo, datos, i_ini, i_fin,
+                                  self.integral_hasta(tiempo, datos, i_ini, indice, uniforme))
+        return np.array(self.integrando(datos, i_ini, i_fin))
+
+    def _acumular(self, tiempo, datos, i_ini, i_fin, inicial):
+        """Integral en [i_ini, i_fin) partiendo de 'inicial' en la muestra i_ini."""
+        salida = np.empty(i_fin - i_ini)
+        salida[0] = inicial
+        np.cumsum(self._incrementos(tiempo, datos, i_ini, i_fin - 1), out=salida[1:])
+        salida[1:] += inicial
+        return salida
+
+    def trozos(self, tiempo, datos, i_ini, i_fin, indice=None, uniforme=False, tam=TAM_TROZO):
+        """
+        Evalúa la ventana de a trozos de 'tam' muestras: genera (ini, fin,
+        valores). En '∫' cada trozo sigue desde el último valor del anterior.
+        """
+        ultimo = None
+        for ini in range(i_ini, i_fin, tam):
+            fin = min(ini + tam, i_fin)
+            if self.operacion == "∫" and ultimo is not None:
+                valores = self._acumular(tiempo, datos, ini - 1, fin, ultimo)[1:]
+            else:
+                valores = self.evaluar(tiempo, datos, ini, fin, indice, uniforme)
+            if len(valores):
+                ultimo = valores[-1]
+            yield ini, fin, valores
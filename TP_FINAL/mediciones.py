@@ -0,0 +1,206 @@
+import numpy as np
+
+
+# --- CONSTANTES DE MEDICIONES ---
+NIVEL_BAJO = 0.1            # Nivel del 10 % para tiempos de subida/bajada
+NIVEL_ALTO = 0.9            # Nivel del 90 %
+BINS_NIVELES = 256          # Bins del histograma que estima los niveles base/tope
+MUESTRAS_NIVELES = 1 << 18  # Muestras (submuestreadas) que usa ese histograma
+TAM_BLOQUE_CRUCES = 512     # Muestras por bloque al descartar tramos sin cruces
+FRACCION_CANDIDATOS = 0.25  # Con más bloques candidatos que esto se recorre todo
+MIN_MUESTRAS_CRUCE = 16     # Con cruces más seguidos que esto la señal es ruido: no hay flancos
+MEDICIONES = ["Vpp", "Vmax", "Vmin", "Vavg", "Vrms", "Freq", "Period",
+              "Rise", "Fall", "Overshoot", "Duty"]
+UNIDADES_MEDICIONES = {"Vpp": "V", "Vmax": "V", "Vmin": "V", "Vavg": "V", "Vrms": "V",
+                       "Freq": "Hz", "Period": "s", "Rise": "s", "Fall": "s",
+                       "Overshoot": "%", "Duty": "%", "THD": "%"}
+PREFIJOS_SI = [(1e9, "G"), (1e6, "M"), (1e3, "k"), (1, ""), (1e-3, "m"), (1e-6, "µ"), (1e-9, "n"), (1e-12, "p")]
+
+
+def niveles(valores, v_min, v_max):
+    """
+    Niveles base y tope de la señal: la moda de la mitad inferior y de la
+    superior de un histograma (sobre una submuestra regular). En una onda
+    cuadrada son las mesetas; en una senoidal, los picos.
+    """
+    if v_max <= v_min:
+        return v_min, v_max
+    paso = max(len(valores) // MUESTRAS_NIVELES, 1)
+    muestra = np.asarray(valores[::paso], dtype=np.float64)
+    bins = ((muestra - v_min) * ((BINS_NIVELES - 1) / (v_max - v_min))).astype(np.intp)
+    cuentas = np.bincount(bins, minlength=BINS_NIVELES)
+    mitad = BINS_NIVELES // 2
+    ancho_bin = (v_max - v_min) / (BINS_NIVELES - 1)
+    base = v_min + np.argmax(cuentas[:mitad]) * ancho_bin
+    tope = v_min + (mitad + np.argmax(cuentas[mitad:])) * ancho_bin
+    return base, tope
+
+
+def _cruces(valores, nivel):
+    """Índices i donde la señal cruza 'nivel' entre i e i+1: (subidas, bajadas)."""
+    encima = valores >= nivel
+    i = np.flatnonzero(encima[1:] != encima[:-1])
+    subida = encima[i + 1]
+    return i[subida], i[~subida]
+
+
+def minmax_bloques(valores, tam=TAM_BLOQUE_CRUCES):
+    """Mínimo y máximo de cada bloque completo de 'tam' muestras."""
+    n_bloques = len(valores) // tam
+    bloques = valores[:n_bloques * tam].reshape(n_bloques, tam)
+    return bloques.min(axis=1), bloques.max(axis=1)
+
+
+def cruces_bloques(valores, nivel, minimos, maximos, tam=TAM_BLOQUE_CRUCES):
+    """
+    Igual que _cruces, pero sólo compara los bloques cuyo rango contiene
+    al nivel (mín < nivel <= máx); los cruces entre un bloque y el
+    siguiente se miran aparte con dos vistas con paso. En una captura
+    típica los flancos ocupan una fracción chica de la ventana; si no es
+    así (ruido, señal muy rápida) se recorre todo de una vez.
+    """
+    candidatos = np.flatnonzero((minimos < nivel) & (nivel <= maximos))
+    if len(candidatos) > FRACCION_CANDIDATOS * len(minimos):
+        return _cruces(valores, nivel)
+    n = len(minimos) * tam
+    filas = valores[:n].reshape(-1, tam)[candidatos] >= nivel
+    fila, columna = np.nonzero(filas[:, 1:] != filas[:, :-1])
+    internos = candidatos[fila] * tam + columna
+    sube_interno = filas[fila, columna + 1]
+    # Bordes: última muestra de cada bloque contra la primera del siguiente (y la cola)
+    ultimas = valores[tam - 1:n:tam] >= nivel
+    siguientes = np.append(valores[tam:n:tam], valores[n:n + 1]) >= nivel
+    k = np.flatnonzero(ultimas[:len(siguientes)] != siguientes)
+    bordes = k * tam + tam - 1
+    sub_cola, baj_cola = _cruces(valores[n:], nivel)
+    i = np.concatenate((internos, bordes, sub_cola + n))
+    subida = np.concatenate((sube_interno, siguientes[k], np.ones(len(sub_cola), dtype=bool)))
+    i = np.concatenate((i, baj_cola + n))
+    subida = np.concatenate((subida, np.zeros(len(baj_cola), dtype=bool)))
+    orden = np.argsort(i, kind='stable')
+    i, subida = i[orden], subida[orden]
+    return i[subida], i[~subida]
+
+
+def _interpolar(tiempo, valores, i, nivel):
+    """Instante (interpolado linealmente) del cruce de 'nivel' entre las muestras i e i+1."""
+    t0, t1 = tiempo[i], tiempo[i + 1]
+    v0, v1 = valores[i].astype(np.float64), valores[i + 1].astype(np.float64)
+    return t0 + (nivel - v0) * (t1 - t0) / (v1 - v0)
+
+
+def flancos_histeresis(alto_sub, bajo_baj):
+    """
+    Flancos con histéresis entre el 10 % y el 90 %: una subida es un cruce
+    ascendente del 90 % precedido por un cruce descendente del 10 % (y al
+    revés para las bajadas), así el ruido alrededor de un nivel no genera
+    flancos falsos. Se ordenan los dos tipos de evento y se queda el
+    primero de cada racha. Devuelve (subidas, bajadas) como índices de los
+    cruces del 90 % y del 10 % respectivamente.
+    """
+    eventos = np.concatenate((alto_sub, bajo_baj))
+    signo = np.concatenate((np.ones(len(alto_sub), dtype=np.int8),
+                            -np.ones(len(bajo_baj), dtype=np.int8)))
+    orden = np.argsort(eventos, kind='stable')
+    eventos, signo = eventos[orden], signo[orden]
+    flanco = np.empty(len(signo), dtype=bool)
+    flanco[:1] = False # El primer evento no tiene un nivel previo conocido
+    flanco[1:] = signo[1:] != signo[:-1]
+    return eventos[flanco & (signo > 0)], eventos[flanco & (signo < 0)]
+
+
+def _anterior(cruces, hasta):
+    """Último cruce < cada valor de 'hasta' (-1 donde no hay)."""
+    k = np.searchsorted(cruces, hasta, side='left') - 1
+    encontrado = k >= 0
+    resultado = np.full(len(hasta), -1, dtype=np.intp)
+    resultado[encontrado] = cruces[k[encontrado]]
+    return resultado
+
+
+def medir(tiempo, valores, estadisticas=None):
+    """
+    Mediciones automáticas de una serie (en V y s). 'estadisticas' es el
+    (mín, máx, suma, suma², n) del índice de bloques, si se tiene, y evita
+    recorrer los datos para Vmax/Vmin/Vavg/Vrms. Los cruces se buscan con
+    operaciones sobre arrays y se interpolan; no hay bucles por muestra.
+    Las mediciones que no aplican (p. ej. sin flancos) quedan en NaN.
+    """
+    valores = np.asarray(valores)
+    tiempo = np.asarray(tiempo)
+    if estadisticas is None:
+        v64 = valores.astype(np.float64, copy=False)
+        estadisticas = (v64.min(), v64.max(), v64.sum(), np.dot(v64, v64), len(v64))
+    v_min, v_max, suma, suma2, n = (float(e) for e in estadisticas)
+    resultado = dict.fromkeys(MEDICIONES, np.nan)
+    resultado.update(Vpp=v_max - v_min, Vmax=v_max, Vmin=v_min,
+                     Vavg=suma / n, Vrms=np.sqrt(suma2 / n))
+
+    base, tope = niveles(valores, v_min, v_max)
+    amplitud = tope - base
+    if amplitud <= 0 or len(valores) < 3:
+        return resultado
+    resultado["Overshoot"] = 100.0 * (v_max - tope) / amplitud
+
+    minimos, maximos = minmax_bloques(valores)
+    medio = base + 0.5 * amplitud
+    bajo = base + NIVEL_BAJO * amplitud
+    alto = base + NIVEL_ALTO * amplitud
+    medio_sub, medio_baj = cruces_bloques(valores, medio, minimos, maximos)
+    if (len(medio_sub) + len(medio_baj)) * MIN_MUESTRAS_CRUCE > len(valores):
+        return resultado
+    bajo_sub, bajo_baj = cruces_bloques(valores, bajo, minimos, maximos)
+    alto_sub, alto_baj = cruces_bloques(valores, alto, minimos, maximos)
+    i90_sub, i10_baj = flancos_histeresis(alto_sub, bajo_baj)
+
+    # Subida: último cruce del 10 % y del 50 % antes de llegar al 90 %
+    i10_sub = _anterior(bajo_sub, i90_sub + 1)
+    i50_sub = _anterior(medio_sub, i90_sub + 1)
+    # Bajada: último cruce del 90 % y del 50 % antes de llegar al 10 %
+    i90_baj = _anterior(alto_baj, i10_baj + 1)
+    i50_baj = _anterior(medio_baj, i10_baj + 1)
+
+    ok = (i10_sub >= 0) & (i50_sub >= 0)
+    if ok.any():
+        subidas = (_interpolar(tiempo, valores, i90_sub[ok], alto)
+                   - _interpolar(tiempo, valores, i10_sub[ok], bajo))
+        resultado["Rise"] = float(np.median(subidas))
+    ok = (i90_baj >= 0) & (i50_baj >= 0)
+    if ok.any():
+        bajadas = (_interpolar(tiempo, valores, i10_baj[ok], bajo)
+                   - _interpolar(tiempo, valores, i90_baj[ok], alto))
+        resultado["Fall"] = float(np.median(bajadas))
+
+    # Período y ciclo de trabajo entre cruces del 50 % de flancos consecutivos
+    t_sub = _interpolar(tiempo, valores, i50_sub[i50_sub >= 0], medio)
+    t_baj = _interpolar(tiempo, valores, i50_baj[i50_baj >= 0], medio)
+    if len(t_sub) >= 2:
+        periodos = np.diff(t_sub)
+        periodo = float(np.median(periodos))
+        if periodo > 0:
+            resultado["Period"] = periodo
+            resultado["Freq"] = 1.0 / periodo
+        # Tiempo en alto: de cada subida a la bajada siguiente
+        k = np.searchsorted(t_baj, t_sub[:-1])
+        completos = k < len(t_baj)
+        if completos.any():
+            en_alto = t_baj[k[completos]] - t_sub[:-1][completos]
+            periodos = periodos[completos]
+            validos = en_alto < periodos
+            if validos.any():
+                resultado["Duty"] = 100.0 * float(np.median(en_alto[validos] / periodos[validos]))
+    return resultado
+
+
+def formatear_medicion(nombre, valor):
+    """Texto de una medición con prefijo SI (p. ej. '1.23 µs'); '---' si no aplica."""
+    unidad = UNIDADES_MEDICIONES[nombre]
+    if not np.isfinite(valor):
+        return "---"
+    if unidad == "%":
+        return f"{valor:.3g} %"
+    redondeado = abs(float(f"{valor:.4g}")) # 0.99999 ms se muestra como 1 ms
+    for factor, prefijo in PREFIJOS_SI:
+        if redondeado >= factor:
+            return f"{valor / factor:.4g} {prefijo}{unidad}"
+    return f"{valor:.3g} {unidad}"
@@ -0,0 +1,204 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+
+# --- CONSTANTES DEL PERFILADO ---
+MAX_EVENTOS = 100_000         # Tramos que se guardan (los más viejos se descartan)
+CUADROS_FPS = 30              # Cuadros sobre los que se calcula el fps
+TRAMOS_RESUMEN = 8            # Tramos del último cuadro que muestra el overlay
+VARIABLE_ENTORNO = "TC_PERFIL" # TC_PERFIL=1 activa el perfilado desde el arranque
+PREFIJO_IMPORTTIME = "import time:"
+MARCA_ARRANQUE = "arranque:"  # Líneas de stderr con que la GUI avisa cada etapa del arranque
+OBJETIVO_VENTANA_MS = 500     # Tiempo hasta ver la ventana que se quiere no superar
+PAQUETES_REPORTE = 10         # Paquetes más lentos que se listan por etapa
+
+_NULO = nullcontext()
+_HILO_PRINCIPAL = threading.main_thread().ident
+
+
+class _Tramo:
+    """Mide un tramo con nombre; al salir lo registra en el perfilador."""
+    __slots__ = ("perfil", "nombre", "inicio")
+
+    def __init__(self, perfil, nombre):
+        self.perfil = perfil
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        self.perfil.registrar(self.nombre, self.inicio, time.perf_counter() - self.inicio)
+        return False
+
+
+class Perfilador:
+    """
+    Tramos de tiempo con nombre ('vista.trazado', 'carga.parseo', ...) en un
+    buffer circular, más el desglose del último cuadro, fps y contadores
+    (muestras de la ventana, puntos dibujados) para el overlay. Desactivado,
+    tramo() devuelve siempre el mismo contexto nulo: en el camino caliente
+    queda una llamada y un with vacío, sin tomar tiempos ni guardar nada.
+    Se puede volcar a JSON lines o al formato de trazas de Chrome.
+    """
+
+    def __init__(self, activo=False, max_eventos=MAX_EVENTOS):
+        self.activo = activo
+        self.eventos = deque(maxlen=max_eventos) # (nombre, inicio, duración, hilo), en s
+        self.cuadro_actual = {}   # nombre -> s acumulados en el cuadro en curso (hilo de Tk)
+        self.ultimo_cuadro = {}
+        self.contadores = {}
+        self._fin_cuadros = deque(maxlen=CUADROS_FPS)
+        self._origen = time.perf_counter()
+
+    def tramo(self, nombre):
+        """Contexto que mide el bloque: 'with perfil.tramo("vista.trazado"): ...'."""
+        if not self.activo:
+            return _NULO
+        return _Tramo(self, nombre)
+
+    def envolver(self, nombre, funcion):
+        """funcion medida como un tramo (p. ej. un trabajo en segundo plano); la misma si está inactivo."""
+        if not self.activo:
+            return funcion
+
+        def medida(*args, **kwargs):
+            with self.tramo(nombre):
+                return funcion(*args, **kwargs)
+        return medida
+
+    def registrar(self, nombre, inicio, duracion):
+        hilo = threading.get_ident()
+        self.eventos.append((nombre, inicio, duracion, hilo))
+        if hilo == _HILO_PRINCIPAL:
+            self.cuadro_actual[nombre] = self.cuadro_actual.get(nombre, 0.0) + duracion
+
+    def contar(self, nombre, valor):
+        if self.activo:
+            self.contadores[nombre] = valor
+
+    def cuadro_terminado(self):
+        """Cierra el cuadro: su desglose pasa a ser el que muestra el overlay."""
+        if not self.activo:
+            return
+        self.ultimo_cuadro, self.cuadro_actual = self.cuadro_actual, {}
+        self._fin_cuadros.append(time.perf_counter())
+
+    @property
+    def fps(self):
+        """Cuadros por segundo de los últimos CUADROS_FPS redibujos."""
+        if len(self._fin_cuadros) < 2:
+            return 0.0
+        return (len(self._fin_cuadros) - 1) / (self._fin_cuadros[-1] - self._fin_cuadros[0])
+
+    def resumen(self, extra=None):
+        """Texto del overlay: fps, tramos más largos del último cuadro y contadores."""
+        lineas = [f"{self.fps:5.1f} fps"]
+        tramos = sorted(self.ultimo_cuadro.items(), key=lambda t: -t[1])[:TRAMOS_RESUMEN]
+        lineas += [f"{nombre:<16}{segundos * 1000:7.2f} ms" for nombre, segundos in tramos]
+        for nombre, valor in list(self.contadores.items()) + list((extra or {}).items()):
+            lineas.append(f"{nombre:<16}{valor:>10,}")
+        return "\n".join(lineas)
+
+    def limpiar(self):
+        self.eventos.clear()
+        self.cuadro_actual, self.ultimo_cuadro, self.contadores = {}, {}, {}
+        self._fin_cuadros.clear()
+
+    def guardar(self, ruta):
+        """
+        Vuelca los tramos guardados: '.jsonl' -> un objeto por línea
+        (nombre, inicio y duración en µs, hilo); si no, formato de trazas de
+        Chrome (chrome://tracing, Perfetto) con eventos completos 'X'.
+        """
+        eventos = list(self.eventos)
+        pid = os.getpid()
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            if ruta.lower().endswith(".jsonl"):
+                for nombre, inicio, duracion, hilo in eventos:
+                    archivo.write(json.dumps({"nombre": nombre, "inicio_us": (inicio - self._origen) * 1e6,
+                                              "duracion_us": duracion * 1e6, "hilo": hilo}) + "\n")
+                return
+            json.dump({"traceEvents": [{"name": nombre, "ph": "X", "pid": pid, "tid": hilo,
+                                        "ts": (inicio - self._origen) * 1e6, "dur": duracion * 1e6}
+                                       for nombre, inicio, duracion, hilo in eventos],
+                       "displayTimeUnit": "ms"}, archivo)
+
+
+# Un único perfilador para la GUI y los módulos que usa (carga, trabajos)
+PERFIL = Perfilador(activo=bool(os.environ.get(VARIABLE_ENTORNO)))
+
+
+def resumir_importtime(lineas):
+    """
+    Suma por paquete raíz el tiempo acumulado (ms) de los imports de primer
+    nivel en la salida de 'python -X importtime'. Devuelve [(paquete, ms)]
+    de mayor a menor.
+    """
+    paquetes = {}
+    for linea in lineas:
+        if not linea.startswith(PREFIJO_IMPORTTIME):
+            continue
+        try:
+            _, acumulado, nombre = linea[len(PREFIJO_IMPORTTIME):].split("|")
+            acumulado = int(acumulado)
+        except ValueError:
+            continue # Encabezado 'self [us] | cumulative | imported package'
+        nombre = nombre.rstrip()
+        if nombre[1:2] == " ":
+            continue # Import anidado: ya está en el acumulado de su padre
+        raiz = nombre.strip().split(".")[0]
+        paquetes[raiz] = paquetes.get(raiz, 0.0) + acumulado / 1000
+    return sorted(paquetes.items(), key=lambda p: -p[1])
+
+
+def reporte_arranque(script, argumentos=(), salida=sys.stdout):
+    """
+    Lanza 'script' con -X importtime y resume su arranque: cuándo se vio
+    la ventana y cuándo estuvo el gráfico (desde el lanzamiento, según las
+    líneas MARCA_ARRANQUE que escribe el proceso) y qué paquetes se
+    importaron antes y después de la ventana. -X importtime agrega algo
+    de costo propio a los tiempos. Devuelve el código de salida del proceso.
+    """
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen([sys.executable, "-X", "importtime", script, *argumentos],
+                               stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
+    etapas = [("inicio", None, [])] # (etapa, ms desde el lanzamiento, líneas de stderr hasta la siguiente)
+    for linea in proceso.stderr:
+        if linea.startswith(MARCA_ARRANQUE):
+            etapa = linea[len(MARCA_ARRANQUE):].split()[0]
+            etapas.append((etapa, (time.perf_counter() - inicio) * 1000, []))
+        else:
+            etapas[-1][2].append(linea)
+    codigo = proceso.wait()
+
+    tiempos = {etapa: ms for etapa, ms, _ in etapas[1:]}
+    ventana = tiempos.get("ventana")
+    if ventana is None:
+        print("Ventana visible:   (no se mostró)", file=salida)
+    else:
+        estado = "OK" if ventana < OBJETIVO_VENTANA_MS else f"supera {OBJETIVO_VENTANA_MS} ms"
+        print(f"Ventana visible:   {ventana:7.0f} ms desde el lanzamiento ({estado})", file=salida)
+    if "grafico" in tiempos:
+        print(f"Gráfico listo:     {tiempos['grafico']:7.0f} ms", file=salida)
+    for (etapa, _, lineas), (siguiente, _, _) in zip(etapas, etapas[1:] + [("cierre", None, None)]):
+        paquetes = resumir_importtime(lineas)
+        if not paquetes:
+            continue
+        print(f"Imports entre '{etapa}' y '{siguiente}' (acumulado por paquete, -X importtime):", file=salida)
+        for paquete, ms in paquetes[:PAQUETES_REPORTE]:
+            print(f"    {paquete:<28}{ms:8.1f} ms", file=salida)
+        if len(paquetes) > PAQUETES_REPORTE:
+            resto = sum(ms for _, ms in paquetes[PAQUETES_REPORTE:])
+            print(f"    {f'(otros {len(paquetes) - PAQUETES_REPORTE})':<28}{resto:8.1f} ms", file=salida)
+    if codigo != 0:
+        errores = [l for _, _, lineas in etapas for l in lineas if not l.startswith(PREFIJO_IMPORTTIME)]
+        print("".join(errores[-20:]), end="", file=sys.stderr)
+    return codigo
@@ -0,0 +1,59 @@
+import time
+
+
+# --- CONSTANTES DEL PLANIFICADOR ---
+FPS_MAXIMO = 60  # Redibujos por segundo como máximo
+
+
+class PlanificadorRedibujo:
+    """
+    Junta los pedidos de redibujo (sliders, comboboxes, resize) en a lo
+    sumo uno por cuadro. pedir() sólo marca la vista como sucia y programa
+    con root.after un único redibujo; los pedidos que llegan antes de que
+    se ejecute quedan absorbidos por él. Cuenta pedidos y redibujos reales.
+    """
+
+    def __init__(self, root, redibujar, fps=FPS_MAXIMO):
+        self.root = root
+        self.redibujar = redibujar
+        self.intervalo = 1.0 / fps
+        self.sucio = False
+        self.solicitados = 0
+        self.ejecutados = 0
+        self._pendiente = None
+        self._ultimo = 0.0
+
+    @property
+    def descartados(self):
+        """Pedidos absorbidos por un redibujo posterior."""
+        return self.solicitados - self.ejecutados
+
+    def estadisticas(self):
+        return {'solicitados': self.solicitados, 'ejecutados': self.ejecutados,
+                'descartados': self.descartados}
+
+    def pedir(self, event=None):
+        """Marca la vista como sucia; el redibujo ocurre en el próximo cuadro libre."""
+        self.solicitados += 1
+        self.sucio = True
+        if self._pendiente is None:
+            espera = self.intervalo - (time.perf_counter() - self._ultimo)
+            self._pendiente = self.root.after(max(int(espera * 1000), 1), self._ejecutar)
+
+    def ahora(self):
+        """Redibuja ya (p. ej. al terminar de cargar un archivo), cancelando el pendiente."""
+        if self._pendiente is not None:
+            self.root.after_cancel(self._pendiente)
+            self._pendiente = None
+        self.solicitados += 1
+        self.sucio = True
+        self._ejecutar()
+
+    def _ejecutar(self):
+        self._pendiente = None
+        if not self.sucio:
+            return
+        self.sucio = False
+        self.ejecutados += 1
+        self._ultimo = time.perf_counter()
+        self.redibujar()
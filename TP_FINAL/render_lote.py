@@ -0,0 +1,208 @@
+"""
+Render por lotes, sin ventana: dibuja cada captura de una carpeta con la
+misma lógica de TC1ScopeApp (time/div, volt/div, offsets, tema, detección
+de Bode) y la guarda como PNG o SVG. Cada captura va a un proceso del pool.
+
+    python render_lote.py CARPETA [--salida DIR] [--formato svg] [--time-div "1 ms/div"]
+                          [--volt-div "1 V/div,100 mV/div"] [--offsets 0,-2] [--dark]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use("Agg") # Antes de importar pyplot (lo importa gui1_14): sin Tk
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from canales import AlmacenCanales
+from carga_csv import cargar_captura, columnas_bode
+from decimacion import METODOS_DECIMACION
+from formatos_columnares import EXTENSIONES_COLUMNARES
+from gui1_14 import (TC1ScopeApp, tabla_bode, tiempo_div_automatico, TIEMPOS_POR_DIV, VOLTAJES_POR_DIV,
+                     LIGHT_MODE_COLORS, DARK_MODE_COLORS, OSCILLOSCOPE_SCREEN_WIDTH_CM,
+                     OSCILLOSCOPE_SCREEN_HEIGHT_CM)
+
+
+# --- CONSTANTES DEL RENDER POR LOTES ---
+FORMATOS_SALIDA = ["png", "svg"]
+DPI_SALIDA = 150
+EXTENSIONES_CAPTURA = (".csv",) + EXTENSIONES_COLUMNARES
+
+
+class Valor:
+    """Reemplazo de tk.StringVar/BooleanVar (get/set) para usar TC1ScopeApp sin Tk."""
+
+    def __init__(self, valor=None):
+        self.valor = valor
+
+    def get(self):
+        return self.valor
+
+    def set(self, valor):
+        self.valor = valor
+
+
+class EscopioSinVentana(TC1ScopeApp):
+    """
+    TC1ScopeApp sin Tk: los controles son Valor y la figura usa un canvas
+    Agg. Se reusan construir_vista, actualizar_vista y plot_bode tal cual;
+    sólo cambian la carga (síncrona) y lo que en la GUI es un widget.
+    """
+
+    def __init__(self, oscuro=False, decimacion=METODOS_DECIMACION[0]):
+        self.inicializar_estado(lambda clase, valor: Valor(valor))
+        # Lo que en la GUI crean los widgets (create_widgets y apply_theme)
+        self.current_colors = DARK_MODE_COLORS if oscuro else LIGHT_MODE_COLORS
+        self.tiempos_por_div = TIEMPOS_POR_DIV
+        self.voltajes_por_div = VOLTAJES_POR_DIV
+        self.var_tiempo_div = Valor(TIEMPOS_POR_DIV[9][0])
+        self.var_decimacion = Valor(decimacion)
+        self.volt_div_vars = []
+        self.var_perfil.set(False) # Sin overlay de tiempos en las imágenes
+        self._ajustando_limites = True # No hay toolbar: los cambios de límites son siempre propios
+        ancho_in = OSCILLOSCOPE_SCREEN_WIDTH_CM / 2.54
+        alto_in = OSCILLOSCOPE_SCREEN_HEIGHT_CM / 2.54
+        self.fig = Figure(figsize=(ancho_in, alto_in))
+        self.fig.subplots_adjust(left=0.05, right=0.95, top=0.9, bottom=0.1)
+        self.canvas = FigureCanvasAgg(self.fig)
+
+    def cargar(self, ruta):
+        """
+        Como abrir_csv + captura_cargada, pero en el acto y con ValueError en
+        lugar de diálogos. Usa el cache binario si existe pero no lo escribe.
+        """
+        self.mostrar_captura(*cargar_captura(ruta, escribir_cache=False))
+
+    def mostrar_captura(self, nombres, datos, indice):
+        """La parte de captura_cargada que prepara la vista con lo que devolvió cargar_captura."""
+        if len(nombres) < 2 or datos.shape[1] == 0:
+            raise ValueError("No quedan al menos dos columnas numéricas con datos tras la limpieza.")
+        bode = columnas_bode(nombres)
+        if bode:
+            self.is_bode = True
+            self.df = tabla_bode(nombres, datos, bode)
+            return
+        self.almacen = AlmacenCanales(datos[0], datos[1:], nombres[1:], indice)
+        self.volt_div_vars = [Valor("1 V/div") for _ in range(self.almacen.n_canales)]
+        self.mostrar_canales = [Valor(True) for _ in range(self.almacen.n_canales)]
+        self.var_tiempo_div.set(tiempo_div_automatico(self.almacen.tiempo[-1] - self.almacen.tiempo[0]))
+
+    def pedir_mediciones(self, i_ini, i_fin, visibles):
+        pass # Sin tabla de mediciones
+
+    def dibujar(self):
+        if self.is_bode:
+            self.plot_bode()
+            return
+        self.construir_vista()
+        self.actualizar_vista()
+
+
+def etiqueta_escala(texto, escalas):
+    """Etiqueta de 'escalas' que corresponde a lo escrito ('1ms', '1 us/div', '1 μs/div', ...)."""
+    normalizado = texto.replace(" ", "").replace("u", "μ").replace("µ", "μ").removesuffix("/div")
+    for etiqueta, _ in escalas:
+        if etiqueta.replace(" ", "").removesuffix("/div") == normalizado:
+            return etiqueta
+    raise ValueError(f"Escala desconocida: '{texto}'")
+
+
+def renderizar(ruta, destino, opciones):
+    """Dibuja una captura y la guarda en 'destino'. Devuelve los segundos que tardó."""
+    inicio = time.perf_counter()
+    escopio = EscopioSinVentana(opciones.dark, opciones.decimacion)
+    escopio.cargar(ruta)
+    if escopio.almacen is not None:
+        if opciones.time_div:
+            escopio.var_tiempo_div.set(etiqueta_escala(opciones.time_div, TIEMPOS_POR_DIV))
+        escopio.offset_divisiones = opciones.offset_tiempo
+        # Un valor por canal; si hay menos valores que canales se repite el último
+        volt_div = [etiqueta_escala(v, VOLTAJES_POR_DIV) for v in opciones.volt_div.split(",")]
+        offsets = [float(o) for o in opciones.offsets.split(",")]
+        for c in range(escopio.almacen.n_canales):
+            escopio.volt_div_vars[c].set(volt_div[min(c, len(volt_div) - 1)])
+            # Como el slider de offset: divisiones del canal -> V
+            escopio.almacen.offsets[c] = offsets[min(c, len(offsets) - 1)] * escopio.factor_volt_div(c)
+    escopio.dibujar()
+    escopio.fig.savefig(destino, dpi=DPI_SALIDA, facecolor=escopio.fig.get_facecolor())
+    return time.perf_counter() - inicio
+
+
+def _trabajo(argumentos):
+    """Punto de entrada de cada proceso: no deja escapar excepciones sin contexto."""
+    ruta, destino, opciones = argumentos
+    try:
+        return ruta, destino, renderizar(ruta, destino, opciones), None
+    except Exception as e:
+        return ruta, destino, 0.0, f"{type(e).__name__}: {e}"
+
+
+def capturas(carpeta):
+    """Capturas de la carpeta (CSV o columnares), ordenadas por nombre."""
+    return sorted(os.path.join(carpeta, nombre) for nombre in os.listdir(carpeta)
+                  if nombre.lower().endswith(EXTENSIONES_CAPTURA))
+
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Renderiza sin ventana las capturas de una carpeta.")
+    parser.add_argument("carpeta")
+    parser.add_argument("--salida", help="Carpeta de las imágenes (por defecto, la de las capturas)")
+    parser.add_argument("--formato", choices=FORMATOS_SALIDA, default=FORMATOS_SALIDA[0])
+    parser.add_argument("--time-div", help="Escala de tiempo, p. ej. '1 ms/div' (por defecto, automática)")
+    parser.add_argument("--volt-div", default="1 V/div", help="Volt/div por canal, separados por comas")
+    parser.add_argument("--offsets", default="0", help="Offset de cada canal en divisiones, separados por comas")
+    parser.add_argument("--offset-tiempo", type=float, default=0.0, help="Offset de tiempo en divisiones")
+    parser.add_argument("--decimacion", choices=METODOS_DECIMACION, default=METODOS_DECIMACION[0])
+    parser.add_argument("--dark", action="store_true", help="Tema oscuro")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count(), help="Procesos del pool (uno por núcleo)")
+    opciones = parser.parse_args(argv)
+    # Verifica las escalas y offsets antes de lanzar los procesos
+    escalas = [(opciones.time_div, TIEMPOS_POR_DIV)] if opciones.time_div else []
+    escalas += [(valor, VOLTAJES_POR_DIV) for valor in opciones.volt_div.split(",")]
+    for texto, posibles in escalas:
+        try:
+            etiqueta_escala(texto, posibles)
+        except ValueError as e:
+            parser.error(f"{e}; se puede usar {', '.join(etiqueta for etiqueta, _ in posibles)}")
+    try:
+        [float(o) for o in opciones.offsets.split(",")]
+    except ValueError:
+        parser.error(f"Offsets inválidos: '{opciones.offsets}' (divisiones separadas por comas, p. ej. 0,-2)")
+    return opciones
+
+
+def main(argv=None):
+    opciones = parsear_argumentos(argv)
+    salida = opciones.salida or opciones.carpeta
+    os.makedirs(salida, exist_ok=True)
+    rutas = capturas(opciones.carpeta)
+    bases = [os.path.splitext(os.path.basename(ruta))[0] for ruta in rutas]
+    # Si hay la misma captura en varios formatos (x.csv y x.parquet) se agrega la extensión al nombre
+    trabajos = [(ruta, os.path.join(salida, (base if bases.count(base) == 1 else
+                                             os.path.basename(ruta).replace(".", "_")) + "." + opciones.formato),
+                 opciones) for ruta, base in zip(rutas, bases)]
+    if not trabajos:
+        print(f"No hay capturas en {opciones.carpeta}", file=sys.stderr)
+        return 1
+
+    inicio = time.perf_counter()
+    fallidos = 0
+    with ProcessPoolExecutor(max_workers=max(opciones.procesos, 1)) as pool:
+        for hecho in as_completed([pool.submit(_trabajo, t) for t in trabajos]):
+            ruta, destino, segundos, error = hecho.result()
+            if error:
+                fallidos += 1
+                print(f"ERROR {ruta}: {error}", file=sys.stderr)
+            else:
+                print(f"{destino} ({segundos * 1000:.0f} ms)")
+    total = time.perf_counter() - inicio
+    print(f"{len(trabajos) - fallidos}/{len(trabajos)} capturas en {total:.1f} s "
+          f"con {opciones.procesos} procesos")
+    return 1 if fallidos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import os
+import numpy as np
+
+from carga_csv import detectar_formato, inicio_datos, parsear_bytes
+from indice_bloques import IndiceBloques
+
+
+# --- CONSTANTES DE SEGUIMIENTO ---
+CAPACIDAD_SEGUIMIENTO = 1_000_000  # Muestras por canal que se conservan en modo seguimiento
+INTERVALO_SEGUIMIENTO_MS = 50      # Refresco máximo de la vista (20 cuadros por segundo)
+MODOS_SEGUIMIENTO = ["roll", "sweep"]
+MARGEN_INICIO = 1.2                # Al empezar se leen ~1.2 x capacidad filas del final
+
+
+class BufferCircular:
+    """
+    Buffer de capacidad fija (columnas x capacidad). Agregar filas nuevas
+    pisa las más viejas, así la memoria no crece durante una adquisición
+    larga. ordenado() devuelve el contenido en orden temporal en un array
+    nuevo cada vez: el anterior puede seguir en uso por un trabajo.
+    """
+
+    def __init__(self, n_columnas, capacidad=CAPACIDAD_SEGUIMIENTO):
+        self.capacidad = capacidad
+        self.datos = np.empty((n_columnas, capacidad))
+        self.inicio = 0  # Posición de la muestra más vieja
+        self.n = 0       # Muestras válidas
+
+    def vaciar(self):
+        self.inicio = 0
+        self.n = 0
+
+    def agregar(self, bloque):
+        """Agrega un bloque (columnas x filas) al final, descartando lo más viejo."""
+        filas = bloque.shape[1]
+        if filas == 0:
+            return
+        if filas >= self.capacidad:
+            self.datos[:] = bloque[:, -self.capacidad:]
+            self.inicio, self.n = 0, self.capacidad
+            return
+        fin = (self.inicio + self.n) % self.capacidad
+        primera = min(filas, self.capacidad - fin)
+        self.datos[:, fin:fin + primera] = bloque[:, :primera]
+        self.datos[:, :filas - primera] = bloque[:, primera:]
+        sobrante = max(self.n + filas - self.capacidad, 0)
+        self.inicio = (self.inicio + sobrante) % self.capacidad
+        self.n = min(self.n + filas, self.capacidad)
+
+    def ordenado(self, bloque=None, vaciar=False):
+        """
+        Contenido en orden temporal (columnas x n) en un array nuevo. Con
+        'bloque' (y 'vaciar') da lo que quedaría después de vaciar() y
+        agregar(bloque), sin modificar el buffer: así se puede armar en un
+        hilo de trabajo mientras el de Tk sigue con la copia anterior.
+        """
+        n_bloque = 0 if bloque is None else min(bloque.shape[1], self.capacidad)
+        viejas = 0 if vaciar else min(self.n, self.capacidad - n_bloque)
+        salida = np.empty((self.datos.shape[0], viejas + n_bloque))
+        desde = (self.inicio + self.n - viejas) % self.capacidad # Las 'viejas' más recientes
+        cola = min(viejas, self.capacidad - desde)
+        salida[:, :cola] = self.datos[:, desde:desde + cola]
+        salida[:, cola:viejas] = self.datos[:, :viejas - cola]
+        if n_bloque:
+            salida[:, viejas:] = bloque[:, bloque.shape[1] - n_bloque:]
+        return salida
+
+
+class SeguidorCSV:
+    """
+    Sigue un CSV que se sigue escribiendo: recuerda hasta qué byte se leyó
+    y en cada consulta parsea sólo las filas completas agregadas desde ahí.
+    leer_nuevo() no modifica el estado (puede correr en un hilo de trabajo);
+    aplicar() lo actualiza en el hilo de la GUI.
+    """
+
+    def __init__(self, ruta, capacidad=CAPACIDAD_SEGUIMIENTO):
+        self.ruta = ruta
+        self.formato = detectar_formato(ruta)
+        self.nombres = [self.formato['nombres'][k] for k in self.formato['columnas']]
+        self.buffer = BufferCircular(len(self.nombres), capacidad)
+        self.inicio_datos = inicio_datos(ruta, self.formato)
+        self.offset = self._posicion_inicial()
+
+    def _posicion_inicial(self):
+        """
+        Si el archivo ya es grande no tiene sentido leerlo entero: se arranca
+        cerca del final, con lugar para ~capacidad filas, al comienzo de una línea.
+        """
+        tamano = os.path.getsize(self.ruta)
+        with open(self.ruta, 'rb') as f:
+            f.seek(self.inicio_datos)
+            muestra = f.read(1 << 16)
+        lineas = muestra.count(b'\n')
+        if lineas == 0:
+            return self.inicio_datos
+        bytes_fila = len(muestra) / lineas
+        desde = int(tamano - MARGEN_INICIO * self.buffer.capacidad * bytes_fila)
+        if desde <= self.inicio_datos:
+            return self.inicio_datos
+        with open(self.ruta, 'rb') as f:
+            f.seek(desde)
+            f.readline() # Descarta la línea cortada
+            return f.tell()
+
+    def leer_nuevo(self, progreso=None):
+        """
+        Lee las filas completas agregadas desde el último offset. Devuelve
+        (datos, offset_nuevo, reinicio, ordenado, indice); 'reinicio' indica
+        que el archivo se truncó o se reemplazó y hay que empezar de nuevo
+        desde los datos. 'ordenado' es el contenido que tendrá el buffer
+        después de aplicar() (un array nuevo) e 'indice' su IndiceBloques,
+        armados acá para no hacerlo en el hilo de Tk; si no hay filas
+        nuevas son None.
+        """
+        offset = self.offset
+        reinicio = os.path.getsize(self.ruta) < offset
+        if reinicio:
+            offset = self.inicio_datos
+        with open(self.ruta, 'rb') as f:
+            f.seek(offset)
+            contenido = f.read()
+        # La última línea puede estar a medio escribir: queda para la próxima
+        fin = contenido.rfind(b'\n') + 1
+        datos = parsear_bytes(contenido[:fin], self.formato)
+        if datos.shape[1] == 0 and not reinicio:
+            return datos, offset + fin, reinicio, None, None
+        ordenado = self.buffer.ordenado(datos, vaciar=reinicio)
+        return datos, offset + fin, reinicio, ordenado, IndiceBloques(ordenado[1:])
+
+    def aplicar(self, resultado):
+        """Incorpora al buffer lo leído por leer_nuevo. Devuelve True si hubo filas nuevas."""
+        datos, offset, reinicio = resultado[:3]
+        if reinicio:
+            self.buffer.vaciar()
+        self.offset = offset
+        self.buffer.agregar(datos)
+        return datos.shape[1] > 0 or reinicio
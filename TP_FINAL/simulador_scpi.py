@@ -0,0 +1,274 @@
+"""
+Osciloscopio SCPI simulado para probar la adquisición (adquisicion.py)
+sin hardware. Escucha en TCP como el puerto 5025 de los Rigol DS1000Z y
+responde el subconjunto de comandos que usa el cliente: *IDN?, :SING,
+:TRIG:STAT?, :WAV:SOUR/MODE/FORM/POIN, :WAV:PRE? y :WAV:DATA? (bloque
+binario IEEE 488.2 '#9...'). CH1 es la entrada y CH2 la tensión en el
+capacitor del RLC serie del grupo (R = 50 Ω, L = 1 mH, C = 47 nF), con
+un escalón o un seno a la entrada, ruido y un poco de jitter de disparo.
+
+    python simulador_scpi.py [--host 127.0.0.1] [--puerto 5025] [--puntos 12000]
+                             [--senal escalon|seno] [--sin-demora]
+"""
+import argparse
+import asyncio
+import sys
+
+import numpy as np
+
+
+# --- CONSTANTES DEL SIMULADOR ---
+HOST_SIMULADOR = "127.0.0.1"
+PUERTO_SCPI = 5025                 # Puerto SCPI "raw socket" de los osciloscopios
+IDN_SIMULADOR = "TC-grupo-5,SIMULADOR-RLC,0,1.0"
+R_SIMULADOR, L_SIMULADOR, C_SIMULADOR = 50.0, 1e-3, 47e-9  # Circuito RLC serie (2.2/filtros.py)
+SENALES_SIMULADOR = {"STEP": "escalon", "SINE": "seno"}
+PUNTOS_SIMULADOR = 12_000          # Profundidad de memoria por defecto
+DIVISIONES_SIMULADOR = 12          # Divisiones horizontales de la pantalla (Rigol)
+ESCALA_TIEMPO_SIMULADOR = 20e-6    # s/div: se ven ~5 ciclos de la resonancia y la oscilación del escalón
+ESCALA_TENSION_SIMULADOR = 0.5     # V/div de los canales
+CODIGOS_POR_DIVISION = {"BYTE": 25, "WORD": 25 * 256}  # Cuantización de :WAV:DATA?
+REFERENCIA_Y = {"BYTE": 127, "WORD": 32767}
+AMPLITUD_SIMULADOR = 1.0           # V del escalón o pico del seno de entrada
+RUIDO_SIMULADOR = 0.01             # V rms de ruido en cada canal
+JITTER_SIMULADOR = 2               # Muestras de jitter del disparo (±)
+CANALES_SIMULADOR = 2
+
+
+def respuesta_rlc(tiempo, senal, frecuencia):
+    """
+    Entrada y tensión en el capacitor del RLC serie (pasa-bajos
+    wo² / (s² + s R/L + wo²)) para un escalón en t = 0 o un seno de
+    'frecuencia' Hz en régimen permanente.
+    """
+    wo2 = 1 / (L_SIMULADOR * C_SIMULADOR)
+    alfa = R_SIMULADOR / (2 * L_SIMULADOR)
+    if senal == "escalon":
+        entrada = AMPLITUD_SIMULADOR * (tiempo >= 0)
+        t = np.maximum(tiempo, 0)
+        wd = np.sqrt(complex(wo2 - alfa ** 2)) # Imaginaria si fuera sobreamortiguado: cosh/sinh
+        salida = 1 - np.exp(-alfa * t) * (np.cos(wd * t) + alfa * np.sin(wd * t) / wd).real
+        return entrada, AMPLITUD_SIMULADOR * salida * (tiempo >= 0)
+    w = 2 * np.pi * frecuencia
+    transferencia = wo2 / (wo2 - w ** 2 + 2j * alfa * w)
+    entrada = AMPLITUD_SIMULADOR * np.sin(w * tiempo)
+    salida = AMPLITUD_SIMULADOR * abs(transferencia) * np.sin(w * tiempo + np.angle(transferencia))
+    return entrada, salida
+
+
+class OsciloscopioSimulado:
+    """
+    Estado del instrumento, compartido por todas las conexiones como en
+    uno real (la fuente de :WAV:DATA? es una sola). :SING arma una
+    captura que queda lista cuando pasó su duración (puntos x xinc, si
+    'demora'); hasta entonces :TRIG:STAT? responde WAIT.
+    """
+
+    def __init__(self, puntos=PUNTOS_SIMULADOR, senal="escalon", demora=True, semilla=None):
+        self.puntos = puntos
+        self.senal = senal
+        self.frecuencia = 1 / (2 * np.pi * np.sqrt(L_SIMULADOR * C_SIMULADOR)) # Resonancia
+        self.escala_tiempo = ESCALA_TIEMPO_SIMULADOR
+        self.demora = demora
+        self.fuente = 1
+        self.formato = "BYTE"
+        self.errores = []
+        self.capturas = 0
+        self._lista = 0.0        # loop.time() en que termina la captura armada
+        self._datos = None       # (canales, puntos) en V de la última captura
+        self._ideal = None       # (clave, forma de onda sin ruido, banco de ruido)
+        self._rng = np.random.default_rng(semilla)
+
+    @property
+    def xinc(self):
+        return self.escala_tiempo * DIVISIONES_SIMULADOR / self.puntos
+
+    def _formas(self):
+        """
+        Respuesta sin ruido con JITTER_SIMULADOR muestras de más a cada
+        lado y un banco de ruido del doble de largo; se calculan una vez
+        por configuración, así generar una captura cuesta sólo copiar.
+        """
+        clave = (self.senal, self.frecuencia, self.puntos, self.xinc)
+        if self._ideal is None or self._ideal[0] != clave:
+            n = np.arange(-JITTER_SIMULADOR, self.puntos + JITTER_SIMULADOR)
+            tiempo = (n - self.puntos // 2) * self.xinc # Disparo en el centro de la pantalla
+            ruido = self._rng.normal(0.0, RUIDO_SIMULADOR, (CANALES_SIMULADOR, 2 * self.puntos))
+            self._ideal = (clave, np.stack(respuesta_rlc(tiempo, self.senal, self.frecuencia)), ruido)
+        return self._ideal[1], self._ideal[2]
+
+    def disparar(self, ahora):
+        """:SING: genera la captura (forma ideal corrida por el jitter, más un tramo del banco de ruido)."""
+        ideal, ruido = self._formas()
+        corrimiento = int(self._rng.integers(0, 2 * JITTER_SIMULADOR + 1))
+        desde = int(self._rng.integers(0, self.puntos + 1))
+        self._datos = ideal[:, corrimiento:corrimiento + self.puntos] + ruido[:, desde:desde + self.puntos]
+        self._lista = ahora + (self.puntos * self.xinc if self.demora else 0.0)
+        self.capturas += 1
+
+    def estado_disparo(self, ahora):
+        if self._datos is None:
+            return "STOP"
+        return "STOP" if ahora >= self._lista else "WAIT"
+
+    def _escala_y(self):
+        """(yinc, yorig, yref) del formato actual."""
+        return (ESCALA_TENSION_SIMULADOR / CODIGOS_POR_DIVISION[self.formato], 0, REFERENCIA_Y[self.formato])
+
+    def preambulo(self):
+        """:WAV:PRE?: formato, tipo, puntos, promedios, xinc, xorig, xref, yinc, yorig, yref."""
+        yinc, yorig, yref = self._escala_y()
+        formato = list(CODIGOS_POR_DIVISION).index(self.formato)
+        xorig = -(self.puntos // 2) * self.xinc
+        return f"{formato},0,{self.puntos},1,{self.xinc:.6e},{xorig:.6e},0,{yinc:.6e},{yorig},{yref}"
+
+    def forma_de_onda(self):
+        """:WAV:DATA? de la fuente actual: bloque '#9<largo><códigos>' (WORD en little endian)."""
+        if self._datos is None:
+            self.disparar(0.0)
+        yinc, yorig, yref = self._escala_y()
+        tipo = np.uint8 if self.formato == "BYTE" else np.dtype("<u2")
+        maximo = np.iinfo(tipo).max
+        codigos = np.clip(np.rint(self._datos[self.fuente - 1] / yinc) + yorig + yref, 0, maximo).astype(tipo)
+        crudo = codigos.tobytes()
+        return f"#9{len(crudo):09d}".encode() + crudo + b"\n"
+
+    def error(self, codigo, mensaje):
+        self.errores.append(f'{codigo},"{mensaje}"')
+
+    def ejecutar(self, comando, ahora):
+        """
+        Un comando SCPI (sin ';'). Devuelve la respuesta en bytes (con
+        '\\n') o None si no es una consulta. Los errores quedan para :SYST:ERR?.
+        """
+        partes = comando.strip().split(None, 1)
+        if not partes:
+            return None
+        cabecera = partes[0].upper().lstrip(":")
+        argumento = partes[1].strip() if len(partes) > 1 else ""
+        try:
+            respuesta = self._responder(cabecera, argumento, ahora)
+        except (ValueError, IndexError):
+            self.error(-224, "Illegal parameter value")
+            return None
+        if respuesta is None:
+            return None
+        return respuesta if isinstance(respuesta, bytes) else f"{respuesta}\n".encode()
+
+    def _responder(self, cabecera, argumento, ahora):
+        if cabecera == "*IDN?":
+            return IDN_SIMULADOR
+        if cabecera == "*OPC?":
+            return "1"
+        if cabecera in ("*RST", "*CLS", "RUN", "STOP", "WAV:MODE"):
+            if cabecera == "*CLS":
+                del self.errores[:]
+            return None
+        if cabecera in ("SING", "SINGLE"):
+            self.disparar(ahora)
+            return None
+        if cabecera in ("TRIG:STAT?", "TRIGGER:STATUS?"):
+            return self.estado_disparo(ahora)
+        if cabecera in ("WAV:SOUR", "WAVEFORM:SOURCE"):
+            canal = int(argumento.upper().removeprefix("CHANNEL").removeprefix("CHAN"))
+            if not 1 <= canal <= CANALES_SIMULADOR:
+                raise ValueError(argumento)
+            self.fuente = canal
+            return None
+        if cabecera == "WAV:SOUR?":
+            return f"CHAN{self.fuente}"
+        if cabecera in ("WAV:FORM", "WAVEFORM:FORMAT"):
+            formato = argumento.upper()
+            if formato not in CODIGOS_POR_DIVISION:
+                raise ValueError(argumento)
+            self.formato = formato
+            return None
+        if cabecera in ("WAV:POIN", "ACQ:MDEP"):
+            self.puntos = max(int(float(argumento)), 2)
+            return None
+        if cabecera in ("WAV:POIN?", "ACQ:MDEP?"):
+            return str(self.puntos)
+        if cabecera in ("TIM:SCAL", "TIM:MAIN:SCAL"):
+            self.escala_tiempo = float(argumento)
+            return None
+        if cabecera in ("TIM:SCAL?", "TIM:MAIN:SCAL?"):
+            return f"{self.escala_tiempo:.6e}"
+        if cabecera in ("WAV:PRE?", "WAVEFORM:PREAMBLE?"):
+            return self.preambulo()
+        if cabecera in ("WAV:DATA?", "WAVEFORM:DATA?"):
+            return self.forma_de_onda()
+        if cabecera.startswith("CHAN") and cabecera.endswith(":DISP?"):
+            return "1" if 1 <= int(cabecera[4:-6]) <= CANALES_SIMULADOR else "0"
+        # Comandos propios del simulador: forma de la entrada
+        if cabecera == "SIM:SIGN":
+            self.senal = SENALES_SIMULADOR[argumento.upper()]
+            return None
+        if cabecera == "SIM:FREQ":
+            self.frecuencia = float(argumento)
+            return None
+        if cabecera == "SYST:ERR?":
+            return self.errores.pop(0) if self.errores else '0,"No error"'
+        self.error(-113, "Undefined header")
+        return None
+
+
+async def atender(osciloscopio, lector, escritor):
+    """Una conexión: cada línea puede traer varios comandos separados por ';'."""
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            linea = await lector.readline()
+            if not linea:
+                break
+            for comando in linea.decode("ascii", errors="replace").split(";"):
+                respuesta = osciloscopio.ejecutar(comando, loop.time())
+                if respuesta is not None:
+                    escritor.write(respuesta)
+            if escritor.transport.get_write_buffer_size() > 0:
+                await escritor.drain()
+    except ConnectionError:
+        pass
+    finally:
+        escritor.close()
+
+
+async def iniciar_simulador(host=HOST_SIMULADOR, puerto=PUERTO_SCPI, **opciones):
+    """
+    Levanta el servidor en el loop actual y devuelve (servidor,
+    osciloscopio). Con puerto 0 el sistema elige uno libre:
+    servidor.sockets[0].getsockname()[1].
+    """
+    osciloscopio = OsciloscopioSimulado(**opciones)
+    servidor = await asyncio.start_server(lambda l, e: atender(osciloscopio, l, e), host, puerto)
+    return servidor, osciloscopio
+
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Osciloscopio SCPI simulado (respuesta de un RLC serie).")
+    parser.add_argument("--host", default=HOST_SIMULADOR)
+    parser.add_argument("--puerto", type=int, default=PUERTO_SCPI)
+    parser.add_argument("--puntos", type=int, default=PUNTOS_SIMULADOR, help="Muestras por canal de cada captura")
+    parser.add_argument("--senal", choices=list(SENALES_SIMULADOR.values()), default="escalon")
+    parser.add_argument("--sin-demora", action="store_true",
+                        help="Las capturas están listas al instante (sin esperar su duración)")
+    return parser.parse_args(argv)
+
+
+async def _servir(opciones):
+    servidor, _ = await iniciar_simulador(opciones.host, opciones.puerto, puntos=opciones.puntos,
+                                          senal=opciones.senal, demora=not opciones.sin_demora)
+    print(f"Simulador SCPI en {opciones.host}:{servidor.sockets[0].getsockname()[1]} (Ctrl+C para salir)", flush=True)
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def main(argv=None):
+    try:
+        asyncio.run(_servir(parsear_argumentos(argv)))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+import os
+
+import numpy as np
+
+from canales import AlmacenCanales
+from carga_csv import cargar_captura, columnas_bode
+from indice_bloques import IndiceBloques
+
+
+# --- CONSTANTES DE LA SUPERPOSICIÓN ---
+MAX_SUPERPUESTAS = 16          # Capturas que se pueden superponer a la vez
+TAM_BLOQUE_SUPERPOSICION = 16  # Bloques finos: la envolvente de ventanas anchas sale del índice
+# Colores por defecto; los primeros evitan los de CH1/CH2 de ambos temas
+COLORES_SUPERPOSICION = ["#d62728", "#9467bd", "#2ca02c", "#8c564b", "#e377c2",
+                         "#7f7f7f", "#bcbd22", "#17becf", "#ff7f0e", "#1f77b4"]
+ALFA_SUPERPOSICION = 0.8       # Opacidad de los trazos superpuestos
+MUESTRAS_POR_PUNTO = 2         # Con más muestras por punto de la base común se dibuja la envolvente min/max
+
+
+def base_comun(t_ini, t_fin, n_puntos):
+    """
+    Base de tiempo compartida por todas las capturas superpuestas: el
+    centro de cada una de las n_puntos columnas entre t_ini y t_fin.
+    """
+    paso = (t_fin - t_ini) / n_puntos
+    return t_ini + (np.arange(n_puntos) + 0.5) * paso
+
+
+def cargar_superpuesta(ruta, progreso=None):
+    """
+    Carga una captura para superponer (ver carga_csv.cargar_captura: con
+    el cache binario las muestras son un memmap y no se copian) con un
+    índice de bloques de TAM_BLOQUE_SUPERPOSICION muestras, así la
+    envolvente de una ventana ancha sale del índice y no de las muestras.
+    Corre en un hilo de trabajo.
+    """
+    nombres, datos, _ = cargar_captura(ruta, progreso)
+    if len(nombres) < 2 or datos.shape[1] < 2 or columnas_bode(nombres):
+        raise ValueError("Sólo se pueden superponer capturas de osciloscopio.")
+    return AlmacenCanales(datos[0], datos[1:], nombres[1:], IndiceBloques(datos[1:], TAM_BLOQUE_SUPERPOSICION))
+
+
+def rasterizar(trazas, colores, y_min, y_max, alto):
+    """
+    Pinta las trazas en una imagen RGBA (alto, columnas), con la fila 0
+    abajo. Cada traza es (mínimo, máximo) intercalados por columna, en
+    las mismas unidades que y_min/y_max; en cada columna se pinta el
+    segmento vertical de mínimo a máximo, estirado hasta la columna
+    vecina para que el trazo quede continuo. Las trazas posteriores tapan
+    a las anteriores; lo no pintado queda transparente. Cuesta lo mismo
+    con 10^3 o 10^7 muestras por captura: una pasada por los píxeles
+    que ocupa cada traza.
+    """
+    columnas = len(trazas[0]) // 2 if trazas else 0
+    # Se pinta por columnas (columnas, alto): cada comparación recorre memoria contigua
+    indice = np.zeros((columnas, alto), dtype=np.uint8) # 0: transparente, k: traza k - 1
+    filas = np.arange(alto, dtype=np.uint16)
+    escala = alto / (y_max - y_min)
+    for k, traza in enumerate(trazas):
+        bajo = (traza[0::2] - y_min) * escala
+        arriba = (traza[1::2] - y_min) * escala
+        bajo[1:], arriba[1:] = np.fmin(bajo[1:], arriba[:-1]), np.fmax(arriba[1:], bajo[:-1])
+        bajo = np.floor(np.clip(bajo, 0, alto))
+        alturas = np.floor(np.clip(arriba, -1, alto - 1)) - bajo
+        vacias = ~(alturas >= 0) # Fuera de la captura (NaN) o de la imagen
+        if vacias.all():
+            continue
+        bajo[vacias], alturas[vacias] = alto + 1, 0
+        f0, f1 = int(bajo.min()), int(np.max((bajo + alturas)[~vacias])) + 1
+        # Una sola comparación sin signo: fila - bajo da la vuelta si la fila está debajo
+        mascara = (filas[f0:f1] - bajo.astype(np.uint16)[:, None]) <= alturas.astype(np.uint16)[:, None]
+        franja = indice[:, f0:f1]
+        np.maximum(franja, mascara.view(np.uint8) * np.uint8(k + 1), out=franja) # Las posteriores tapan
+    paleta = np.zeros((len(trazas) + 1, 4), dtype=np.uint8)
+    paleta[1:] = np.round(np.asarray(colores, dtype=float).reshape(-1, 4) * 255)
+    return np.take(paleta, indice.T, axis=0)
+
+
+class CapturaSuperpuesta:
+    """
+    Captura abierta para compararla con la principal: sus muestras (un
+    AlmacenCanales que puede estar compartido, ver Superposicion) más un
+    corrimiento de tiempo y un color propios. El corrimiento no toca los
+    datos: se resta a la base común al alinearla.
+    """
+
+    def __init__(self, ruta, almacen, color, offset=0.0):
+        self.ruta = ruta
+        self.nombre = os.path.basename(ruta)
+        self.almacen = almacen
+        self.color = color
+        self.offset = offset # s que se suman al tiempo propio de la captura
+
+    def alinear(self, base, canales):
+        """
+        Valores (canales, 2 * puntos) de los canales pedidos sobre la base
+        común, un par (mínimo, máximo) por punto. Sólo se lee la parte de
+        la captura que cae en la ventana. Si hay más de MUESTRAS_POR_PUNTO
+        muestras por punto, cada punto lleva la envolvente min/max de las
+        muestras de su columna (del índice de bloques si la ventana es
+        ancha); si no, las muestras se interpolan linealmente (np.interp)
+        sobre la base y además se vuelcan en su columna, así ningún pico se
+        pierde. Fuera del rango de la captura queda NaN y no se dibuja.
+        """
+        almacen = self.almacen
+        tiempo = almacen.tiempo
+        t = base - self.offset
+        paso = t[1] - t[0]
+        bordes_t = np.append(t - paso / 2, t[-1] + paso / 2) # Bordes de la columna de cada punto
+        salida = np.full((len(canales), len(t), 2), np.nan)
+        dentro = np.flatnonzero((t >= tiempo[0]) & (t <= tiempo[-1]))
+        if not len(dentro) or not len(canales):
+            return salida.reshape(len(canales), 2 * len(t))
+        primero, ultimo = dentro[0], dentro[-1]
+        i_ini, i_fin = almacen.ventana(bordes_t[primero], bordes_t[ultimo + 1])
+
+        if i_fin - i_ini > MUESTRAS_POR_PUNTO * len(dentro):
+            columnas = almacen.indice.minmax_columnas(almacen.datos, i_ini, i_fin, len(dentro))
+            if columnas is not None:
+                # Columnas del índice (mismo ancho que las de la base): a cada punto la más cercana
+                centros, minimos, maximos = columnas
+                t_columnas = tiempo[np.minimum(centros, almacen.n_muestras - 1)]
+                j = np.clip(np.searchsorted(t_columnas, t[dentro]), 1, len(t_columnas) - 1)
+                j -= (t[dentro] - t_columnas[j - 1]) < (t_columnas[j] - t[dentro])
+                salida[:, dentro, 0] = minimos[canales][:, j]
+                salida[:, dentro, 1] = maximos[canales][:, j]
+            else:
+                # Ventana angosta para el índice: reduce las muestras entre los bordes de cada punto
+                bordes = np.searchsorted(tiempo[i_ini:i_fin], bordes_t[primero:ultimo + 1])
+                filas = almacen.datos[canales, i_ini:i_fin]
+                inicios = np.minimum(bordes, filas.shape[-1] - 1)
+                salida[:, dentro, 0] = np.minimum.reduceat(filas, inicios, axis=-1)
+                salida[:, dentro, 1] = np.maximum.reduceat(filas, inicios, axis=-1)
+        else:
+            # Una muestra más a cada lado: los puntos de los bordes se interpolan con ellas
+            i_ini, i_fin = max(i_ini - 1, 0), min(i_fin + 1, almacen.n_muestras)
+            t_ventana = tiempo[i_ini:i_fin]
+            columna = np.searchsorted(bordes_t, t_ventana, side='right') - 1
+            propias = (columna >= 0) & (columna < len(t))
+            for k, c in enumerate(canales):
+                muestras = almacen.datos[c, i_ini:i_fin]
+                salida[k, dentro, 0] = np.interp(t[dentro], t_ventana, muestras)
+                salida[k, dentro, 1] = salida[k, dentro, 0]
+                np.minimum.at(salida[k, :, 0], columna[propias], muestras[propias])
+                np.maximum.at(salida[k, :, 1], columna[propias], muestras[propias])
+        return salida.reshape(len(canales), 2 * len(t))
+
+
+class Superposicion:
+    """
+    Capturas superpuestas a la principal. Las muestras de cada archivo se
+    guardan una sola vez (por ruta real) y las comparten todas las
+    capturas que lo usan, p. ej. el mismo archivo con dos corrimientos, o
+    la captura principal superpuesta a sí misma.
+    """
+
+    def __init__(self):
+        self.capturas = []
+        self._almacenes = {} # ruta real -> AlmacenCanales
+
+    def __len__(self):
+        return len(self.capturas)
+
+    def almacen(self, ruta):
+        """Almacén ya cargado de 'ruta', o None."""
+        return self._almacenes.get(os.path.realpath(ruta))
+
+    def agregar(self, ruta, almacen, offset=0.0, color=None):
+        """
+        Superpone 'almacen' (las muestras de 'ruta'); si el archivo ya
+        estaba cargado se usa el almacén existente. Devuelve la captura.
+        """
+        if len(self.capturas) >= MAX_SUPERPUESTAS:
+            raise ValueError(f"Se pueden superponer hasta {MAX_SUPERPUESTAS} capturas.")
+        almacen = self._almacenes.setdefault(os.path.realpath(ruta), almacen)
+        if color is None:
+            usados = {captura.color for captura in self.capturas}
+            libres = [c for c in COLORES_SUPERPOSICION if c not in usados]
+            color = libres[0] if libres else COLORES_SUPERPOSICION[len(self.capturas) % len(COLORES_SUPERPOSICION)]
+        captura = CapturaSuperpuesta(ruta, almacen, color, offset)
+        self.capturas.append(captura)
+        return captura
+
+    def quitar(self, captura):
+        """Quita la captura; sus muestras se liberan si ninguna otra las usa."""
+        self.capturas.remove(captura)
+        if all(otra.almacen is not captura.almacen for otra in self.capturas):
+            self._almacenes.pop(os.path.realpath(captura.ruta), None)
+
+    def limpiar(self):
+        del self.capturas[:]
+        self._almacenes.clear()
+
+    def series(self, t_ini, t_fin, n_puntos, canales, escalas, offsets):
+        """
+        Por cada captura, (captura, canales, valores en divisiones) sobre
+        la misma base común de n_puntos entre t_ini y t_fin (ver
+        base_comun), con la escala (V/div) y el offset (V) de los canales
+        de la captura principal. Cada captura trae sólo los canales
+        pedidos que tiene; las que no tienen ninguno no aparecen.
+        """
+        base = base_comun(t_ini, t_fin, max(int(n_puntos), 2))
+        series = []
+        for captura in self.capturas:
+            propios = np.asarray([c for c in canales if c < captura.almacen.n_reales], dtype=np.intp)
+            if not len(propios):
+                continue
+            valores = captura.alinear(base, propios)
+            valores += offsets[propios, None]
+            valores /= escalas[propios, None]
+            series.append((captura, propios, valores))
+        return series
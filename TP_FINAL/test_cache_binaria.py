@@ -0,0 +1,39 @@
+import os
+import warnings
+
+import numpy as np
+
+from cache_binaria import cargar_cache, guardar_cache, ruta_cache
+
+
+def escribir_csv(ruta, amplitud):
+    tiempo = np.linspace(0, 1e-3, 1000)
+    datos = np.vstack((tiempo, amplitud * np.sin(2 * np.pi * 1e3 * tiempo)))
+    np.savetxt(ruta, datos.T, delimiter=",", header="Time (s),CH1 (V)", comments="")
+    return datos
+
+
+def test_reescribir_cache_no_trunca_memmaps_abiertos(tmp_path):
+    ruta = str(tmp_path / "captura.csv")
+    datos = escribir_csv(ruta, 1.0)
+    assert guardar_cache(ruta, ["Time (s)", "CH1 (V)"], datos)
+    _, abiertos, _ = cargar_cache(ruta)
+
+    # El CSV cambia y se vuelve a abrir: el memmap anterior sigue leyendo sus datos
+    nuevos = escribir_csv(ruta, 2.0)
+    os.utime(ruta, ns=(1, 1))
+    assert guardar_cache(ruta, ["Time (s)", "CH1 (V)"], nuevos)
+    assert np.array_equal(abiertos, datos)
+    _, recargados, _ = cargar_cache(ruta)
+    assert np.array_equal(recargados, nuevos)
+    assert sorted(os.listdir(ruta_cache(ruta))) == ["datos.npy", "header.json"]
+
+
+def test_cache_en_carpeta_no_escribible_avisa(tmp_path):
+    ruta = str(tmp_path / "captura.csv")
+    datos = escribir_csv(ruta, 1.0)
+    open(ruta_cache(ruta), "w").close() # Un archivo donde iría la carpeta
+    with warnings.catch_warnings(record=True) as avisos:
+        warnings.simplefilter("always")
+        assert not guardar_cache(ruta, ["Time (s)", "CH1 (V)"], datos)
+    assert avisos and issubclass(avisos[0].category, RuntimeWarning)
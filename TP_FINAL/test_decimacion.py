@@ -0,0 +1,25 @@
+import numpy as np
+
+from decimacion import decimar_minmax
+
+
+def test_minmax_reparte_el_resto_entre_las_columnas():
+    n, n_columnas = 2999, 1000
+    tiempo = np.arange(n)
+    valores = np.sin(2 * np.pi * tiempo / 500)
+    t, v = decimar_minmax(tiempo, valores, n_columnas)
+    assert len(v) == 2 * n_columnas
+    # Ningún tramo dibujado salta más de dos columnas (antes las últimas 999 muestras eran uno solo)
+    assert np.diff(t).max() <= 2 * (n // n_columnas + 1)
+    bordes = (np.arange(n_columnas + 1) * n) // n_columnas
+    assert np.array_equal(np.minimum(v[0::2], v[1::2]), np.minimum.reduceat(valores, bordes[:-1]))
+    assert np.array_equal(np.maximum(v[0::2], v[1::2]), np.maximum.reduceat(valores, bordes[:-1]))
+
+
+def test_minmax_varios_canales_igual_que_de_a_uno():
+    valores = np.random.default_rng(0).standard_normal((3, 20001))
+    tiempo = np.arange(valores.shape[1])
+    t, v = decimar_minmax(tiempo, valores, 999)
+    for fila in range(3):
+        t1, v1 = decimar_minmax(tiempo, valores[fila], 999)
+        assert np.array_equal(t[fila], t1) and np.array_equal(v[fila], v1)
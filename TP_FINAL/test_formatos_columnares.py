@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+import formatos_columnares
+from formatos_columnares import escribir_captura, leer_columnar
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.mark.parametrize("extension", [".feather", ".parquet"])
+def test_lee_lotes_escritos_con_otro_tamano(tmp_path, monkeypatch, extension):
+    ruta = str(tmp_path / ("captura" + extension))
+    tiempo = np.linspace(0, 1e-3, 12345)
+    filas = [tiempo, np.sin(2 * np.pi * 1e3 * tiempo), np.cos(2 * np.pi * 1e3 * tiempo)]
+    monkeypatch.setattr(formatos_columnares, "FILAS_POR_GRUPO", 1000)
+    escribir_captura(ruta, ["Time (s)", "CH1 (V)", "CH2 (V)"], filas)
+    monkeypatch.setattr(formatos_columnares, "FILAS_POR_GRUPO", 5432)
+    nombres, datos = leer_columnar(ruta)
+    assert nombres == ["Time (s)", "CH1 (V)", "CH2 (V)"]
+    assert np.allclose(datos, np.stack(filas))
@@ -0,0 +1,22 @@
+import numpy as np
+
+from matematica import TAM_BLOQUE_INTEGRAL, CanalMatematico
+
+
+def test_sumas_de_muestras_viejas_no_se_guardan_si_se_invalida():
+    n = 10 * TAM_BLOQUE_INTEGRAL
+    tiempo = np.linspace(0, 1, n)
+    viejos, nuevos = np.ones((1, n)), 2 * np.ones((1, n))
+    canal = CanalMatematico("∫CH1", 1)
+    original = canal._incrementos
+
+    def incrementos_e_invalidar(*args):
+        # Llegan muestras nuevas (hilo de Tk) mientras un trabajo suma las viejas
+        canal._incrementos = original
+        canal.invalidar()
+        return original(*args)
+
+    canal._incrementos = incrementos_e_invalidar
+    final = tiempo[-1] - tiempo[0]
+    assert np.isclose(canal.integral_hasta(tiempo, viejos, n - 1), final)
+    assert np.isclose(canal.integral_hasta(tiempo, nuevos, n - 1), 2 * final)
@@ -0,0 +1,29 @@
+import numpy as np
+
+from seguimiento import BufferCircular
+
+
+def bloque(desde, hasta):
+    return np.vstack((np.arange(desde, hasta), -np.arange(desde, hasta))).astype(float)
+
+
+def test_ordenado_con_bloque_es_lo_que_queda_al_agregarlo():
+    buffer = BufferCircular(2, capacidad=10)
+    desde = 0
+    for filas in (4, 5, 3, 7, 12, 1, 0, 9):
+        nuevo = bloque(desde, desde + filas)
+        previsto = buffer.ordenado(nuevo)
+        buffer.agregar(nuevo)
+        desde += filas
+        assert np.array_equal(previsto, buffer.ordenado())
+        assert np.array_equal(previsto, bloque(max(desde - 10, 0), desde))
+    assert np.array_equal(buffer.ordenado(bloque(0, 3), vaciar=True), bloque(0, 3))
+
+
+def test_ordenado_no_reutiliza_el_array_anterior():
+    buffer = BufferCircular(2, capacidad=10)
+    buffer.agregar(bloque(0, 6))
+    anterior = buffer.ordenado()
+    buffer.agregar(bloque(6, 12))
+    buffer.ordenado()
+    assert np.array_equal(anterior, bloque(0, 6)) # Un trabajo que lo siga usando no lo ve cambiar
@@ -0,0 +1,61 @@
+import numpy as np
+
+from canales import AlmacenCanales
+from indice_bloques import IndiceBloques
+from superposicion import Superposicion, TAM_BLOQUE_SUPERPOSICION
+
+
+def captura(n_canales, n_muestras=2000):
+    """(tiempo, datos (canales, muestras)) con un seno distinto por canal."""
+    tiempo = np.linspace(0, 1e-3, n_muestras)
+    datos = np.stack([np.sin(2 * np.pi * (k + 1) * 1e3 * tiempo) for k in range(n_canales)])
+    return tiempo, datos
+
+
+def almacen_superpuesto(n_canales):
+    tiempo, datos = captura(n_canales)
+    return AlmacenCanales(tiempo, datos, [f"CH{k + 1} (V)" for k in range(n_canales)],
+                          IndiceBloques(datos, TAM_BLOQUE_SUPERPOSICION))
+
+
+def test_series_omite_capturas_sin_los_canales_pedidos():
+    superposicion = Superposicion()
+    superposicion.agregar("dos.csv", almacen_superpuesto(2))
+    cuatro = superposicion.agregar("cuatro.csv", almacen_superpuesto(4))
+    escalas, offsets = np.ones(4), np.zeros(4)
+
+    series = superposicion.series(0, 1e-3, 100, [2, 3], escalas, offsets)
+    assert [captura for captura, _, _ in series] == [cuatro]
+    _, canales, valores = series[0]
+    assert list(canales) == [2, 3]
+    assert valores.shape == (2, 200)
+
+    # Con los canales que tienen las dos, aparecen las dos
+    assert len(superposicion.series(0, 1e-3, 100, [0, 3], escalas, offsets)) == 2
+
+
+def test_alinear_sin_canales():
+    superposicion = Superposicion()
+    superpuesta = superposicion.agregar("dos.csv", almacen_superpuesto(2))
+    base = np.linspace(0, 1e-3, 50)
+    assert superpuesta.alinear(base, np.empty(0, dtype=np.intp)).shape == (0, 100)
+
+
+def test_dibujar_superpuesta_con_menos_canales():
+    from render_lote import EscopioSinVentana
+
+    escopio = EscopioSinVentana()
+    tiempo, datos = captura(4)
+    escopio.mostrar_captura(["Time (s)"] + [f"CH{k + 1} (V)" for k in range(4)],
+                            np.vstack((tiempo, datos)), None)
+    escopio.superposicion.agregar("dos.csv", almacen_superpuesto(2))
+    escopio.mostrar_canales[0].set(False) # Sólo CH3 y CH4 visibles: la superpuesta no tiene ninguno
+    escopio.mostrar_canales[1].set(False)
+    escopio.dibujar()
+    escopio.canvas.draw()
+    assert not escopio.imagen_superposicion.get_visible()
+
+    escopio.mostrar_canales[0].set(True)
+    escopio.dibujar()
+    escopio.canvas.draw()
+    assert escopio.imagen_superposicion.get_visible()
@@ -0,0 +1,124 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# --- CONSTANTES DE TRABAJOS ---
+INTERVALO_SONDEO_MS = 16   # Cada cuánto se revisa la cola de resultados (~60 Hz)
+MAX_TRABAJADORES = 2       # Hilos del pool (carga + un análisis en paralelo)
+
+
+class TrabajoCancelado(Exception):
+    """Se lanza dentro de un trabajo cuando el usuario lo cancela."""
+
+
+class Trabajo:
+    """
+    Estado compartido entre la GUI y el hilo que ejecuta un trabajo: la
+    fracción de avance y el pedido de cancelación. El hilo de trabajo nunca
+    toca objetos de Tk ni de matplotlib; sólo escribe acá.
+    """
+
+    def __init__(self, nombre, al_terminar=None, al_fallar=None):
+        self.nombre = nombre
+        self.fraccion = 0.0
+        self.al_terminar = al_terminar
+        self.al_fallar = al_fallar
+        self._cancelar = threading.Event()
+
+    def cancelar(self):
+        self._cancelar.set()
+
+    @property
+    def cancelado(self):
+        return self._cancelar.is_set()
+
+    def progreso(self, fraccion):
+        """
+        Lo llama el trabajo con su avance (0..1). Es también el punto donde
+        se atiende la cancelación: si se pidió, lanza TrabajoCancelado.
+        """
+        if self._cancelar.is_set():
+            raise TrabajoCancelado(self.nombre)
+        self.fraccion = min(max(float(fraccion), 0.0), 1.0)
+
+
+class GestorTrabajos:
+    """
+    Ejecuta funciones pesadas (carga de CSV, índices, análisis) en un pool
+    de hilos. Los resultados vuelven por una cola que se sondea con
+    root.after, así los callbacks al_terminar/al_fallar corren siempre en
+    el hilo de Tk. Se usan hilos y no procesos porque los resultados son
+    arrays/memmaps grandes que así no hay que serializar; numpy y el parser
+    C de pandas sueltan el GIL durante el trabajo pesado.
+    """
+
+    def __init__(self, root, al_progreso=None, max_trabajadores=MAX_TRABAJADORES):
+        self.root = root
+        self.al_progreso = al_progreso # al_progreso(trabajos_activos) en el hilo de Tk
+        self.activos = []
+        self._pool = ThreadPoolExecutor(max_workers=max_trabajadores, thread_name_prefix="trabajo")
+        self._resultados = queue.Queue()
+        self._sondeo = None
+
+    def enviar(self, nombre, funcion, *args, al_terminar=None, al_fallar=None):
+        """
+        Encola funcion(*args, progreso=trabajo.progreso). Un trabajo nuevo
+        con el mismo nombre cancela al anterior (p. ej. abrir otro archivo
+        mientras se carga uno). Devuelve el Trabajo.
+        """
+        for anterior in self.activos:
+            if anterior.nombre == nombre:
+                anterior.cancelar()
+        trabajo = Trabajo(nombre, al_terminar, al_fallar)
+        self.activos.append(trabajo)
+
+        def ejecutar():
+            try:
+                self._resultados.put((trabajo, True, funcion(*args, progreso=trabajo.progreso)))
+            except Exception as e:
+                self._resultados.put((trabajo, False, e))
+
+        self._pool.submit(ejecutar)
+        self._programar_sondeo()
+        return trabajo
+
+    def cancelar_todos(self):
+        for trabajo in self.activos:
+            trabajo.cancelar()
+
+    def cerrar(self):
+        """Cancela lo pendiente y libera el pool sin esperar (al cerrar la ventana)."""
+        self.cancelar_todos()
+        if self._sondeo is not None:
+            self.root.after_cancel(self._sondeo)
+            self._sondeo = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _programar_sondeo(self):
+        if self._sondeo is None:
+            self._sondeo = self.root.after(INTERVALO_SONDEO_MS, self._sondear)
+
+    def _sondear(self):
+        """Vacía la cola de resultados en el hilo de Tk y reporta el avance."""
+        self._sondeo = None
+        while True:
+            try:
+                trabajo, ok, valor = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+            if trabajo in self.activos:
+                self.activos.remove(trabajo)
+            # Los cancelados se descartan: su resultado ya no corresponde a la vista
+            if trabajo.cancelado or isinstance(valor, TrabajoCancelado):
+                continue
+            if ok:
+                if trabajo.al_terminar is not None:
+                    trabajo.al_terminar(valor)
+            elif trabajo.al_fallar is not None:
+                trabajo.al_fallar(valor)
+
+        if self.al_progreso is not None:
+            self.al_progreso([t for t in self.activos if not t.cancelado])
+        if self.activos:
+            self._programar_sondeo()